@@ -3,9 +3,7 @@ import pika
 from aio_pika import connect_robust
 import ast
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from .. import config  # Carga el .env
 
 class PikaClient:
 
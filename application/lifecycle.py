@@ -0,0 +1,182 @@
+import importlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import types
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from . import config  # Carga el .env una sola vez para todo el proceso
+from .metrics import Gauge, Histogram
+
+# Módulos pesados que no deberían importarse al arrancar la API.
+HEAVY_MODULES = ('pandas', 'numpy', 'selenium', 'bs4', 'lxml', 'pika', 'cryptography')
+
+_LOADED_AT = time.perf_counter()
+_import_lock = threading.RLock()
+_eager_imports: Dict[str, float] = {}
+_lazy_imports: Dict[str, float] = {}
+_startup_report: Optional[dict] = None
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+DB_QUERY_SECONDS = Histogram('db_query_seconds', 'Latencia de las consultas a la base de datos del ejecutor.',
+                             labelnames=('statement',))
+DB_POOL_CHECKED_OUT = Gauge('db_pool_checked_out', 'Conexiones del pool de la base de datos en uso.')
+# Verbo y primera tabla de la sentencia: etiqueta de baja cardinalidad para DB_QUERY_SECONDS
+_STATEMENT_PATTERN = re.compile(r'^\s*(\w+)(?:\s+([\w.]+)\s+SET\b|.*?\b(?:FROM|INTO)\s+([\w.]+))?',
+                                re.IGNORECASE | re.DOTALL)
+
+
+# ==============================================================================
+# Importaciones diferidas
+# ==============================================================================
+
+class LazyModule(types.ModuleType):
+    """
+    Módulo que se importa realmente en el primer acceso a uno de sus atributos.
+    Registra el tiempo de importación para el informe de arranque.
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _import_lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    already_loaded = self.__name__ in sys.modules
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    if not already_loaded:
+                        _lazy_imports[self.__name__] = round(time.perf_counter() - start, 4)
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Devuelve un proxy del módulo 'name' que solo lo importa cuando se usa."""
+    return LazyModule(name)
+
+
+def timed_import(name: str):
+    """Importa un módulo de forma inmediata registrando cuánto tardó (para el informe de arranque)."""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    _eager_imports[name] = round(time.perf_counter() - start, 4)
+    return module
+
+
+# ==============================================================================
+# Recursos compartidos del proceso
+# ==============================================================================
+
+def get_engine() -> Engine:
+    """
+    Motor de SQLAlchemy compartido por todo el proceso (su pool de conexiones es thread-safe).
+    Se crea en el hook de arranque, o en el primer uso si el servicio se usa fuera de la API.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                db_url = os.getenv('DB_SERVER_URL')
+                if not db_url:
+                    raise ValueError("La variable de entorno DB_SERVER_URL no está definida.")
+                _engine = create_engine(db_url)
+                _instrument_engine(_engine)
+    return _engine
+
+
+def statement_label(statement: str) -> str:
+    match = _STATEMENT_PATTERN.match(statement)
+    if not match:
+        return 'other'
+    verb, updated, table = match.groups()
+    table = updated or table
+    return f'{verb.upper()} {table}' if table else verb.upper()
+
+
+def _instrument_engine(engine: Engine):
+    """Registra la latencia de cada sentencia y expone las conexiones en uso del pool."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if starts:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - starts.pop(), statement=statement_label(statement))
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - starts.pop(), statement='error')
+
+    DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+
+
+def _preload_modules():
+    """Importa en segundo plano los módulos pesados para que la primera ejecución no los pague."""
+    for name in ('pandas', 'numpy', 'selenium.webdriver', 'bs4', 'lxml.etree', 'pika',
+                 'cryptography.hazmat.primitives.ciphers.aead'):
+        try:
+            lazy_import(name)._load()
+        except ImportError as e:
+            logging.warning(f"Could not preload module {name}: {e}")
+
+
+def startup():
+    """
+    Hook de arranque de la aplicación: crea los clientes compartidos y genera el informe de arranque.
+    Con PRELOAD_MODULES=true (por defecto) los módulos pesados se importan después en segundo plano.
+    """
+    global _startup_report
+    start = time.perf_counter()
+    try:
+        get_engine()
+    except Exception as e:
+        logging.error(f"Could not create database engine at startup: {e}")
+    _startup_report = {
+        'seconds_to_startup': round(time.perf_counter() - _LOADED_AT, 4),
+        'startup_hook_seconds': round(time.perf_counter() - start, 4),
+        'eager_imports': dict(_eager_imports),
+        'heavy_modules_loaded': sorted(name for name in HEAVY_MODULES if name in sys.modules),
+    }
+    logging.info(f"Startup report: {_startup_report}")
+
+    if os.getenv('PRELOAD_MODULES', 'true').lower() == 'true':
+        threading.Thread(target=_preload_modules, name="ModulePreloader", daemon=True).start()
+
+
+def shutdown():
+    """Hook de parada: libera los pools de conexiones de la base de datos, los datasources y las sesiones HTTP."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+    from .services.http_client import get_http_client
+    from .services.datasources import get_datasource_registry
+    get_http_client().close()
+    get_datasource_registry().dispose()
+
+
+def get_startup_report() -> dict:
+    """Informe de arranque con el coste de las importaciones inmediatas y diferidas."""
+    report = dict(_startup_report or {})
+    report['lazy_imports'] = dict(_lazy_imports)
+    return report
@@ -1,7 +1,9 @@
 # application/__init__.py
 from fastapi import FastAPI
-from .routers import apirouter
+from fastapi.responses import PlainTextResponse
 from . import config
+from . import lifecycle
+from . import metrics
 
 app_configs = {"title": "test-executor-api",
                "EVIDENCE_FILE_DIR": config.EVIDENCE_FILE_DIR,
@@ -21,5 +23,14 @@ app_configs = {"title": "test-executor-api",
 
 def create_app():
     app = FastAPI(**app_configs)
+    # Se importa con medición para el informe de arranque (ver lifecycle.get_startup_report)
+    apirouter = lifecycle.timed_import(f"{__package__}.routers.apirouter")
     app.include_router(apirouter.router)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], response_class=PlainTextResponse)
+    app.add_event_handler("startup", lifecycle.startup)
+    app.add_event_handler("shutdown", lifecycle.shutdown)
     return app
+
+async def metrics_endpoint():
+    # Formato de texto de Prometheus
+    return PlainTextResponse(metrics.exposition(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,177 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Límites (en segundos) de los buckets por defecto de los histogramas de latencia.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Métricas registradas en el proceso, en orden de creación.
+REGISTRY: List['_Metric'] = []
+
+
+class _Metric(ABC):
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}={_quote(value)}' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Líneas de la exposición en formato de texto de Prometheus."""
+
+
+class Counter(_Metric):
+    """Contador monótono por combinación de etiquetas."""
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {','.join(key): value for key, value in self._series.items()}
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = dict(self._series)
+        return [f'{self.name}_total{self._labels(key)} {_number(value)}' for key, value in series.items()]
+
+
+class Gauge(_Metric):
+    """
+    Valor instantáneo por combinación de etiquetas. Con set_function() el valor (sin
+    etiquetas) se calcula al exponer las métricas, sin coste en el camino caliente.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = dict(self._series)
+        if self._function is not None:
+            try:
+                series[()] = self._function()
+            except Exception:
+                series.pop((), None)
+        return [f'{self.name}{self._labels(key)} {_number(value)}' for key, value in series.items()]
+
+
+class Histogram(_Metric):
+    """
+    Histograma acumulativo por combinación de etiquetas, al estilo Prometheus.
+    Thread-safe; observar un valor es una búsqueda lineal en los buckets y una suma.
+    """
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Cada serie: [conteos por bucket..., conteo total, suma]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Mide la duración del bloque y la registra con las etiquetas dadas."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """
+        Devuelve {etiquetas: {'count', 'sum', 'buckets': {límite: conteo acumulado}}},
+        con las etiquetas unidas por ',' en el orden de labelnames.
+        """
+        result = {}
+        for key, values in self._copy().items():
+            result[','.join(key)] = {'count': values[-2], 'sum': round(values[-1], 6), 'buckets': self._cumulative(values)}
+        return result
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, values in self._copy().items():
+            for bound, count in self._cumulative(values).items():
+                lines.append(f'{self.name}_bucket{self._labels(key, f"le={_quote(bound)}")} {count}')
+            lines.append(f'{self.name}_sum{self._labels(key)} {_number(values[-1])}')
+            lines.append(f'{self.name}_count{self._labels(key)} {values[-2]}')
+        return lines
+
+    def _copy(self) -> Dict[Tuple[str, ...], list]:
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def _cumulative(self, values: list) -> Dict[str, int]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, values):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = values[-2]
+        return buckets
+
+
+def exposition() -> str:
+    """Todas las métricas registradas en el formato de texto de Prometheus (versión 0.0.4)."""
+    lines = []
+    for metric in list(REGISTRY):
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
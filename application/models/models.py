@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class CredentialModel(BaseModel):
@@ -10,6 +10,25 @@ class CredentialModel(BaseModel):
     file_path: Optional[str] = None
 
 
+class PerformanceProfileModel(BaseModel):
+    """Perfil de carga rápida de páginas para las sesiones de Chrome de una ejecución"""
+    page_load_strategy: Optional[Literal['normal', 'eager', 'none']] = 'normal'
+    block_images: Optional[bool] = False
+    block_media: Optional[bool] = False
+    blocked_url_patterns: Optional[List[str]] = []  # p. ej. '*google-analytics.com*', '*.woff2'
+    disable_extensions: Optional[bool] = False
+    disable_background_networking: Optional[bool] = False
+    highlight: Optional[bool] = True  # False omite el resaltado (y la pausa) de tick()
+    capture_timing: Optional[bool] = False  # Navigation Timing y Web Vitals tras cada get y navegación por click
+
+
+class RateLimitModel(BaseModel):
+    """Límite de peticiones hacia un destino (host o servicio de integración)"""
+    rate: Optional[float] = None  # peticiones por segundo
+    burst: Optional[int] = None
+    max_in_flight: Optional[int] = None
+
+
 class TestExecutionRequest(BaseModel):
     script: str
     before_script: str
@@ -20,6 +39,18 @@ class TestExecutionRequest(BaseModel):
     test_execution_id: str
     web: bool
     credentials: Optional[List[CredentialModel]] = []
+    reuse_container: Optional[bool] = False
+    profile: Optional[Literal['vnc', 'headless']] = 'vnc'
+    performance: Optional[PerformanceProfileModel] = None
+    # Memoización de getGsheet, executeQuery de lectura y consumeService GET
+    memoize: Optional[bool] = False
+    memoize_scope: Optional[Literal['execution', 'ttl']] = 'execution'
+    # sendMail y sendJmsQueue se encolan y se entregan en segundo plano
+    async_side_effects: Optional[bool] = False
+    # {destino: límite}, con destino = host de la url de consumeService o 'rest', 'database', 'jms', 'mail', 'gdrive'
+    rate_limits: Optional[Dict[str, RateLimitModel]] = None
+    # Fracción de casos (0-1) cuya línea de tiempo se guarda como trace.json junto a su evidencia
+    trace_sample_rate: Optional[float] = None
 
 class StopExecutionRequest(BaseModel):
     id: int
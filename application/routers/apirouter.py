@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 #from ..services.test_executor_service import TestExecutorService
 from ..services.test_executor_service_v2 import TestExecutorService
-from ..services.docker_service import DockerService
+from ..services.docker_service_v2 import start_image_build, get_image_build_status
+from ..lifecycle import get_startup_report
+from ..services.docker_client import get_async_docker, get_docker_latency
+from ..services.http_client import get_http_latency
 from ..services.execution_service import ExecutionService
 from ..models.models import TestExecutionRequest, StopExecutionRequest, ExecutionPorts
 import threading
@@ -11,12 +14,28 @@ logging.basicConfig(level=logging.INFO,
                     format='(%(threadName)-10s) %(message)s',)
 
 router = APIRouter(prefix="/test-executor/v1")
-dockerService = DockerService()
 
 @router.on_event("startup")
 async def startup():
     print("start")
-    dockerService.createDockerImage()
+    # La imagen se construye en segundo plano (y solo si cambiaron los recursos)
+    start_image_build()
+
+@router.get("/image/status", status_code=200)
+async def image_status():
+    return get_image_build_status()
+
+@router.get("/startup/report", status_code=200)
+async def startup_report():
+    return get_startup_report()
+
+@router.get("/docker/latency", status_code=200)
+async def docker_latency():
+    return get_docker_latency()
+
+@router.get("/http/latency", status_code=200)
+async def http_latency():
+    return get_http_latency()
 
 @router.post("/execute", status_code=200)
 async def execute(params: TestExecutionRequest):
@@ -49,4 +68,5 @@ async def stop(params: StopExecutionRequest):
 async def get_vnc_port(execution_id: str):
     # Aquí se crea una instancia del servicio de ejecución.
     executor_service = ExecutionService() 
-    return executor_service.get_execution_vnc_port(execution_id)
\ No newline at end of file
+    # Consulta la BD y arranca el VNC en Docker: se ejecuta fuera del event loop
+    return await get_async_docker().run(executor_service.get_execution_vnc_port, execution_id)
\ No newline at end of file
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from ..services.test_executor_service_v2 import TestExecutorService
-from ..services.docker_service_v2 import DockerService
+from ..services.docker_service_v2 import start_image_build, get_image_build_status
+from ..lifecycle import get_startup_report
+from ..services.docker_client import get_async_docker, get_docker_latency
+from ..services.http_client import get_http_latency
 from ..services.execution_service_v2 import ExecutionService
 from ..models.models import TestExecutionRequest, StopExecutionRequest, ExecutionPorts
 import threading
@@ -37,16 +40,45 @@ async def startup_event():
     Ideal para tareas de inicialización como construir una imagen de Docker si no existe.
     """
     logger.info("Application startup: Initializing services...")
-    # Es mejor instanciar aquí para usarlo en el evento de inicio.
-    docker_service = DockerService()
-    # Descomenta la siguiente línea si necesitas construir la imagen al iniciar.
-    docker_service.create_docker_image() # Asumiendo que este método existe en tu clase refactorizada
+    # La construcción de la imagen corre en segundo plano y se omite si los recursos no cambiaron;
+    # su progreso se consulta en /image/status.
+    start_image_build()
     logger.info("Startup tasks completed.")
 
 # ==============================================================================
 # Endpoints de la API
 # ==============================================================================
 
+@router.get("/image/status", status_code=200)
+async def image_status():
+    """
+    Informa del estado de la imagen de Selenium: 'building', 'ready', 'stale' o 'failed'.
+    Las ejecuciones web esperan a que la imagen esté disponible antes de crear su contenedor.
+    """
+    return get_image_build_status()
+
+
+@router.get("/startup/report", status_code=200)
+async def startup_report():
+    """
+    Devuelve el informe de arranque: tiempo hasta el hook de inicio, coste de las importaciones
+    inmediatas y de las diferidas (en su primer uso) y qué módulos pesados se cargaron al arrancar.
+    """
+    return get_startup_report()
+
+
+@router.get("/docker/latency", status_code=200)
+async def docker_latency():
+    """Histogramas de latencia de las llamadas al daemon de Docker, por operación y resultado."""
+    return get_docker_latency()
+
+
+@router.get("/http/latency", status_code=200)
+async def http_latency():
+    """Histogramas de latencia de los servicios de integración, por servicio y resultado."""
+    return get_http_latency()
+
+
 @router.post("/execute", status_code=202) # 202 Accepted es más apropiado para tareas en segundo plano
 async def execute(params: TestExecutionRequest):
     """
@@ -105,5 +137,9 @@ async def get_vnc_port(execution_id: str, exec_service: ExecutionService = Depen
             status_code=404,
             detail=f"Execution with ID '{execution_id}' not found or has no associated ports."
         )
+
+    # El servidor VNC solo se arranca cuando alguien quiere observar la ejecución.
+    if not await get_async_docker().run(exec_service.attach_vnc, ports):
+        logger.warning(f"VNC server could not be started for execution: {execution_id}")
         
     return ports
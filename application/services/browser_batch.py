@@ -0,0 +1,94 @@
+from typing import Dict, List, Sequence
+from .locator_resolver import FIND_ONE_JS, LocatorResolver
+
+# Localiza varios selectores y aplica una operación a cada elemento en una sola llamada.
+# arguments: [candidatos por selector, operación, argumento por selector]
+_BATCH_SCRIPT = FIND_ONE_JS + """
+var requests = arguments[0], op = arguments[1], args = arguments[2];
+var results = [], missing = [], learned = [];
+function setValue(element, value) {
+  var proto = element instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+    : element instanceof HTMLSelectElement ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+  var descriptor = Object.getOwnPropertyDescriptor(proto, 'value');
+  if (descriptor && descriptor.set) { descriptor.set.call(element, value); } else { element.value = value; }
+  element.dispatchEvent(new Event('input', {bubbles: true}));
+  element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+for (var i = 0; i < requests.length; i++) {
+  var element = null;
+  for (var j = 0; j < requests[i].length && !element; j++) {
+    element = findOne(requests[i][j][0], requests[i][j][1]);
+    if (element) learned.push([i, j]);
+  }
+  if (!element) { missing.push(i); results.push(null); continue; }
+  switch (op) {
+    case 'element': results.push(element); break;
+    case 'text': results.push(element.innerText); break;
+    case 'attribute':
+      var prop = element[args[i]];
+      results.push(prop !== undefined && prop !== null && typeof prop !== 'object' && typeof prop !== 'function'
+        ? String(prop) : element.getAttribute(args[i]));
+      break;
+    case 'fill': setValue(element, args[i]); results.push(true); break;
+    case 'click': element.click(); results.push(true); break;
+  }
+}
+return {results: results, missing: missing, learned: learned};
+"""
+
+
+class BrowserBatch:
+    """
+    Primitivas por lotes: resuelven muchos selectores y operan sobre sus elementos en un
+    único execute_script, en lugar de una búsqueda más una acción por elemento.
+    """
+
+    def __init__(self, resolver: LocatorResolver):
+        self.resolver = resolver
+
+    def _run(self, driver, selectors: Sequence[str], op: str, args: Sequence = None) -> list:
+        candidates = [[list(c) for c in self.resolver.candidates(selector)] for selector in selectors]
+        response = driver.execute_script(_BATCH_SCRIPT, candidates, op, list(args or [None] * len(selectors)))
+        for index, strategy_index in response['learned']:
+            self.resolver.learn(selectors[index], candidates[index][strategy_index][0])
+        if response['missing']:
+            missing = [selectors[i] for i in response['missing']]
+            raise Exception(f"Element no reachable: {missing}")
+        return response['results']
+
+    def find_all(self, driver, selectors: Sequence[str]) -> list:
+        return self._run(driver, list(selectors), 'element')
+
+    def get_texts(self, driver, selectors: Sequence[str]) -> List[str]:
+        return self._run(driver, list(selectors), 'text')
+
+    def get_attributes(self, driver, selectors: Sequence[str], attribute: str) -> List[str]:
+        selectors = list(selectors)
+        return self._run(driver, selectors, 'attribute', [attribute] * len(selectors))
+
+    def fill(self, driver, values: Dict[str, str], native: bool = False):
+        """
+        Rellena un formulario {selector: valor}. Por defecto asigna el valor en el navegador y
+        dispara los eventos 'input' y 'change'; con native=True teclea con send_keys (más lento,
+        pero idéntico a un usuario) tras localizar todos los campos en una sola llamada.
+        """
+        selectors = list(values.keys())
+        if not native:
+            self._run(driver, selectors, 'fill', [str(values[s]) for s in selectors])
+            return
+        for selector, element in zip(selectors, self.find_all(driver, selectors)):
+            element.clear()
+            element.send_keys(str(values[selector]))
+
+    def click_all(self, driver, selectors: Sequence[str], native: bool = True):
+        """
+        Hace click en cada selector, en orden. Con native=True (por defecto) se usa el click de
+        WebDriver sobre los elementos localizados en una sola llamada; con native=False todo el
+        lote se resuelve con element.click() en el navegador.
+        """
+        selectors = list(selectors)
+        if not native:
+            self._run(driver, selectors, 'click')
+            return
+        for element in self.find_all(driver, selectors):
+            element.click()
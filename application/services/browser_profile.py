@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Patrones de URL de audio y vídeo que se bloquean con 'block_media'.
+MEDIA_URL_PATTERNS = ('*.mp4', '*.webm', '*.ogg', '*.ogv', '*.mp3', '*.wav', '*.m4a', '*.m3u8', '*.mpd')
+
+DEFAULT_PERFORMANCE = {
+    'page_load_strategy': 'normal',
+    'block_images': False,
+    'block_media': False,
+    'blocked_url_patterns': [],
+    'disable_extensions': False,
+    'disable_background_networking': False,
+    'highlight': True,
+    'capture_timing': False,
+}
+
+# Tiempo medio de página por caso de la última ejecución de referencia (contenedor 'vnc' y perfil
+# por defecto, sin bloqueos), por nombre de ejecución. Vive en memoria del proceso.
+_baselines: Dict[str, float] = {}
+_baselines_lock = threading.Lock()
+
+
+def performance_settings(performance: Optional[dict]) -> dict:
+    """Completa el perfil de rendimiento de la petición con los valores por defecto."""
+    settings = dict(DEFAULT_PERFORMANCE)
+    settings.update({k: v for k, v in (performance or {}).items() if v is not None})
+    return settings
+
+
+def session_signature(settings: dict) -> tuple:
+    """
+    Opciones fijadas al crear la sesión de Chrome. Una sesión reutilizada solo sirve
+    si fue creada con la misma firma; los patrones bloqueados se aplican en caliente.
+    """
+    return (settings['page_load_strategy'], settings['block_images'],
+            settings['disable_extensions'], settings['disable_background_networking'])
+
+
+def apply_session_options(options, settings: dict, prefs: dict):
+    """Ajusta las ChromeOptions (y las preferencias que se pasarán a Chrome) según el perfil."""
+    options.page_load_strategy = settings['page_load_strategy']
+    if settings['block_images']:
+        prefs['profile.managed_default_content_settings.images'] = 2  # 2 = bloquear
+    if settings['disable_extensions']:
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-component-extensions-with-background-pages")
+    if settings['disable_background_networking']:
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+
+
+def blocked_url_patterns(settings: dict) -> List[str]:
+    patterns = list(settings['blocked_url_patterns'] or [])
+    if settings['block_media']:
+        patterns.extend(MEDIA_URL_PATTERNS)
+    return patterns
+
+
+def apply_blocked_urls(driver, settings: dict):
+    """
+    Bloquea en la sesión las URL del perfil vía CDP. Se llama también con una lista vacía
+    para limpiar los patrones de una ejecución anterior en sesiones reutilizadas.
+    """
+    patterns = blocked_url_patterns(settings)
+    try:
+        driver.execute('executeCdpCommand', {'cmd': 'Network.enable', 'params': {}})
+        driver.execute('executeCdpCommand', {'cmd': 'Network.setBlockedURLs', 'params': {'urls': patterns}})
+    except Exception as e:
+        if patterns:
+            logging.warning(f"Could not block URL patterns {patterns}: {e}")
+
+
+class PageTimer:
+    """
+    Acumula el tiempo de navegación (get) por caso y para toda la ejecución.
+
+    Con baseline_key (el nombre de la ejecución), una ejecución de referencia (contenedor 'vnc'
+    y perfil por defecto) registra su tiempo medio de página por caso, y las siguientes con otro
+    perfil o contenedor reportan la ganancia frente a él.
+    """
+
+    def __init__(self, settings: dict, baseline_key: Optional[str] = None, container_profile: str = 'vnc'):
+        self.settings = settings
+        self.baseline_key = baseline_key
+        self.container_profile = container_profile
+        self._lock = threading.Lock()
+        self.navigations = 0
+        self.seconds = 0.0
+        self.cases: List[float] = []
+        # Pausas de resaltado de tick() omitidas por el perfil (highlight=False)
+        self.skipped_highlight_seconds = 0.0
+        # Tiempo de página del caso en curso, por hilo (los casos corren en paralelo)
+        self._local = threading.local()
+
+    def navigate(self, driver, url: str) -> float:
+        start = time.perf_counter()
+        driver.get(url)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.navigations += 1
+            self.seconds += elapsed
+        if getattr(self._local, 'case_seconds', None) is not None:
+            self._local.case_seconds += elapsed
+        return elapsed
+
+    def skip_highlight(self, seconds: float):
+        with self._lock:
+            self.skipped_highlight_seconds += seconds
+
+    def start_case(self):
+        self._local.case_seconds = 0.0
+
+    def end_case(self):
+        seconds = getattr(self._local, 'case_seconds', None)
+        self._local.case_seconds = None
+        if seconds is not None:
+            with self._lock:
+                self.cases.append(seconds)
+
+    @property
+    def is_baseline(self) -> bool:
+        """Contenedor 'vnc' sin cambios de carga de página (capture_timing y highlight no cuentan)."""
+        ignored = ('capture_timing', 'highlight')
+        return self.container_profile == 'vnc' and all(
+            self.settings[k] == v for k, v in DEFAULT_PERFORMANCE.items() if k not in ignored)
+
+    def report(self) -> dict:
+        """
+        Resumen para test_execution_data: el perfil usado, los tiempos de página y, si hay una
+        ejecución de referencia con el mismo nombre, la ganancia por caso frente a ella.
+        """
+        with self._lock:
+            cases = list(self.cases)
+            mean_case = sum(cases) / len(cases) if cases else None
+            report = {
+                'profile': {k: self.settings[k] for k in ('page_load_strategy', 'block_images', 'block_media',
+                                                           'disable_extensions', 'disable_background_networking',
+                                                           'highlight', 'capture_timing')},
+                'blocked_url_patterns': len(blocked_url_patterns(self.settings)),
+                'navigations': self.navigations,
+                'page_seconds': round(self.seconds, 3),
+                'mean_navigation_seconds': round(self.seconds / self.navigations, 3) if self.navigations else None,
+                'mean_case_page_seconds': round(mean_case, 3) if mean_case is not None else None,
+                'skipped_highlight_seconds': round(self.skipped_highlight_seconds, 3),
+            }
+        report.update(self._compare_baseline(mean_case))
+        return report
+
+    def _compare_baseline(self, mean_case: Optional[float]) -> dict:
+        if self.baseline_key is None or mean_case is None:
+            return {}
+        with _baselines_lock:
+            if self.is_baseline:
+                _baselines[self.baseline_key] = mean_case
+                return {'baseline': True}
+            baseline = _baselines.get(self.baseline_key)
+        if baseline is None:
+            return {'baseline_case_page_seconds': None}
+        gain = baseline - mean_case
+        return {
+            'baseline_case_page_seconds': round(baseline, 3),
+            'gain_case_page_seconds': round(gain, 3),
+            'gain_percent': round(100 * gain / baseline, 1) if baseline else None,
+        }
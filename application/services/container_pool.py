@@ -0,0 +1,193 @@
+from typing import List, Optional
+import threading
+import time
+import os
+import logging
+from .docker_service_v2 import DockerService
+from ..metrics import Counter, Gauge
+
+# Script que limpia el almacenamiento de la página actual antes de abandonar la sesión.
+_CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+return window.location.origin;
+"""
+
+CONTAINER_POOL_IDLE = Gauge('container_pool_idle', 'Contenedores libres en el conjunto reutilizable.')
+CONTAINER_POOL_ACQUISITIONS = Counter('container_pool_acquisitions',
+                                      'Peticiones de contenedor al conjunto reutilizable, por resultado.',
+                                      labelnames=('outcome',))
+
+
+class ContainerPool:
+    """
+    Conjunto de contenedores de Selenium ya arrancados que pueden reutilizarse entre ejecuciones.
+
+    Cada entrada es un diccionario {'container', 'ports', 'profile', 'driver', 'uses', 'key', 'released_at'}.
+    Con la estrategia 'reset' la sesión de WebDriver se conserva y se limpia (cookies, storage,
+    caché y ventanas extra); con 'quit' se cierra la sesión y solo se conserva el contenedor.
+    """
+    def __init__(self):
+        self.max_idle = int(os.getenv('CONTAINER_POOL_MAX_IDLE', '2'))
+        self.max_reuse = int(os.getenv('CONTAINER_MAX_REUSE', '20'))
+        self.idle_ttl = float(os.getenv('CONTAINER_POOL_IDLE_TTL', '300'))
+        self.strategy = os.getenv('CONTAINER_REUSE_STRATEGY', 'reset').lower()
+        self._idle: List[dict] = []
+        self._lock = threading.Lock()
+        self._docker_service: Optional[DockerService] = None
+        self._reaper: Optional[threading.Thread] = None
+
+    def _get_docker_service(self) -> DockerService:
+        if self._docker_service is None:
+            self._docker_service = DockerService()
+        return self._docker_service
+
+    def acquire(self, key: str, profile: str) -> Optional[dict]:
+        """
+        Entrega un contenedor libre y sano del perfil pedido, priorizando los usados por la misma suite (key).
+        Devuelve None si no hay ninguno disponible.
+        """
+        while True:
+            with self._lock:
+                candidates = [e for e in self._idle if e['profile'] == profile]
+                if not candidates:
+                    CONTAINER_POOL_ACQUISITIONS.inc(outcome='miss')
+                    return None
+                entry = next((e for e in candidates if e['key'] == key), candidates[0])
+                self._idle.remove(entry)
+            if self._is_healthy(entry):
+                CONTAINER_POOL_ACQUISITIONS.inc(outcome='hit')
+                entry['uses'] += 1
+                logging.info(f"Reusing container {entry['container'].name} (use {entry['uses']}/{self.max_reuse}).")
+                return entry
+            self._discard(entry)
+
+    def release(self, entry: dict, key: str) -> bool:
+        """
+        Devuelve un contenedor al conjunto reutilizable tras limpiar el estado del navegador.
+        Si no puede reutilizarse (límite de usos, conjunto lleno o fallo al limpiar) se destruye.
+
+        Returns:
+            True si el contenedor quedó disponible para otra ejecución.
+        """
+        if entry['uses'] >= self.max_reuse:
+            logging.info(f"Container {entry['container'].name} reached max reuse count, destroying it.")
+            self._discard(entry)
+            return False
+
+        if not self._reset_browser(entry):
+            self._discard(entry)
+            return False
+
+        entry['key'] = key
+        entry['released_at'] = time.time()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(entry)
+                self._ensure_reaper()
+                return True
+        self._discard(entry)
+        return False
+
+    def _reset_browser(self, entry: dict) -> bool:
+        driver = entry.get('driver')
+        if driver is None:
+            return True
+        if self.strategy == 'quit':
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.warning(f"Error al cerrar WebDriver: {e}")
+            entry['driver'] = None
+            return True
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            origin = driver.execute_script(_CLEAR_STORAGE_SCRIPT)
+            try:
+                # CDP borra cookies y caché de todos los dominios, no solo los del documento actual.
+                driver.execute('executeCdpCommand', {'cmd': 'Network.clearBrowserCookies', 'params': {}})
+                driver.execute('executeCdpCommand', {'cmd': 'Network.clearBrowserCache', 'params': {}})
+                if origin and origin != 'null':
+                    driver.execute('executeCdpCommand', {'cmd': 'Storage.clearDataForOrigin',
+                                                         'params': {'origin': origin, 'storageTypes': 'all'}})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logging.warning(f"Could not reset browser state of {entry['container'].name}: {e}")
+            return False
+
+    def _is_healthy(self, entry: dict) -> bool:
+        if time.time() - entry['released_at'] > self.idle_ttl:
+            return False
+        try:
+            cache = self._get_docker_service().state_cache
+            if cache and cache.synced:
+                state = cache.get(entry['container'].id)
+                if not state or state['status'] != 'running' or state.get('health') == 'unhealthy' \
+                        or state.get('oom'):
+                    return False
+            else:
+                entry['container'].reload()
+                if entry['container'].status != 'running':
+                    return False
+            if entry.get('driver') is not None:
+                return entry['driver'].execute_script('return document.readyState') is not None
+            return True
+        except Exception as e:
+            logging.warning(f"Pooled container {entry['container'].name} failed health check: {e}")
+            return False
+
+    def _discard(self, entry: dict):
+        if entry.get('driver') is not None:
+            try:
+                entry['driver'].quit()
+            except Exception:
+                pass
+        try:
+            self._get_docker_service().destroy_container(entry['container'].name)
+        except Exception as e:
+            # Se registra y se sigue: un fallo aquí no debe detener al llamador ni al hilo de limpieza
+            logging.error(f"Could not destroy pooled container {entry['container'].name}: {e}")
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap, name="ContainerPoolReaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        """Destruye periódicamente los contenedores que superaron el tiempo máximo en espera."""
+        while True:
+            time.sleep(min(self.idle_ttl, 30))
+            self.reap_expired()
+
+    def reap_expired(self) -> int:
+        """Destruye los contenedores libres que superaron idle_ttl y devuelve cuántos eran."""
+        now = time.time()
+        with self._lock:
+            expired = [e for e in self._idle if now - e['released_at'] > self.idle_ttl]
+            for entry in expired:
+                self._idle.remove(entry)
+        for entry in expired:
+            logging.info(f"Destroying idle container {entry['container'].name}.")
+            self._discard(entry)
+        return len(expired)
+
+
+_pool_lock = threading.Lock()
+_pool_instance: Optional[ContainerPool] = None
+
+
+def get_container_pool() -> ContainerPool:
+    """Devuelve el conjunto de contenedores reutilizables compartido por el proceso."""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            _pool_instance = ContainerPool()
+            CONTAINER_POOL_IDLE.set_function(lambda: len(_pool_instance._idle))
+        return _pool_instance
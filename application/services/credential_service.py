@@ -1,13 +1,17 @@
 import base64
 import os
 import logging
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.backends import default_backend
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from ..lifecycle import lazy_import
 
-load_dotenv()
+# cryptography se importa en el primer descifrado para no penalizar el arranque
+aead = lazy_import('cryptography.hazmat.primitives.ciphers.aead')
+pbkdf2 = lazy_import('cryptography.hazmat.primitives.kdf.pbkdf2')
+hashes = lazy_import('cryptography.hazmat.primitives.hashes')
+backends = lazy_import('cryptography.hazmat.backends')
 
 logging.basicConfig(level=logging.INFO,
                     format='(%(threadName)-10s) [%(levelname)s] %(message)s',)
@@ -23,10 +27,57 @@ CREDENTIAL_TYPE_PASSWORD = 1
 CREDENTIAL_TYPE_CERTIFICATE = 2
 
 
+class SecretStore:
+    """
+    Almacén en memoria de secretos con caducidad (TTL) que puede borrarse sobrescribiendo
+    los bytes con ceros. Los valores se guardan como bytearray para poder anularlos;
+    las copias str entregadas a los scripts no pueden anularse y quedan a cargo del GC.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[object, Tuple[bytearray, float]] = {}
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self._entries[key]
+                _zeroize(value)
+                return None
+            return bytes(value)
+
+    def put(self, key, value: bytes):
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                _zeroize(previous[0])
+            self._entries[key] = (bytearray(value), time.monotonic() + self.ttl)
+
+    def clear(self):
+        """Sobrescribe con ceros y descarta todos los secretos."""
+        with self._lock:
+            for value, _ in self._entries.values():
+                _zeroize(value)
+            self._entries.clear()
+
+
+def _zeroize(value: bytearray):
+    for i in range(len(value)):
+        value[i] = 0
+
+
 class CredentialService:
     """
     Servicio para desencriptar credenciales usando AES-256-GCM.
     Compatible con CredentialEncryptionService de robomatic-core.
+
+    Las claves derivadas (por salt) y los valores descifrados (por credencial) se guardan en
+    un SecretStore durante la ejecución, así PBKDF2 solo se paga una vez por credencial.
     """
 
     def __init__(self, credentials: list = None):
@@ -38,6 +89,12 @@ class CredentialService:
         """
         self.secret_key = os.getenv('ENCRYPTION_SECRET_KEY', 'robomatic-default-secret-key-2024')
         self.credentials = {}
+        ttl = float(os.getenv('CREDENTIAL_CACHE_TTL', '3600'))
+        self._keys = SecretStore(ttl)
+        self._values = SecretStore(ttl)
+        # Un candado por credencial evita descifrar dos veces la misma desde hilos concurrentes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
         
         if credentials:
             for cred in credentials:
@@ -68,10 +125,19 @@ class CredentialService:
         credential_type = cred.get('credential_type_id') or cred.get('credentialTypeId')
         
         if credential_type == CREDENTIAL_TYPE_PASSWORD:
+            cached = self._values.get(name)
+            if cached is not None:
+                return cached.decode('utf-8')
             encrypted_value = cred.get('encrypted_value') or cred.get('encryptedValue')
             if not encrypted_value:
                 raise Exception(f"No encrypted value for credential: {name}")
-            return self.decrypt(encrypted_value)
+            with self._lock_for(name):
+                cached = self._values.get(name)
+                if cached is not None:
+                    return cached.decode('utf-8')
+                plaintext = self.decrypt(encrypted_value)
+                self._values.put(name, plaintext.encode('utf-8'))
+                return plaintext
         
         elif credential_type == CREDENTIAL_TYPE_CERTIFICATE:
             file_path = cred.get('file_path') or cred.get('filePath')
@@ -82,6 +148,42 @@ class CredentialService:
         else:
             raise Exception(f"Unknown credential type: {credential_type}")
 
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def preload(self, max_workers: int = 4) -> int:
+        """
+        Descifra por adelantado todas las credenciales de tipo password en un pool de hilos,
+        pensado para correr mientras se aprovisiona el entorno.
+
+        Returns:
+            Número de credenciales descifradas.
+        """
+        names = [name for name, cred in self.credentials.items()
+                 if (cred.get('credential_type_id') or cred.get('credentialTypeId')) == CREDENTIAL_TYPE_PASSWORD]
+        if not names:
+            return 0
+
+        def load(name):
+            try:
+                self.get_credential(name)
+                return True
+            except Exception as e:
+                # El error se volverá a producir (y a reportar) cuando el script pida la credencial
+                logging.warning(f"Could not preload credential {name}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names)), thread_name_prefix="CredDecrypt") as pool:
+            loaded = sum(pool.map(load, names))
+        logging.info(f"Preloaded {loaded}/{len(names)} credentials")
+        return loaded
+
+    def clear(self):
+        """Borra de memoria las claves derivadas y los valores descifrados."""
+        self._keys.clear()
+        self._values.clear()
+
     def decrypt(self, encrypted_text: str) -> str:
         """
         Desencripta un valor encriptado con AES-256-GCM.
@@ -107,7 +209,7 @@ class CredentialService:
             key = self._derive_key(self.secret_key, salt)
             
             # Desencriptar usando AES-GCM
-            aesgcm = AESGCM(key)
+            aesgcm = aead.AESGCM(key)
             plaintext = aesgcm.decrypt(iv, ciphertext, None)
             
             return plaintext.decode('utf-8')
@@ -119,6 +221,7 @@ class CredentialService:
     def _derive_key(self, password: str, salt: bytes) -> bytes:
         """
         Deriva una clave AES-256 desde la contraseña usando PBKDF2.
+        Las claves se cachean por salt, ya que la contraseña maestra no cambia durante la ejecución.
         
         Args:
             password: Contraseña maestra
@@ -127,13 +230,18 @@ class CredentialService:
         Returns:
             Clave derivada de 256 bits
         """
-        kdf = PBKDF2HMAC(
+        cached = self._keys.get(salt)
+        if cached is not None:
+            return cached
+        kdf = pbkdf2.PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=KEY_LENGTH,
             salt=salt,
             iterations=ITERATIONS,
-            backend=default_backend()
+            backend=backends.default_backend()
         )
-        return kdf.derive(password.encode('utf-8'))
+        key = kdf.derive(password.encode('utf-8'))
+        self._keys.put(salt, key)
+        return key
 
 
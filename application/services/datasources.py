@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+# Prefijo y sufijo de las variables que declaran datasources: DATASOURCE_<NOMBRE>_URL=<URL de SQLAlchemy>
+_ENV_PREFIX = 'DATASOURCE_'
+_ENV_SUFFIX = '_URL'
+
+# Sentencias de lectura admitidas (primera palabra, tras los comentarios iniciales)
+READ_STATEMENTS = ('select', 'with', 'values', 'show', 'explain', 'describe')
+_LEADING = re.compile(r'^(?:\s|\(|--[^\n]*|/\*.*?\*/)*', re.S)
+# Motores que aceptan SET TRANSACTION READ ONLY como primera sentencia de la transacción
+_SET_TRANSACTION_READ_ONLY = ('mysql', 'mariadb', 'oracle')
+
+_registry_lock = threading.Lock()
+_registry: Optional['DatasourceRegistry'] = None
+
+
+class DatasourceRegistry:
+    """
+    Datasources con nombre para executeQuery/streamQuery, consultados directamente desde el
+    ejecutor en lugar de pasar por DATABASE_API_URL. Cada uno tiene su propio pool de
+    conexiones, creado en el primer uso.
+
+    Se declaran con DATASOURCE_<NOMBRE>_URL (p. ej. DATASOURCE_REFERENCE_URL=sqlite:////data/ref.db)
+    o con register(). Son de solo lectura: solo se admiten consultas (READ_STATEMENTS) y,
+    además, la conexión se abre en modo lectura (PRAGMA query_only en SQLite, transacción
+    READ ONLY en PostgreSQL, MySQL y Oracle). Los resultados se leen con cursores de servidor cuando el driver los
+    soporta, por bloques de DATASOURCE_CHUNK_SIZE filas y hasta DATASOURCE_MAX_ROWS filas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._urls: Dict[str, str] = {}
+        self._engines: Dict[str, Engine] = {}
+        for key, value in os.environ.items():
+            if key.startswith(_ENV_PREFIX) and key.endswith(_ENV_SUFFIX) and value:
+                self._urls[key[len(_ENV_PREFIX):-len(_ENV_SUFFIX)].lower()] = value
+        self.chunk_size = int(os.getenv('DATASOURCE_CHUNK_SIZE', '1000'))
+        self.max_rows = int(os.getenv('DATASOURCE_MAX_ROWS', '100000'))
+
+    def register(self, name: str, url: str):
+        with self._lock:
+            self._urls[name.lower()] = url
+            engine = self._engines.pop(name.lower(), None)
+        if engine is not None:
+            engine.dispose()
+
+    def names(self) -> List[str]:
+        return sorted(self._urls)
+
+    def engine(self, name: str) -> Engine:
+        key = name.lower()
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    if key not in self._urls:
+                        raise Exception(f"Datasource '{name}' no registrado (disponibles: {self.names()})")
+                    url = self._urls[key]
+                    kwargs = {'pool_pre_ping': True}
+                    if not url.startswith('sqlite'):
+                        # SQLite usa su propio pool (uno por hilo o por archivo); el resto un QueuePool configurable
+                        kwargs.update(pool_size=int(os.getenv('DATASOURCE_POOL_SIZE', '5')),
+                                      max_overflow=int(os.getenv('DATASOURCE_MAX_OVERFLOW', '5')))
+                    engine = self._engines[key] = create_engine(url, **kwargs)
+                    _read_only(engine)
+                    logging.info(f"Datasource '{name}' connected.")
+        return engine
+
+    def stream(self, name: str, query: str, params: Optional[dict] = None, chunk_size: Optional[int] = None,
+               max_rows: Optional[int] = None) -> Iterator[List[dict]]:
+        """
+        Ejecuta la consulta y entrega las filas (como dict) por bloques, sin cargar el resultado
+        completo en memoria. La conexión vuelve al pool al agotar o abandonar el iterador.
+
+        Raises:
+            Exception: si la sentencia no es una consulta de lectura o no devuelve filas.
+        """
+        check_read_only(name, query)
+        chunk_size = chunk_size or self.chunk_size
+        max_rows = max_rows or self.max_rows
+        delivered = 0
+        with self.engine(name).connect() as connection:
+            options = {'stream_results': True, 'max_row_buffer': chunk_size}
+            if connection.dialect.name == 'postgresql':
+                options['postgresql_readonly'] = True
+            result = connection.execution_options(**options).execute(text(query), params or {})
+            if not result.returns_rows:
+                raise Exception(f"La sentencia sobre el datasource '{name}' no devuelve filas: "
+                                f"los datasources son de solo lectura")
+            for partition in result.mappings().partitions(chunk_size):
+                if delivered + len(partition) > max_rows:
+                    partition = partition[:max_rows - delivered]
+                delivered += len(partition)
+                yield [dict(row) for row in partition]
+                if delivered >= max_rows:
+                    logging.warning(f"Query on datasource '{name}' truncated at {max_rows} rows.")
+                    break
+
+    def rows(self, name: str, query: str, params: Optional[dict] = None, **kwargs) -> Iterator[dict]:
+        """Igual que stream(), fila a fila."""
+        for chunk in self.stream(name, query, params, **kwargs):
+            yield from chunk
+
+    def dispose(self):
+        with self._lock:
+            engines, self._engines = self._engines, {}
+        for engine in engines.values():
+            engine.dispose()
+
+
+def check_read_only(name: str, query: str):
+    """Rechaza las sentencias que no son consultas (DML, DDL, PRAGMA...) antes de ejecutarlas."""
+    match = re.match(r'\w+', query[_LEADING.match(query).end():])
+    statement = match.group(0).lower() if match else ''
+    if statement not in READ_STATEMENTS:
+        raise Exception(f"Sentencia '{statement.upper()}' no permitida: el datasource '{name}' es de solo lectura")
+
+
+def _read_only(engine: Engine):
+    """Abre las conexiones del engine en modo lectura cuando el motor lo permite."""
+    dialect = engine.dialect.name
+    if dialect == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def query_only(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA query_only = ON')
+            cursor.close()
+    elif dialect in _SET_TRANSACTION_READ_ONLY:
+        @event.listens_for(engine, 'begin')
+        def read_only_transaction(connection):
+            cursor = connection.connection.cursor()
+            cursor.execute('SET TRANSACTION READ ONLY')
+            cursor.close()
+    elif dialect != 'postgresql':
+        # PostgreSQL se configura por conexión en stream() (postgresql_readonly)
+        logging.warning(f"Read-only mode is not enforced by the {dialect} engine; "
+                        f"only the statement check applies.")
+
+
+def get_datasource_registry() -> DatasourceRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DatasourceRegistry()
+    return _registry
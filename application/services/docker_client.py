@@ -0,0 +1,96 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import docker
+from ..metrics import Histogram
+
+# Operaciones del APIClient de bajo nivel cuya latencia se registra.
+INSTRUMENTED_OPERATIONS = (
+    'ping', 'containers', 'create_container', 'start', 'stop', 'remove_container', 'inspect_container',
+    'exec_create', 'exec_start', 'exec_inspect', 'images', 'inspect_image', 'build', 'pull',
+)
+
+DOCKER_CALL_SECONDS = Histogram('docker_call_seconds', 'Latencia de las llamadas al daemon de Docker.',
+                                labelnames=('operation', 'outcome'))
+
+_client_lock = threading.Lock()
+_client: Optional[docker.DockerClient] = None
+_async_facade: Optional['AsyncDockerFacade'] = None
+
+
+def get_docker_client() -> docker.DockerClient:
+    """
+    Cliente de Docker compartido por todo el proceso.
+
+    Se crea una sola vez con un pool de conexiones HTTP reutilizables (DOCKER_MAX_POOL_SIZE)
+    y un timeout por llamada (DOCKER_TIMEOUT), y se verifica con un único ping.
+    El APIClient subyacente es seguro para usarse desde varios hilos.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = docker.from_env(timeout=int(os.getenv('DOCKER_TIMEOUT', '60')),
+                                         max_pool_size=int(os.getenv('DOCKER_MAX_POOL_SIZE', '20')))
+                _instrument(client.api)
+                client.ping()
+                logging.info("Shared Docker client connected to Docker daemon.")
+                _client = client
+    return _client
+
+
+def _instrument(api: docker.APIClient):
+    """Envuelve las operaciones del APIClient para registrar su latencia por operación."""
+    for operation in INSTRUMENTED_OPERATIONS:
+        method = getattr(api, operation)
+
+        @functools.wraps(method)
+        def timed(*args, __method=method, __operation=operation, **kwargs):
+            start = time.perf_counter()
+            outcome = 'ok'
+            try:
+                return __method(*args, **kwargs)
+            except Exception:
+                outcome = 'error'
+                raise
+            finally:
+                DOCKER_CALL_SECONDS.observe(time.perf_counter() - start, operation=__operation, outcome=outcome)
+
+        setattr(api, operation, timed)
+
+
+def get_docker_latency() -> dict:
+    """Histogramas de latencia por operación de Docker."""
+    return DOCKER_CALL_SECONDS.snapshot()
+
+
+class AsyncDockerFacade:
+    """
+    Fachada asíncrona mínima: ejecuta llamadas bloqueantes al daemon en un pool de hilos
+    dedicado, para que el event loop de la API nunca quede bloqueado esperando a Docker.
+    """
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='DockerIO')
+
+    async def run(self, func, *args, **kwargs):
+        """Ejecuta 'func' (cualquier función que hable con Docker) fuera del event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def call(self, operation: str, *args, **kwargs):
+        """Ejecuta una operación del APIClient compartido, p. ej. await call('inspect_container', name)."""
+        return await self.run(lambda: getattr(get_docker_client().api, operation)(*args, **kwargs))
+
+
+def get_async_docker() -> AsyncDockerFacade:
+    global _async_facade
+    if _async_facade is None:
+        with _client_lock:
+            if _async_facade is None:
+                _async_facade = AsyncDockerFacade(int(os.getenv('DOCKER_ASYNC_WORKERS', '4')))
+    return _async_facade
@@ -3,20 +3,25 @@ import time
 import os
 import logging
 from docker.errors import DockerException
+from .docker_client import get_docker_client
 
 logging.basicConfig(level=logging.INFO,
                     format='(%(threadName)-10s) %(message)s',)
 
-client = docker.from_env()
 dockerfile_path = os.getenv('RESOURCES_DIR')  # Ruta absoluta al Dockerfile
 image_name = os.getenv('SELENIUM_IMAGE')
 ports = [4444, 5900, 4449]
 
 
+def get_client():
+    """Cliente de Docker compartido por el proceso, creado en el primer uso en lugar de al importar."""
+    return get_docker_client()
+
+
 class DockerService:
     @staticmethod
     def createDockerImage():
-        image = client.images.build(
+        image = get_client().images.build(
             path    = os.getenv('RESOURCES_DIR'),
             tag     = os.getenv('SELENIUM_IMAGE'),
             rm      = True,           # Eliminar contenedores intermedios después de la construcción
@@ -61,7 +66,7 @@ class DockerService:
             Tuple[tuple, Container]: Puertos asignados y objeto contenedor.
         """
         try:
-            ret_ports = check_ports(client)
+            ret_ports = check_ports(get_client())
             
             container_config = {
                 'image': os.getenv('SELENIUM_IMAGE', 'selenium/standalone-chrome:latest'),
@@ -73,7 +78,7 @@ class DockerService:
             }
 
             logging.info(f"Iniciando contenedor con config: {container_config}")
-            cont = client.containers.run(**container_config)
+            cont = get_client().containers.run(**container_config)
             logging.info(f"Contenedor {container_config['name']} creado con ID: {cont.id}")
 
             time.sleep(5)  # Esperar a que el contenedor se inicialice
@@ -95,17 +100,17 @@ class DockerService:
 
     @staticmethod
     def docker_image():
-        images = client.images.list()
+        images = get_client().images.list()
         print(images)
 
     @staticmethod
     def docker_ps():
-        dockers = client.containers.list()
+        dockers = get_client().containers.list()
         print(dockers)
 
     @staticmethod
     def destroy_docker(name: str):
-        container = client.containers.get(name)
+        container = get_client().containers.get(name)
         container.kill()  # Mata el contenedor
         container.remove()  # Elimina el contenedor
     
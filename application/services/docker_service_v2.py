@@ -1,27 +1,50 @@
-from typing import Tuple
+from typing import Optional, Tuple
 import docker
+import hashlib
+import threading
 import time
 import os
 import logging
 import requests
 from docker.errors import DockerException, NotFound
+from .docker_client import get_docker_client
+from .docker_state_cache import EXECUTOR_LABEL, get_container_state_cache
+from ..metrics import Histogram
 
 # --- CONFIGURACIÓN ---
 # El logging se configura en el módulo principal que usa este servicio.
 # Es buena práctica que las librerías/módulos secundarios no configuren el logging global.
 
+# Perfiles de contenedor: 'vnc' (Xvfb + fluxbox + x11vnc, observable) y 'headless' (sin pantalla ni VNC).
+PROFILE_VNC = 'vnc'
+PROFILE_HEADLESS = 'headless'
+
+# Etiqueta de la imagen con el hash de los ficheros de resources/ con los que se construyó.
+RESOURCES_HASH_LABEL = f'{EXECUTOR_LABEL}.resources-hash'
+RESOURCES_HASHED_FILES = ('Dockerfile', 'entrypoint.sh')
+
+CONTAINER_PROVISION_SECONDS = Histogram('container_provision_seconds',
+                                        'Duración de cada fase del aprovisionamiento del entorno web.',
+                                        labelnames=('phase', 'profile'))
+
+
+def vnc_container_name(vnc_port) -> str:
+    """Nombre del contenedor del perfil VNC; se deriva del puerto VNC registrado en test_port."""
+    return f'selenium-vnc-{vnc_port}'
+
 class DockerService:
     """
     Gestiona el ciclo de vida de los contenedores de Docker para las pruebas de Selenium.
-    Cada instancia de esta clase tiene su propio cliente de Docker.
+    Todas las instancias comparten el cliente de Docker del proceso y su pool de conexiones.
     """
     def __init__(self):
         """
-        Inicializa el cliente de Docker y verifica la conexión.
+        Obtiene el cliente compartido de Docker (conectado y verificado en su primer uso).
         """
         try:
-            self.client = docker.from_env()
-            self.client.ping()
+            self.client = get_docker_client()
+            # Índice compartido alimentado por eventos; None si está deshabilitado o no disponible.
+            self.state_cache = get_container_state_cache()
             logging.info("DockerService instance created and connected to Docker daemon.")
         except DockerException as e:
             logging.error(f"Could not connect to Docker daemon. Is it running? Error: {e}")
@@ -32,6 +55,17 @@ class DockerService:
         """
         Elimina contenedores en estado 'exited' para liberar recursos, especialmente puertos.
         """
+        if self.state_cache and self.state_cache.synced:
+            for entry in self.state_cache.exited_containers():
+                try:
+                    logging.info(f"Removing dead container: {entry['name']} (ID: {entry['id']})")
+                    self.client.api.remove_container(entry['id'])
+                except NotFound:
+                    pass
+                except DockerException as e:
+                    logging.error(f"Failed to remove dead container {entry['name']}: {e}")
+            return
+
         try:
             exited_containers = self.client.containers.list(all=True, filters={'status': 'exited'})
             if not exited_containers:
@@ -51,6 +85,25 @@ class DockerService:
         """
         Encuentra un par de puertos (Selenium, VNC) que no estén actualmente en uso por otros contenedores.
         """
+        if self.state_cache and self.state_cache.synced:
+            occupied_ports = self.state_cache.occupied_host_ports()
+        else:
+            occupied_ports = self._list_occupied_ports()
+
+        for i in range(range_limit):
+            selenium_port = base_selenium_port + i
+            vnc_port = base_vnc_port + i
+            if selenium_port not in occupied_ports and vnc_port not in occupied_ports:
+                logging.info(f"Found available ports: Selenium={selenium_port}, VNC={vnc_port}")
+                return selenium_port, vnc_port
+
+        raise RuntimeError(f"Could not find available ports in the range {base_selenium_port}-{base_selenium_port + range_limit}")
+
+    def _list_occupied_ports(self) -> set:
+        """
+        Consulta al daemon los puertos del host ocupados por contenedores en ejecución.
+        Se usa cuando la caché de estado no está disponible.
+        """
         occupied_ports = set()
         for container in self.client.containers.list():
             try:
@@ -62,21 +115,19 @@ class DockerService:
                                 occupied_ports.add(int(mapping['HostPort']))
             except (KeyError, TypeError):
                 continue
-        
-        for i in range(range_limit):
-            selenium_port = base_selenium_port + i
-            vnc_port = base_vnc_port + i
-            if selenium_port not in occupied_ports and vnc_port not in occupied_ports:
-                logging.info(f"Found available ports: Selenium={selenium_port}, VNC={vnc_port}")
-                return selenium_port, vnc_port
-
-        raise RuntimeError(f"Could not find available ports in the range {base_selenium_port}-{base_selenium_port + range_limit}")
+        return occupied_ports
 
     def _wait_for_selenium_ready(self, container: str, port: int, timeout: int = 45):
         """
         Espera activamente a que el hub de Selenium esté listo para recibir conexiones.
         Esto es mucho más fiable que un time.sleep().
         """
+        if self.state_cache and self.state_cache.synced:
+            logging.info(f"Waiting for Selenium to be ready at port {port}...")
+            self.state_cache.wait_for_running(container.id, timeout)
+            logging.info(f"Selenium at port {port} is ready!")
+            return
+
         time.sleep(5)  # Esperar a que el contenedor se inicialice
         container.reload()
         start_time = time.time()
@@ -100,39 +151,82 @@ class DockerService:
                 
         raise TimeoutError(f"Selenium at port {port} was not ready within {timeout} seconds.")
 
-    def create_selenium_container(self) -> Tuple[Tuple[int, int], 'docker.models.containers.Container']:
+    def create_selenium_container(self, profile: str = PROFILE_VNC) -> Tuple[Tuple[int, Optional[int]], 'docker.models.containers.Container']:
         """
         Orquesta la creación de un contenedor de Selenium: limpia, busca puertos, lo crea y espera a que esté listo.
+
+        Args:
+            profile: 'vnc' (por defecto) o 'headless'. El perfil headless no arranca Xvfb, fluxbox
+                ni x11vnc, no publica el puerto VNC y usa límites de memoria y shm menores.
         
         Returns:
             Una tupla que contiene:
-            - Una tupla con los puertos asignados (selenium_port, vnc_port).
+            - Una tupla con los puertos asignados (selenium_port, vnc_port); vnc_port es None en headless.
             - El objeto contenedor de Docker.
         """
-        self._clean_dead_containers()
+        with CONTAINER_PROVISION_SECONDS.time(phase='cleanup', profile=profile):
+            self._clean_dead_containers()
         
-        selenium_port, vnc_port = self._find_available_ports()
+        with CONTAINER_PROVISION_SECONDS.time(phase='ports', profile=profile):
+            selenium_port, vnc_port = self._find_available_ports()
         
-        container_name = f'selenium-vnc-{vnc_port}'
         image_name = os.getenv('SELENIUM_IMAGE', 'selenium/standalone-chrome:latest')
         network_name = 'robomatic-docker-compose_robomatic-net'
 
-        container_config = {
-            'image': image_name,
-            'detach': True,
-            'ports': {'4444/tcp': selenium_port, '5900/tcp': vnc_port},
-            'name': container_name,
-            'network': network_name,
-            'mem_limit': os.getenv('DOCKER_MEM_LIMIT', '2g'),
-            # Añadir shm_size puede solucionar problemas de 'crasheo' del navegador dentro del contenedor
-            'shm_size': '2g' 
-        }
+        if profile == PROFILE_HEADLESS:
+            vnc_port = None
+            container_name = f'selenium-headless-{selenium_port}'
+            container_config = {
+                'image': image_name,
+                'ports': {'4444/tcp': selenium_port},
+                'name': container_name,
+                'network': network_name,
+                'mem_limit': os.getenv('DOCKER_HEADLESS_MEM_LIMIT', '1g'),
+                'shm_size': os.getenv('DOCKER_HEADLESS_SHM_SIZE', '512m'),
+                # El entrypoint y el supervisord de la imagen base omiten la pantalla virtual y el VNC.
+                'environment': {
+                    'EXECUTOR_PROFILE': PROFILE_HEADLESS,
+                    'SE_START_XVFB': 'false',
+                    'SE_START_VNC': 'false',
+                    'SE_START_NO_VNC': 'false',
+                },
+                'labels': {EXECUTOR_LABEL: 'selenium', f'{EXECUTOR_LABEL}.profile': PROFILE_HEADLESS}
+            }
+        else:
+            container_name = vnc_container_name(vnc_port)
+            container_config = {
+                'image': image_name,
+                'ports': {'4444/tcp': selenium_port, '5900/tcp': vnc_port},
+                'name': container_name,
+                'network': network_name,
+                'mem_limit': os.getenv('DOCKER_MEM_LIMIT', '2g'),
+                # Añadir shm_size puede solucionar problemas de 'crasheo' del navegador dentro del contenedor
+                'shm_size': '2g',
+                'labels': {EXECUTOR_LABEL: 'selenium', f'{EXECUTOR_LABEL}.profile': PROFILE_VNC}
+            }
+            if os.getenv('VNC_ON_DEMAND', 'true').lower() == 'true':
+                # x11vnc no arranca con el contenedor: se inicia con ensure_vnc_server() cuando
+                # alguien pide los puertos. Docker no permite publicar puertos en un contenedor en
+                # ejecución, por eso el mapeo del puerto VNC se reserva igualmente al crearlo.
+                container_config['environment'] = {
+                    'VNC_ON_DEMAND': 'true',
+                    'SE_START_VNC': 'false',
+                    'SE_START_NO_VNC': 'false',
+                }
 
         try:
             logging.info(f"Creating container '{container_name}' from image '{image_name}'...")
-            container = self.client.containers.run(**container_config)
+            with CONTAINER_PROVISION_SECONDS.time(phase='create', profile=profile):
+                container = self.client.containers.create(**container_config)
+            if self.state_cache:
+                # Se registran los puertos antes de arrancar para que el evento 'start' no requiera un inspect.
+                published = [port for port in (selenium_port, vnc_port) if port]
+                self.state_cache.register(container.id, container_name, published, container_config['labels'])
+            with CONTAINER_PROVISION_SECONDS.time(phase='start', profile=profile):
+                container.start()
             
-            self._wait_for_selenium_ready(container, selenium_port)
+            with CONTAINER_PROVISION_SECONDS.time(phase='readiness', profile=profile):
+                self._wait_for_selenium_ready(container, selenium_port)
 
             return (selenium_port, vnc_port), container
         except DockerException as e:
@@ -145,21 +239,169 @@ class DockerService:
         """
         try:
             logging.info(f"Attempting to destroy container '{container_name}'...")
-            container = self.client.containers.get(container_name)
-            container.stop()
-            container.remove()
+            # API de bajo nivel: evita el inspect previo que hace containers.get().
+            self.client.api.stop(container_name)
+            self.client.api.remove_container(container_name)
             logging.info(f"Container '{container_name}' destroyed successfully.")
         except NotFound:
             logging.warning(f"Container '{container_name}' not found for destruction. It might have been already removed.")
         except DockerException as e:
             logging.error(f"An error occurred while destroying container '{container_name}': {e}")
 
-    def create_docker_image(self):
-        self.client.images.build(
-            path    = os.getenv('RESOURCES_DIR'),
-            tag     = os.getenv('SELENIUM_IMAGE'),
-            rm      = True,           # Eliminar contenedores intermedios después de la construcción
-            pull    = True,         # Intentar obtener una versión más reciente de la imagen base
-            forcerm = True     # Forzar la eliminación de contenedores intermedios si falla la construcción
-        )
-    
\ No newline at end of file
+    def ensure_vnc_server(self, container_name: str, idle_timeout: Optional[int] = None) -> bool:
+        """
+        Arranca x11vnc dentro del contenedor si no está corriendo.
+
+        El servidor se lanza sin '-forever': termina cuando el último visor se desconecta, o tras
+        'idle_timeout' segundos si nadie llega a conectarse, así las ejecuciones no observadas no
+        pagan la codificación de pantalla.
+
+        Returns:
+            True si el servidor VNC está disponible.
+        """
+        if idle_timeout is None:
+            idle_timeout = int(os.getenv('VNC_IDLE_TIMEOUT', '300'))
+        try:
+            running = self.client.api.exec_create(container_name, ['pgrep', '-x', 'x11vnc'])
+            self.client.api.exec_start(running['Id'])
+            if self.client.api.exec_inspect(running['Id']).get('ExitCode') == 0:
+                return True
+
+            logging.info(f"Starting on-demand VNC server in container '{container_name}'...")
+            command = ['x11vnc', '-display', ':99', '-nopw', '-listen', '0.0.0.0', '-xkb',
+                       '-ncache', '10', '-ncache_cr', '-shared', '-timeout', str(idle_timeout)]
+            exec_id = self.client.api.exec_create(container_name, command)
+            self.client.api.exec_start(exec_id['Id'], detach=True)
+            return True
+        except NotFound:
+            logging.warning(f"Container '{container_name}' not found, cannot attach VNC.")
+            return False
+        except DockerException as e:
+            logging.error(f"Could not start VNC server in container '{container_name}': {e}")
+            return False
+
+    @staticmethod
+    def resources_hash(resources_dir: Optional[str] = None) -> str:
+        """Hash SHA-256 del Dockerfile y el entrypoint.sh que definen la imagen de Selenium."""
+        resources_dir = resources_dir or os.getenv('RESOURCES_DIR')
+        digest = hashlib.sha256()
+        for file_name in RESOURCES_HASHED_FILES:
+            digest.update(file_name.encode('utf-8'))
+            with open(os.path.join(resources_dir, file_name), 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def image_is_current(self, resources_hash: str) -> bool:
+        """True si ya existe una imagen con el tag configurado construida con los mismos recursos."""
+        try:
+            image = self.client.images.get(os.getenv('SELENIUM_IMAGE'))
+        except NotFound:
+            return False
+        return (image.labels or {}).get(RESOURCES_HASH_LABEL) == resources_hash
+
+    def create_docker_image(self) -> bool:
+        """
+        Construye la imagen de Selenium solo si los recursos cambiaron desde la última construcción.
+
+        Returns:
+            True si se construyó la imagen, False si la existente ya estaba al día.
+        """
+        resources_hash = self.resources_hash()
+        if self.image_is_current(resources_hash):
+            logging.info(f"Selenium image is up to date (resources hash {resources_hash[:12]}), skipping build.")
+            return False
+
+        build_args = {
+            'path': os.getenv('RESOURCES_DIR'),
+            'tag': os.getenv('SELENIUM_IMAGE'),
+            'labels': {RESOURCES_HASH_LABEL: resources_hash},
+            'rm': True,           # Eliminar contenedores intermedios después de la construcción
+            'forcerm': True       # Forzar la eliminación de contenedores intermedios si falla la construcción
+        }
+        try:
+            # Intentar obtener una versión más reciente de la imagen base
+            self.client.images.build(pull=True, **build_args)
+        except DockerException as e:
+            # Sin acceso al registro: construir con la imagen base que ya esté en caché.
+            logging.warning(f"Image build with pull failed, retrying with cached base image: {e}")
+            self.client.images.build(pull=False, **build_args)
+        return True
+
+
+# ==============================================================================
+# Construcción de la imagen en segundo plano
+# ==============================================================================
+# Estados: 'pending' (no se ha lanzado), 'building', 'ready', 'stale' (falló la
+# construcción pero hay una imagen anterior utilizable) y 'failed'. Desde 'failed' se
+# reintenta en la siguiente espera (wait_for_image), como mucho cada IMAGE_BUILD_RETRY_SECONDS:
+# el daemon puede no estar disponible todavía al arrancar el proceso.
+
+_image_build_lock = threading.Lock()
+_image_build_done = threading.Event()
+_image_build_status = {'status': 'pending', 'built': None, 'error': None, 'duration': None, 'failed_at': None}
+
+
+def start_image_build() -> bool:
+    """
+    Lanza la comprobación/construcción de la imagen de Selenium en un hilo en segundo plano,
+    para que la API pueda aceptar peticiones mientras tanto.
+
+    Returns:
+        False si ya había una construcción en curso o terminada, o si la última falló hace
+        menos de IMAGE_BUILD_RETRY_SECONDS.
+    """
+    with _image_build_lock:
+        status = _image_build_status['status']
+        if status == 'failed':
+            retry_seconds = float(os.getenv('IMAGE_BUILD_RETRY_SECONDS', '30'))
+            if time.time() - _image_build_status['failed_at'] < retry_seconds:
+                return False
+            logging.info("Retrying failed Selenium image build...")
+        elif status != 'pending':
+            return False
+        _image_build_status['status'] = 'building'
+        _image_build_done.clear()
+    threading.Thread(target=_build_image, name="ImageBuilder", daemon=True).start()
+    return True
+
+
+def _build_image():
+    start_time = time.time()
+    status, built, error = 'ready', None, None
+    try:
+        built = DockerService().create_docker_image()
+    except Exception as e:
+        logging.error(f"Selenium image build failed: {e}", exc_info=True)
+        error = str(e)
+        try:
+            DockerService().client.images.get(os.getenv('SELENIUM_IMAGE'))
+            status = 'stale'
+        except Exception:
+            status = 'failed'
+    with _image_build_lock:
+        _image_build_status.update(status=status, built=built, error=error,
+                                   duration=round(time.time() - start_time, 3),
+                                   failed_at=time.time() if status == 'failed' else None)
+    _image_build_done.set()
+    logging.info(f"Selenium image {status} after {_image_build_status['duration']}s.")
+
+
+def get_image_build_status() -> dict:
+    with _image_build_lock:
+        return dict(_image_build_status)
+
+
+def wait_for_image(timeout: Optional[float] = None) -> bool:
+    """
+    Espera a que termine la construcción en curso. Si la última falló, la relanza antes
+    de esperar (ver start_image_build).
+
+    Returns:
+        True si hay una imagen utilizable (o si no se gestionó ninguna construcción).
+    """
+    if _image_build_status['status'] == 'pending':
+        return True
+    if _image_build_status['status'] == 'failed':
+        start_image_build()
+    _image_build_done.wait(timeout)
+    return _image_build_status['status'] in ('ready', 'stale')
@@ -0,0 +1,276 @@
+from typing import Dict, Iterable, List, Optional, Set
+import threading
+import time
+import os
+import logging
+from docker.errors import DockerException, NotFound
+from .docker_client import get_docker_client
+
+# Etiqueta que identifica los contenedores creados por este executor.
+EXECUTOR_LABEL = 'robomatic.executor'
+
+
+class ContainerStateCache:
+    """
+    Índice en memoria de los contenedores del daemon de Docker, alimentado por el stream de eventos.
+    Permite que la asignación de puertos, la espera de disponibilidad y la limpieza lean el estado
+    sin emitir llamadas list/inspect al daemon en cada ejecución.
+    """
+    def __init__(self, client=None, reconnect_delay: float = 2.0):
+        # El stream de eventos se abre sin timeout de lectura, así que puede compartir el cliente del proceso
+        self.client = client or get_docker_client()
+        self.reconnect_delay = reconnect_delay
+        # Índice por ID de contenedor: {'id', 'name', 'status', 'health', 'ports', 'labels'}
+        self._containers: Dict[str, dict] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stream = None
+        self._synced = False
+
+    # --------------------------------------------------------------------------
+    # Ciclo de vida del watcher
+    # --------------------------------------------------------------------------
+
+    def start(self):
+        """Arranca el hilo que consume el stream de eventos del daemon."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="DockerEventWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el watcher y cierra el stream de eventos."""
+        self._stop_event.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        with self._condition:
+            self._synced = False
+            self._condition.notify_all()
+
+    @property
+    def synced(self) -> bool:
+        """True mientras el índice refleja el estado del daemon (stream activo y semilla cargada)."""
+        return self._synced
+
+    def wait_until_synced(self, timeout: float = 5.0) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._synced, timeout=timeout)
+
+    def _watch(self):
+        while not self._stop_event.is_set():
+            try:
+                # Se abre el stream antes de cargar la semilla para no perder eventos intermedios;
+                # los eventos repetidos se aplican de forma idempotente.
+                self._stream = self.client.events(decode=True, since=int(time.time()),
+                                                  filters={'type': 'container'})
+                self._seed()
+                for event in self._stream:
+                    if self._stop_event.is_set():
+                        break
+                    self._apply_event(event)
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logging.warning(f"Docker event stream interrupted, reconnecting in {self.reconnect_delay}s: {e}")
+            finally:
+                with self._condition:
+                    self._synced = False
+                    self._condition.notify_all()
+            self._stop_event.wait(self.reconnect_delay)
+
+    def _seed(self):
+        """Carga el estado inicial con una única llamada al endpoint de listado."""
+        containers = {}
+        for raw in self.client.api.containers(all=True):
+            names = raw.get('Names') or []
+            name = names[0].lstrip('/') if names else raw['Id'][:12]
+            ports = {p['PublicPort'] for p in raw.get('Ports') or [] if p.get('PublicPort')}
+            containers[raw['Id']] = {
+                'id': raw['Id'],
+                'name': name,
+                'status': raw.get('State'),
+                'health': _parse_health(raw.get('Status', '')),
+                'ports': ports,
+                'labels': raw.get('Labels') or {},
+            }
+        with self._condition:
+            self._containers = containers
+            self._synced = True
+            self._condition.notify_all()
+        logging.info(f"Docker state cache synced with {len(containers)} containers.")
+
+    # --------------------------------------------------------------------------
+    # Aplicación de eventos
+    # --------------------------------------------------------------------------
+
+    def _apply_event(self, event: dict):
+        action = event.get('Action') or event.get('status') or ''
+        actor = event.get('Actor') or {}
+        container_id = actor.get('ID') or event.get('id')
+        attributes = actor.get('Attributes') or {}
+        if not container_id:
+            return
+
+        needs_ports = False
+        with self._condition:
+            entry = self._containers.get(container_id)
+            if action == 'destroy':
+                self._containers.pop(container_id, None)
+            else:
+                if entry is None:
+                    entry = {
+                        'id': container_id,
+                        'name': attributes.get('name', container_id[:12]),
+                        'status': 'created',
+                        'health': None,
+                        'ports': None,
+                        'labels': {k: v for k, v in attributes.items() if k not in ('name', 'image')},
+                    }
+                    self._containers[container_id] = entry
+                if 'name' in attributes:
+                    entry['name'] = attributes['name']
+
+                if action in ('start', 'unpause', 'restart'):
+                    entry['status'] = 'running'
+                    needs_ports = entry['ports'] is None
+                elif action == 'die':
+                    entry['status'] = 'exited'
+                elif action == 'pause':
+                    entry['status'] = 'paused'
+                elif action.startswith('health_status'):
+                    entry['health'] = action.split(':', 1)[1].strip() if ':' in action else None
+                elif action == 'oom':
+                    entry['oom'] = True
+            self._condition.notify_all()
+
+        if needs_ports:
+            # Solo contenedores ajenos al executor llegan aquí: los nuestros registran sus puertos al crearse.
+            self._inspect_ports(container_id)
+
+    def _inspect_ports(self, container_id: str):
+        try:
+            attrs = self.client.api.inspect_container(container_id)
+        except NotFound:
+            return
+        except DockerException as e:
+            logging.warning(f"Could not inspect container {container_id[:12]} for ports: {e}")
+            return
+        ports = set()
+        bindings = (attrs.get('NetworkSettings') or {}).get('Ports') or \
+            (attrs.get('HostConfig') or {}).get('PortBindings') or {}
+        for mappings in bindings.values():
+            for mapping in mappings or []:
+                if mapping.get('HostPort'):
+                    ports.add(int(mapping['HostPort']))
+        with self._condition:
+            entry = self._containers.get(container_id)
+            if entry is not None:
+                entry['ports'] = ports
+                self._condition.notify_all()
+
+    # --------------------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------------------
+
+    def register(self, container_id: str, name: str, ports: Iterable[int], labels: Optional[dict] = None):
+        """Registra un contenedor recién creado junto a sus puertos publicados, evitando un inspect."""
+        with self._condition:
+            entry = self._containers.setdefault(container_id, {
+                'id': container_id, 'name': name, 'status': 'created', 'health': None, 'labels': labels or {},
+            })
+            entry['name'] = name
+            entry['ports'] = set(ports)
+            self._condition.notify_all()
+
+    def get(self, name_or_id: str) -> Optional[dict]:
+        with self._condition:
+            entry = self._find(name_or_id)
+            return dict(entry) if entry else None
+
+    def occupied_host_ports(self) -> Set[int]:
+        """
+        Puertos del host reservados por contenedores: cualquier entrada con puertos cuenta desde
+        que se registra (aún 'created', antes de arrancar) hasta su evento 'die' o 'destroy',
+        para que dos creaciones simultáneas no elijan el mismo puerto.
+        """
+        with self._condition:
+            occupied = set()
+            for entry in self._containers.values():
+                if entry['status'] not in ('exited', 'dead') and entry.get('ports'):
+                    occupied.update(entry['ports'])
+            return occupied
+
+    def exited_containers(self) -> List[dict]:
+        with self._condition:
+            return [dict(entry) for entry in self._containers.values() if entry['status'] in ('exited', 'dead')]
+
+    def wait_for_running(self, name_or_id: str, timeout: float) -> dict:
+        """
+        Espera a que el contenedor esté en ejecución (y 'healthy' si la imagen define un healthcheck).
+
+        Raises:
+            RuntimeError: si el contenedor termina antes de estar listo.
+            TimeoutError: si no está listo dentro del tiempo dado.
+        """
+        def is_ready():
+            entry = self._find(name_or_id)
+            if entry is None:
+                return False
+            if entry['status'] in ('exited', 'dead'):
+                return True
+            return entry['status'] == 'running' and entry.get('health') in (None, 'healthy')
+
+        with self._condition:
+            if not self._condition.wait_for(is_ready, timeout=timeout):
+                raise TimeoutError(f"Container {name_or_id} was not ready within {timeout} seconds.")
+            entry = dict(self._find(name_or_id))
+        if entry['status'] != 'running':
+            raise RuntimeError(f"Container {name_or_id} stopped before becoming ready (status: {entry['status']}).")
+        return entry
+
+    def _find(self, name_or_id: str) -> Optional[dict]:
+        entry = self._containers.get(name_or_id)
+        if entry is not None:
+            return entry
+        for candidate in self._containers.values():
+            if candidate['name'] == name_or_id or candidate['id'].startswith(name_or_id):
+                return candidate
+        return None
+
+
+def _parse_health(status: str) -> Optional[str]:
+    """Extrae el estado de salud del texto 'Status' del listado (p. ej. 'Up 3 minutes (healthy)')."""
+    for health in ('healthy', 'unhealthy', 'starting'):
+        if f'({health})' in status or f'(health: {health})' in status:
+            return health
+    return None
+
+
+_cache_lock = threading.Lock()
+_cache_instance: Optional[ContainerStateCache] = None
+
+
+def get_container_state_cache() -> Optional[ContainerStateCache]:
+    """
+    Devuelve la caché de estado compartida por el proceso, arrancándola en el primer uso.
+    Devuelve None si está deshabilitada (DOCKER_EVENT_CACHE=false) o si el daemon no responde,
+    en cuyo caso los llamadores vuelven a consultar el daemon directamente.
+    """
+    global _cache_instance
+    if os.getenv('DOCKER_EVENT_CACHE', 'true').lower() != 'true':
+        return None
+    with _cache_lock:
+        if _cache_instance is None:
+            try:
+                _cache_instance = ContainerStateCache()
+                _cache_instance.start()
+                _cache_instance.wait_until_synced(timeout=float(os.getenv('DOCKER_EVENT_CACHE_SYNC_TIMEOUT', '5')))
+            except DockerException as e:
+                logging.error(f"Could not start Docker state cache, falling back to polling: {e}")
+                _cache_instance = None
+        return _cache_instance
@@ -0,0 +1,107 @@
+import logging
+import os
+import time
+from typing import Optional
+from .locator_resolver import FIND_ONE_JS, LocatorResolver
+
+# Espera dentro del navegador: comprueba las estrategias candidatas y, si el elemento aún no
+# existe, observa las mutaciones del DOM hasta que aparezca o venza el plazo. Devuelve
+# [elemento, índice de la estrategia] o null, en una sola llamada a WebDriver.
+_WAIT_SCRIPT = FIND_ONE_JS + """
+var candidates = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+function check() {
+  for (var i = 0; i < candidates.length; i++) {
+    var element = findOne(candidates[i][0], candidates[i][1]);
+    if (element) return [element, i];
+  }
+  return null;
+}
+var found = check();
+if (found) { done(found); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+  var result = check();
+  if (result) { observer.disconnect(); clearTimeout(timer); done(result); }
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () { observer.disconnect(); done(null); }, timeoutMs);
+"""
+
+
+class ElementWaiter:
+    """
+    Motor de espera de elementos para waitElement.
+
+    En modo 'poll' (por defecto) se sondea con WebDriver con un intervalo que crece
+    exponencialmente en lugar de reintentar sin pausa. El modo 'js' es opcional (por llamada
+    o con WAIT_ELEMENT_MODE=js): la espera ocurre dentro del navegador con un MutationObserver
+    vía execute_async_script, en un único round trip, y amplía el script timeout de la sesión;
+    si falla (p. ej. por una navegación), se vuelve al sondeo.
+    """
+
+    def __init__(self, resolver: LocatorResolver):
+        self.resolver = resolver
+        self.mode = os.getenv('WAIT_ELEMENT_MODE', 'poll').lower()
+        self.poll_interval = float(os.getenv('WAIT_POLL_INTERVAL', '0.25'))
+        self.poll_backoff = float(os.getenv('WAIT_POLL_BACKOFF', '1.5'))
+        self.max_poll_interval = float(os.getenv('WAIT_MAX_POLL_INTERVAL', '2'))
+        self._script_timeout = None
+
+    def wait(self, driver, selector: str, timeout: float, interval: Optional[float] = None,
+             backoff: Optional[float] = None, mode: Optional[str] = None):
+        """
+        Espera hasta 'timeout' segundos a que el selector exista y devuelve el WebElement.
+
+        Raises:
+            Exception: 'TIMEOUT - Element no reachable' con el detalle de los intentos realizados.
+        """
+        mode = (mode or self.mode).lower()
+        deadline = time.monotonic() + timeout
+        attempts = {'js': 0, 'poll': 0}
+        last_error = None
+
+        if mode == 'js':
+            attempts['js'] += 1
+            try:
+                element = self._wait_in_browser(driver, selector, timeout)
+                if element is not None:
+                    return element
+                # El navegador agotó el plazo: una última comprobación con WebDriver por si el
+                # elemento solo es localizable por una estrategia que la espera JS no replica.
+                deadline = time.monotonic()
+            except Exception as e:
+                last_error = e
+                logging.info(f"In-browser wait for '{selector}' failed, falling back to polling: {e}")
+
+        interval = interval if interval is not None else self.poll_interval
+        backoff = backoff if backoff is not None else self.poll_backoff
+        while True:
+            attempts['poll'] += 1
+            try:
+                return self.resolver.find(driver, selector)
+            except Exception as e:
+                last_error = e
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+            interval = min(interval * backoff, self.max_poll_interval)
+
+        strategies = [strategy for strategy, _ in self.resolver.candidates(selector)]
+        raise Exception(f"TIMEOUT - Element no reachable: '{selector}' after {timeout}s "
+                        f"(in-browser waits: {attempts['js']}, polls: {attempts['poll']}, "
+                        f"strategies: {strategies}, last error: {last_error})")
+
+    def _wait_in_browser(self, driver, selector: str, timeout: float):
+        candidates = self.resolver.candidates(selector)
+        # El timeout de scripts asíncronos es de la sesión: solo se amplía cuando hace falta.
+        required = timeout + 5
+        if self._script_timeout is None or self._script_timeout < required:
+            driver.set_script_timeout(required)
+            self._script_timeout = required
+        result = driver.execute_async_script(_WAIT_SCRIPT, [list(c) for c in candidates], int(timeout * 1000))
+        if not result:
+            return None
+        element, index = result
+        self.resolver.learn(selector, candidates[int(index)][0])
+        return element
@@ -1,26 +1,28 @@
-from sqlalchemy import text, create_engine
+from sqlalchemy import text
+from docker.errors import DockerException
+from ..lifecycle import get_engine
 from ..models.models import ExecutionPorts
-import os
+from .docker_service_v2 import DockerService, vnc_container_name
 import logging
-from dotenv import load_dotenv
-
-load_dotenv()
 
 logging.basicConfig(level=logging.INFO,
                     format='(%(threadName)-10s) [%(levelname)s] %(message)s',)
 
-engine = create_engine(os.getenv('DB_SERVER_URL'))
-
 
 class ExecutionService:
     @staticmethod
     def get_execution_vnc_port(execution_id: str):
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             query = "SELECT * FROM test_executor.test_port as e WHERE e.execution_id = '" + \
                 execution_id + "'"
             result = connection.execute(text(query)).first()
             print('-------------aqui---------' + str(result))
             if result:
+                # Arranca el servidor VNC bajo demanda para el visor que pide los puertos
+                try:
+                    DockerService().ensure_vnc_server(vnc_container_name(result.vnc_port))
+                except DockerException as e:
+                    logging.error(f"Could not start VNC server for execution {execution_id}: {e}")
                 return ExecutionPorts(id=result.id,
                                       execution_id=execution_id,
                                       selenium_port=result.selenium_port,
@@ -29,7 +31,7 @@ class ExecutionService:
     @staticmethod
     def stop_test(testExecution):
         print("stopping test")
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             try:
                 trans = connection.begin()
                 query = "INSERT INTO test_executor.stop_execution (execution_id) VALUES('"+testExecution['test_execution_id']+"')"
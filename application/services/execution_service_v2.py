@@ -1,13 +1,11 @@
-import os
 import logging
 from typing import Optional
-from sqlalchemy import text, create_engine
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
-from dotenv import load_dotenv
+from docker.errors import DockerException
+from ..lifecycle import get_engine
 from ..models.models import ExecutionPorts # Asegúrate de que este import sea correcto
-
-# Cargar variables de entorno una sola vez
-load_dotenv()
+from .docker_service_v2 import DockerService, vnc_container_name
 
 # El logging se debería configurar en el punto de entrada de la aplicación
 # logging.basicConfig(level=logging.INFO, format='(%(threadName)-10s) [%(levelname)s] %(message)s')
@@ -15,22 +13,13 @@ load_dotenv()
 class ExecutionService:
     """
     Gestiona las interacciones con la base de datos relacionadas con las ejecuciones de pruebas.
-    Cada instancia tiene su propio motor de base de datos para un aislamiento claro.
+    Usa el motor de base de datos compartido por el proceso, creado en el hook de arranque.
     """
     def __init__(self):
         """
-        Inicializa el servicio y crea el motor de la base de datos.
+        Inicializa el servicio con el motor compartido de la base de datos.
         """
-        db_url = os.getenv('DB_SERVER_URL')
-        if not db_url:
-            raise ValueError("La variable de entorno DB_SERVER_URL no está definida.")
-            
-        try:
-            self.engine: Engine = create_engine(db_url)
-            logging.info("ExecutionService instance created and database engine initialized.")
-        except Exception as e:
-            logging.error(f"Failed to create database engine: {e}")
-            raise
+        self.engine: Engine = get_engine()
 
     def get_execution_vnc_port(self, execution_id: str) -> Optional[ExecutionPorts]:
         """
@@ -72,6 +61,25 @@ class ExecutionService:
             # Propagar el error o devolver None dependiendo de la política de manejo de errores.
             raise
 
+    def attach_vnc(self, ports: ExecutionPorts) -> bool:
+        """
+        Arranca bajo demanda el servidor VNC del contenedor de la ejecución.
+        Se invoca cuando un visor pide los puertos; el servidor se apaga solo al quedar inactivo.
+
+        Args:
+            ports: Puertos registrados para la ejecución.
+
+        Returns:
+            True si el servidor VNC quedó disponible.
+        """
+        try:
+            docker_service = DockerService()
+        except DockerException as e:
+            # Sin Docker no hay VNC, pero los puertos se devuelven igualmente
+            logging.error(f"No se pudo arrancar el VNC de la ejecución {ports.execution_id}: {e}")
+            return False
+        return docker_service.ensure_vnc_server(vnc_container_name(ports.vnc_port))
+
     def stop_test(self, execution_id: str) -> bool:
         """
         Registra una solicitud para detener una ejecución de prueba de forma segura.
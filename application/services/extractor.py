@@ -0,0 +1,121 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from ..lifecycle import lazy_import
+from .response_body import KIND_HTML, KIND_XML, LazyBody
+
+lxml_etree = lazy_import('lxml.etree')
+lxml_html = lazy_import('lxml.html')
+lxml_cssselect = lazy_import('lxml.cssselect')
+
+# XPath sin prefijo que no empieza por '/': llamada a función ('count(//a)', 'string(//title)')
+_XPATH_FUNCTION = re.compile(r'^\w[\w-]*\(')
+# Literales entre comillas, que se ignoran al buscar '/' o '@' (p. ej. CSS a[href='/inicio'])
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+# Primera etiqueta de apertura del documento (se saltan <?xml ...>, <!DOCTYPE ...> y comentarios)
+_ROOT_TAG = re.compile(r'<([A-Za-z_][\w.:-]*)([^>]*)>')
+
+
+@lru_cache(maxsize=int(os.getenv('EXTRACT_CACHE_SIZE', '512')))
+def compile_expression(expression: str, namespaces: Tuple[Tuple[str, str], ...] = ()):
+    """
+    Compila una expresión una sola vez por proceso: 'xpath:...' o 'css:...', o sin prefijo
+    (XPath si contiene '/' o '@' fuera de comillas, como 'a/@href' o 'td[2]/text()', si empieza
+    por '(' o es '.', si usa un eje ('descendant::div') o si es una llamada a función
+    ('count(//a)'); CSS en otro caso, el mismo criterio que LocatorResolver.classify). Los evaluadores de lxml son
+    thread-safe, así que la caché se comparte entre casos y ejecuciones.
+    """
+    kind, _, value = expression.partition(':')
+    if kind not in ('xpath', 'css'):
+        value = expression.strip()
+        kind = 'xpath' if _is_xpath(value) else 'css'
+    namespaces = dict(namespaces) or None
+    if kind == 'css':
+        # CSSSelector traduce el selector a XPath (requiere el paquete cssselect)
+        return lxml_cssselect.CSSSelector(value.strip(), namespaces=namespaces)
+    return lxml_etree.XPath(value.strip(), namespaces=namespaces, smart_strings=False)
+
+
+def extract(source, expressions, all_matches: bool = False, namespaces: Optional[Dict[str, str]] = None):
+    """
+    Evalúa expresiones XPath/CSS sobre una respuesta parseada.
+
+    Args:
+        source: respuesta de consumeService (dict), su 'body', o HTML/XML en texto.
+        expressions: una expresión, una lista o un dict {campo: expresión} para extraer
+            varios campos en una sola llamada.
+        all_matches: True devuelve todas las coincidencias de cada expresión; False solo la primera (o None).
+        namespaces: prefijos de espacios de nombres para XPath sobre XML (p. ej. SOAP).
+
+    Los elementos se devuelven como su texto; atributos, textos y valores numéricos tal cual.
+    """
+    tree = _tree(source)
+    ns_key = tuple(sorted((namespaces or {}).items()))
+
+    def evaluate(expression):
+        result = compile_expression(expression, ns_key)(tree)
+        if not isinstance(result, list):
+            return result
+        values = [_value(item) for item in result]
+        return values if all_matches else (values[0] if values else None)
+
+    if isinstance(expressions, str):
+        return evaluate(expressions)
+    if isinstance(expressions, dict):
+        return {field: evaluate(expression) for field, expression in expressions.items()}
+    return [evaluate(expression) for expression in expressions]
+
+
+def cache_info():
+    return compile_expression.cache_info()
+
+
+def _is_xpath(value: str) -> bool:
+    unquoted = _QUOTED.sub('', value)
+    return (value == '.' or value.startswith(('(', '..')) or '/' in unquoted or '@' in unquoted
+            or '::' in unquoted or _XPATH_FUNCTION.match(value) is not None)
+
+
+def _tree(source):
+    content_type = ''
+    if isinstance(source, dict):
+        content_type = str((source.get('headers') or {}).get('Content-Type', '')).lower()
+        source = source.get('body')
+    if isinstance(source, LazyBody):
+        return source.lxml_tree
+    if isinstance(source, bytes):
+        source = source.decode('utf-8')
+    if isinstance(source, str):
+        return LazyBody(source, _body_kind(source, content_type)).lxml_tree
+    if lxml_etree.iselement(source):
+        return source
+    raise TypeError(f"No se puede extraer de un cuerpo de tipo {type(source).__name__}")
+
+
+def _body_kind(text: str, content_type: str = '') -> str:
+    """
+    HTML o XML según el Content-Type de la respuesta o, sin él, según el documento: XML si
+    tiene declaración '<?xml' o si la raíz (distinta de <html>) lleva prefijo o xmlns, como
+    los sobres SOAP. El parser de HTML descarta los espacios de nombres.
+    """
+    if 'html' in content_type:
+        return KIND_HTML
+    if 'xml' in content_type or text.lstrip().startswith('<?xml'):
+        return KIND_XML
+    root = _ROOT_TAG.search(text)
+    if root is not None and root.group(1).lower() != 'html' and \
+            (':' in root.group(1) or 'xmlns' in root.group(2)):
+        return KIND_XML
+    return KIND_HTML
+
+
+def _value(item):
+    if lxml_etree.iselement(item):
+        if isinstance(item, lxml_html.HtmlElement):
+            return item.text_content()
+        return ''.join(item.itertext())
+    if isinstance(item, str):
+        # Los 'smart strings' de lxml guardan una referencia al árbol; se devuelve un str simple
+        return str(item)
+    return item
@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ..metrics import Histogram
+
+# Servicios de integración que usan las primitivas de los scripts -> variable con su URL.
+UPSTREAMS = {
+    'rest': 'REST_API_URL',
+    'database': 'DATABASE_API_URL',
+    'jms': 'JMS_API_URL',
+    'mail': 'MAIL_API_URL',
+    'gdrive': 'GDRIVE_API_URL',
+}
+
+HTTP_UPSTREAM_SECONDS = Histogram('http_upstream_seconds', 'Latencia de las llamadas a los servicios de integración.',
+                                  labelnames=('upstream', 'outcome'))
+
+_client_lock = threading.Lock()
+_client: Optional['HttpClient'] = None
+
+
+def _setting(upstream: str, name: str, default: str) -> str:
+    """Configuración por servicio (HTTP_<NAME>_<UPSTREAM>) con valor común (HTTP_<NAME>) por defecto."""
+    return os.getenv(f'HTTP_{name}_{upstream.upper()}', os.getenv(f'HTTP_{name}', default))
+
+
+class HttpClient:
+    """
+    Cliente HTTP del proceso para los servicios de integración: una requests.Session por
+    servicio, con conexiones keep-alive reutilizables, timeouts y política de reintentos.
+    La latencia y los errores de cada llamada quedan registrados por servicio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+
+    def session(self, upstream: str) -> requests.Session:
+        session = self._sessions.get(upstream)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(upstream)
+                if session is None:
+                    session = self._sessions[upstream] = self._create_session(upstream)
+        return session
+
+    @staticmethod
+    def _create_session(upstream: str) -> requests.Session:
+        # Los reintentos por estado solo se aplican a métodos idempotentes; los errores de
+        # conexión (la petición no llegó a enviarse) se reintentan siempre.
+        retry = Retry(
+            total=int(_setting(upstream, 'RETRIES', '3')),
+            backoff_factor=float(_setting(upstream, 'RETRY_BACKOFF', '0.3')),
+            status_forcelist=[int(s) for s in _setting(upstream, 'RETRY_STATUS', '502,503,504').split(',') if s],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=int(_setting(upstream, 'POOL_CONNECTIONS', '4')),
+                              pool_maxsize=int(_setting(upstream, 'POOL_MAXSIZE', '20')),
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        logging.info(f"HTTP session created for upstream '{upstream}'.")
+        return session
+
+    @staticmethod
+    def timeout(upstream: str) -> tuple:
+        """(timeout de conexión, timeout de lectura) en segundos."""
+        return (float(_setting(upstream, 'CONNECT_TIMEOUT', '5')),
+                float(_setting(upstream, 'READ_TIMEOUT', '120')))
+
+    def request(self, upstream: str, method: str, url: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Ejecuta una petición contra el servicio. Sin 'url' se usa la de su variable de entorno
+        (p. ej. REST_API_URL para 'rest').
+        """
+        url = url or os.getenv(UPSTREAMS[upstream])
+        kwargs.setdefault('timeout', self.timeout(upstream))
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self.session(upstream).request(method, url, **kwargs)
+            outcome = f'{response.status_code // 100}xx'
+            return response
+        finally:
+            HTTP_UPSTREAM_SECONDS.observe(time.perf_counter() - start, upstream=upstream, outcome=outcome)
+
+    def post(self, upstream: str, data=None, **kwargs) -> requests.Response:
+        return self.request(upstream, 'POST', data=data, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def get_http_latency() -> dict:
+    """Histogramas de latencia por servicio y resultado ('2xx', '5xx', 'error' = sin respuesta)."""
+    return HTTP_UPSTREAM_SECONDS.snapshot()
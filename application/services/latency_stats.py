@@ -0,0 +1,69 @@
+import threading
+from array import array
+from typing import Dict, Optional
+from ..lifecycle import lazy_import
+
+np = lazy_import('numpy')
+
+PERCENTILES = (50, 90, 99)
+
+
+class LatencyRecorder:
+    """
+    Duraciones de una ejecución (casos y llamadas a primitivas) en buffers array('d'):
+    8 bytes por muestra y un append bajo lock en el camino caliente. Las estadísticas se
+    calculan una sola vez al final, vectorizadas con numpy sobre los mismos buffers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cases = array('d')
+        self._primitives: Dict[str, array] = {}
+
+    def record_case(self, seconds: float):
+        with self._lock:
+            self._cases.append(seconds)
+
+    def record_primitive(self, name: str, seconds: float):
+        with self._lock:
+            buffer = self._primitives.get(name)
+            if buffer is None:
+                buffer = self._primitives[name] = array('d')
+            buffer.append(seconds)
+
+    def summary(self, wall_seconds: Optional[float] = None) -> dict:
+        """
+        {'cases': estadísticas, 'throughput_cases_per_second', 'primitives': {nombre: estadísticas}},
+        con min, mean, p50, p90, p99 y max en segundos.
+        """
+        with self._lock:
+            cases = array('d', self._cases)
+            primitives = {name: array('d', buffer) for name, buffer in self._primitives.items()}
+        result = {'cases': _stats(cases)}
+        if wall_seconds:
+            result['throughput_cases_per_second'] = round(len(cases) / wall_seconds, 4)
+        result['primitives'] = {name: _stats(buffer) for name, buffer in sorted(primitives.items())}
+        return result
+
+
+def _stats(buffer: array) -> dict:
+    if not buffer:
+        return {'count': 0}
+    values = np.frombuffer(buffer, dtype=np.float64)
+    percentiles = np.percentile(values, PERCENTILES)
+    stats = {'count': int(values.size), 'min': values.min(), 'mean': values.mean()}
+    stats.update({f'p{p}': value for p, value in zip(PERCENTILES, percentiles)})
+    stats['max'] = values.max()
+    return {key: value if key == 'count' else round(float(value), 4) for key, value in stats.items()}
+
+
+def format_summary(summary: dict) -> str:
+    """Texto de evidencia: una línea por serie (casos y cada primitiva)."""
+    columns = ('count', 'min', 'mean', 'p50', 'p90', 'p99', 'max')
+    lines = ['series ' + ' '.join(columns)]
+    rows = [('cases', summary['cases'])] + list(summary['primitives'].items())
+    for name, stats in rows:
+        lines.append(name + ' ' + ' '.join(str(stats.get(column, '-')) for column in columns))
+    if 'throughput_cases_per_second' in summary:
+        lines.append(f"throughput_cases_per_second {summary['throughput_cases_per_second']}")
+    return '\n'.join(lines)
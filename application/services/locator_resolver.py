@@ -0,0 +1,165 @@
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from ..lifecycle import lazy_import
+
+selenium_by = lazy_import('selenium.webdriver.common.by')
+
+# Nombres aceptados en el prefijo explícito 'estrategia:selector' (p. ej. 'id:login', 'css:#menu a').
+STRATEGY_NAMES = ('xpath', 'id', 'name', 'class_name', 'css_selector', 'link_text', 'partial_link_text', 'tag_name')
+STRATEGY_ALIASES = {'css': 'css_selector', 'class': 'class_name', 'link': 'link_text', 'tag': 'tag_name'}
+
+_CSS_SYNTAX = re.compile(r'[#.\[\]>+~*:=]')
+_XPATH_SYNTAX = ('/', '@', '::')
+
+# Equivalente en JavaScript de find_element para cada estrategia, para las primitivas que
+# localizan elementos dentro del navegador (esperas y operaciones por lotes).
+FIND_ONE_JS = """
+function findOne(strategy, value) {
+  try {
+    switch (strategy) {
+      case 'xpath':
+        return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+      case 'id': return document.getElementById(value);
+      case 'name': return document.getElementsByName(value)[0] || null;
+      case 'class_name': return document.getElementsByClassName(value)[0] || null;
+      case 'tag_name': return document.getElementsByTagName(value)[0] || null;
+      case 'css_selector': return document.querySelector(value);
+      case 'link_text':
+      case 'partial_link_text':
+        var links = document.getElementsByTagName('a');
+        for (var i = 0; i < links.length; i++) {
+          var text = (links[i].innerText || links[i].textContent || '').trim();
+          if (strategy === 'link_text' ? text === value : text.indexOf(value) !== -1) return links[i];
+        }
+        return null;
+    }
+  } catch (e) {}
+  return null;
+}
+"""
+
+
+class LocatorResolver:
+    """
+    Resuelve selectores de los scripts a elementos de WebDriver con el mínimo de llamadas.
+
+    1. Un prefijo explícito ('id:login', 'xpath://a', 'css:.btn') fija la estrategia.
+    2. Si no, se usa la estrategia que ya funcionó para ese selector en el mismo origen.
+    3. Si no hay caché, se clasifica el selector sintácticamente y se prueban solo las
+       estrategias plausibles, en orden; la que funciona queda aprendida.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (origen, selector) -> nombre de estrategia
+        self._learned: Dict[Tuple[str, str], str] = {}
+        # Origen de la última página navegada, por hilo (los casos corren en paralelo)
+        self._local = threading.local()
+        self.stats = {'explicit': 0, 'hits': 0, 'misses': 0, 'probes': 0}
+
+    def set_page(self, url: str):
+        """Registra la página navegada con get(); el aprendizaje se guarda por origen."""
+        parsed = urlparse(url)
+        self._local.origin = f'{parsed.scheme}://{parsed.netloc}'
+
+    @property
+    def _origin(self) -> str:
+        return getattr(self._local, 'origin', '')
+
+    def find(self, driver, selector: str):
+        """
+        Devuelve el WebElement del selector.
+
+        Raises:
+            Exception: 'Element no reachable' si ninguna estrategia encuentra el elemento.
+        """
+        explicit = self._parse_prefix(selector)
+        if explicit is not None:
+            strategy, value = explicit
+            self._count('explicit')
+            return driver.find_element(self._by(strategy), value)
+
+        key = (self._origin, selector)
+        learned = self._learned.get(key)
+        if learned is not None:
+            self._count('hits')
+            try:
+                self._count('probes')
+                return driver.find_element(self._by(learned), selector)
+            except Exception:
+                # La página cambió: se vuelve a sondear el resto de estrategias.
+                pass
+        else:
+            self._count('misses')
+
+        for strategy in self.classify(selector):
+            if strategy == learned:
+                continue
+            try:
+                self._count('probes')
+                element = driver.find_element(self._by(strategy), selector)
+            except Exception:
+                continue
+            with self._lock:
+                self._learned[key] = strategy
+            return element
+        raise Exception("Element no reachable")
+
+    def candidates(self, selector: str) -> List[Tuple[str, str]]:
+        """Pares (estrategia, valor) a probar para el selector, empezando por la aprendida."""
+        explicit = self._parse_prefix(selector)
+        if explicit is not None:
+            return [explicit]
+        learned = self._learned.get((self._origin, selector))
+        strategies = self.classify(selector)
+        if learned is not None:
+            strategies = [learned] + [strategy for strategy in strategies if strategy != learned]
+        return [(strategy, selector) for strategy in strategies]
+
+    def learn(self, selector: str, strategy: str):
+        """Registra la estrategia que encontró el selector (p. ej. desde una espera en el navegador)."""
+        if self._parse_prefix(selector) is None:
+            with self._lock:
+                self._learned[(self._origin, selector)] = strategy
+
+    @staticmethod
+    def classify(selector: str) -> List[str]:
+        """Estrategias plausibles para el selector, de la más a la menos probable."""
+        stripped = selector.strip()
+        if stripped.startswith(('/', '(', './')):
+            return ['xpath']
+        has_css_syntax = _CSS_SYNTAX.search(stripped) is not None
+        if not has_css_syntax and not any(c.isspace() for c in stripped):
+            strategies = ['id', 'name', 'class_name', 'tag_name', 'link_text', 'partial_link_text']
+        elif has_css_syntax:
+            # Los id y name también pueden contener '.', ':' o '[' y quedan como último recurso
+            strategies = ['css_selector', 'id', 'name', 'link_text', 'partial_link_text']
+        else:
+            # Texto libre (con espacios): probablemente el texto de un enlace
+            strategies = ['link_text', 'partial_link_text', 'css_selector']
+        # XPath relativo o sin anclar ('div[@id="a"]', 'html/body/div'): siempre es candidato,
+        # primero si el selector tiene sintaxis propia de XPath
+        if any(token in stripped for token in _XPATH_SYNTAX):
+            return ['xpath'] + strategies
+        return strategies + ['xpath']
+
+    @staticmethod
+    def _parse_prefix(selector: str) -> Optional[Tuple[str, str]]:
+        head, sep, value = selector.partition(':')
+        if not sep:
+            return None
+        head = head.strip().lower()
+        head = STRATEGY_ALIASES.get(head, head)
+        if head not in STRATEGY_NAMES:
+            return None
+        return head, value.strip()
+
+    @staticmethod
+    def _by(strategy: str) -> str:
+        return getattr(selenium_by.By, strategy.upper())
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
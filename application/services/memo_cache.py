@@ -0,0 +1,93 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+SCOPE_EXECUTION = 'execution'
+SCOPE_TTL = 'ttl'
+
+HIT = 'hit'
+MISS = 'miss'
+COALESCED = 'coalesced'
+
+_shared_lock = threading.Lock()
+_shared: Optional['MemoCache'] = None
+
+
+def canonical_key(namespace: str, request) -> str:
+    """Clave estable de una petición: mismo contenido, misma clave, sin importar el orden de las claves."""
+    return namespace + ':' + json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class MemoCache:
+    """
+    Caché LRU acotada para las primitivas de solo lectura de los scripts.
+
+    Las llamadas concurrentes con la misma clave se agrupan (single-flight): solo la primera
+    va al servicio y el resto espera su resultado. Los errores no se cachean. Los valores se
+    devuelven como copia para que un caso no altere lo que verá el siguiente.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # clave -> (valor, instante de caducidad o None)
+        self._entries: 'OrderedDict[str, Tuple[object, Optional[float]]]' = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.evictions = 0
+
+    def get_or_load(self, key: str, loader: Callable[[], object]) -> Tuple[object, str]:
+        """Devuelve (valor, resultado) con resultado 'hit', 'miss' o 'coalesced'."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[0]), HIT
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            return copy.deepcopy(future.result()), COALESCED
+
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            self._store(key, value)
+            return copy.deepcopy(value), MISS
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _store(self, key: str, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_shared_memo_cache() -> MemoCache:
+    """Caché compartida entre ejecuciones para el alcance 'ttl' (MEMO_TTL segundos por entrada)."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = MemoCache(int(os.getenv('MEMO_MAX_ENTRIES', '256')), float(os.getenv('MEMO_TTL', '300')))
+    return _shared
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Optional
+from .http_client import HttpClient
+from .rate_limiter import RateLimiter
+from ..metrics import Gauge
+
+# Tipos de efecto lateral -> servicio de integración (ver http_client.UPSTREAMS)
+KIND_MAIL = 'mail'
+KIND_JMS = 'jms'
+
+_STOP = object()
+
+OUTBOX_QUEUE_DEPTH = Gauge('outbox_queue_depth', 'Mensajes encolados en los buzones de salida pendientes de entrega.')
+
+
+class Outbox:
+    """
+    Buzón de salida asíncrono de una ejecución para sendMail y sendJmsQueue.
+
+    Los casos encolan el envío y siguen; un hilo en segundo plano los entrega por lotes de
+    hasta OUTBOX_BATCH_SIZE. Si existe <TIPO>_BATCH_API_URL (p. ej. JMS_BATCH_API_URL) el lote
+    va en una sola llamada con la lista de mensajes; si no, se envían uno a uno por la sesión
+    keep-alive del servicio. Cada entrega queda registrada para la evidencia de la ejecución.
+    Las llamadas respetan los límites 'mail' y 'jms' del RateLimiter de la ejecución.
+    """
+
+    def __init__(self, http: HttpClient, name: str, rate_limiter: Optional[RateLimiter] = None):
+        self.http = http
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.batch_size = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.deliveries: List[dict] = []
+        self.batches = 0
+
+    def enqueue(self, kind: str, payload: dict, case_execution_id: Optional[str] = None):
+        self._ensure_worker()
+        OUTBOX_QUEUE_DEPTH.inc()
+        self._queue.put({'kind': kind, 'payload': payload, 'case_execution_id': case_execution_id,
+                         'enqueued_at': time.time()})
+
+    def flush(self, timeout: Optional[float] = None) -> List[dict]:
+        """Espera a que se entregue todo lo encolado, detiene el hilo y devuelve los resultados."""
+        worker = self._worker
+        if worker is not None:
+            self._queue.put(_STOP)
+            worker.join(timeout)
+            if worker.is_alive():
+                logging.warning(f"Outbox {self.name} not drained after {timeout}s, "
+                                f"{self._queue.qsize()} messages left undelivered.")
+            self._worker = None
+        with self._lock:
+            return list(self.deliveries)
+
+    def summary(self) -> dict:
+        with self._lock:
+            sent = sum(1 for d in self.deliveries if d['status'] == 'sent')
+            return {'sent': sent, 'failed': len(self.deliveries) - sent, 'batches': self.batches}
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._drain, name=f"Outbox-{self.name}", daemon=True)
+                    self._worker.start()
+
+    def _drain(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(item is _STOP for item in batch):
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+                # Lo que quede en la cola se encoló antes de la parada y también se entrega
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            for kind in (KIND_MAIL, KIND_JMS):
+                items = [item for item in batch if item['kind'] == kind]
+                for start in range(0, len(items), self.batch_size):
+                    self._deliver(kind, items[start:start + self.batch_size])
+
+    def _deliver(self, kind: str, items: List[dict]):
+        batch_url = os.getenv(f'{kind.upper()}_BATCH_API_URL')
+        if batch_url:
+            outcomes = self._send(kind, [item['payload'] for item in items], batch_url)
+            outcomes = [outcomes] * len(items)
+        else:
+            outcomes = [self._send(kind, item['payload']) for item in items]
+        OUTBOX_QUEUE_DEPTH.dec(len(items))
+        with self._lock:
+            self.batches += 1
+            for item, (status, detail) in zip(items, outcomes):
+                self.deliveries.append({'kind': kind, 'status': status, 'detail': detail,
+                                        'case_execution_id': item['case_execution_id'],
+                                        'enqueued_at': item['enqueued_at'], 'delivered_at': time.time()})
+
+    def _send(self, kind: str, payload, url: Optional[str] = None):
+        limit = self.rate_limiter.limit(kind) if self.rate_limiter is not None else nullcontext()
+        try:
+            with limit:
+                r = self.http.post(kind, data=json.dumps(payload), url=url)
+            if r.status_code >= 400:
+                return 'failed', f'HTTP {r.status_code}'
+            return 'sent', f'HTTP {r.status_code}'
+        except Exception as e:
+            logging.warning(f"Outbox {self.name} could not deliver {kind} message: {e}")
+            return 'failed', str(e)
+
+
+def format_deliveries(deliveries: List[dict]) -> str:
+    """Texto de evidencia: una línea por entrega."""
+    lines = []
+    for d in deliveries:
+        lines.append(f"{datetime.fromtimestamp(d['delivered_at']).isoformat(timespec='seconds')} "
+                     f"{d['kind']} {d['status']} case={d['case_execution_id']} "
+                     f"latency={d['delivered_at'] - d['enqueued_at']:.3f}s {d['detail']}")
+    return '\n'.join(lines)
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class Limit:
+    """
+    Límite de un destino: token bucket de 'rate' peticiones por segundo (ráfagas de hasta
+    'burst') y como máximo 'max_in_flight' peticiones simultáneas.
+
+    El token se reserva bajo el lock y la espera ocurre fuera, durmiendo exactamente lo que
+    falta hasta su turno: no hay sondeo activo y el hilo cede la CPU al resto mientras espera.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        self.rate = rate
+        self.burst = max(1, burst or int(rate or 1))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.calls = 0
+        self.waits = 0
+        self.throttled_seconds = 0.0
+
+    @contextmanager
+    def acquire(self):
+        start = time.monotonic()
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            if self.rate:
+                delay = self._reserve()
+                if delay > 0:
+                    time.sleep(delay)
+            waited = time.monotonic() - start
+            with self._lock:
+                self.calls += 1
+                if waited > 0.001:
+                    self.waits += 1
+                    self.throttled_seconds += waited
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'waits': self.waits, 'throttled_seconds': round(self.throttled_seconds, 3)}
+
+
+class RateLimiter:
+    """
+    Límites de una ejecución, por destino: el host de la 'url' de consumeService o el nombre
+    de un servicio de integración ('rest', 'database', 'jms', 'mail', 'gdrive').
+
+    Los límites se declaran como {destino: {'rate', 'burst', 'max_in_flight'}} en la petición
+    de ejecución ('rate_limits'), sobre los valores por defecto de la variable RATE_LIMITS (JSON).
+    """
+
+    def __init__(self, limits: Optional[Dict[str, dict]] = None):
+        config = json.loads(os.getenv('RATE_LIMITS') or '{}')
+        config.update(limits or {})
+        self._limits = {target.lower(): Limit(**{k: v for k, v in spec.items() if v is not None})
+                        for target, spec in config.items()}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._limits)
+
+    @contextmanager
+    def limit(self, *targets: Optional[str]):
+        """
+        Adquiere los límites de los destinos dados, en orden (los que no tienen límite se ignoran).
+        Un destino repetido (p. ej. el host 'rest' de una URL y el servicio 'rest') se adquiere una sola vez.
+        """
+        with ExitStack() as stack:
+            for target in dict.fromkeys((target or '').lower() for target in targets):
+                limit = self._limits.get(target)
+                if limit is not None:
+                    stack.enter_context(limit.acquire())
+            yield
+
+    def summary(self) -> dict:
+        stats = {target: limit.stats() for target, limit in self._limits.items()}
+        return {'throttled_seconds': round(sum(s['throttled_seconds'] for s in stats.values()), 3),
+                'targets': stats}
+
+
+def url_host(url: Optional[str]) -> Optional[str]:
+    return urlparse(url).hostname if url else None
@@ -0,0 +1,119 @@
+import os
+import threading
+from xml.dom import minidom
+from ..lifecycle import lazy_import
+
+bs4 = lazy_import('bs4')
+lxml_etree = lazy_import('lxml.etree')
+lxml_html = lazy_import('lxml.html')
+
+KIND_HTML = 'html'
+KIND_XML = 'xml'
+
+
+class LazyBody:
+    """
+    Cuerpo de respuesta HTML o XML que se parsea en el primer acceso.
+
+    Se comporta como el objeto que devolvía responseMapper (BeautifulSoup para HTML,
+    documento minidom para XML): cualquier atributo, llamada, iteración, str() o repr() se delega
+    en él, parseado igual que antes (html.parser de BeautifulSoup salvo que RESPONSE_HTML_PARSER
+    diga otra cosa, y minidom para XML). 'lxml_tree' da el árbol de lxml sin pasar por
+    BeautifulSoup ni minidom.
+    Si el script no toca el cuerpo, no se parsea nunca.
+    """
+
+    def __init__(self, raw: str, kind: str):
+        self.__dict__['_raw'] = raw
+        self.__dict__['_kind'] = kind
+        self.__dict__['_parsed'] = None
+        self.__dict__['_tree'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    @property
+    def raw_text(self) -> str:
+        """El cuerpo tal como llegó, sin parsear."""
+        return self._raw
+
+    @property
+    def lxml_tree(self):
+        """Raíz del árbol de lxml (lxml.html para HTML, lxml.etree para XML)."""
+        tree = self._tree
+        if tree is None:
+            with self._lock:
+                tree = self._tree
+                if tree is None:
+                    if self._kind == KIND_HTML:
+                        tree = lxml_html.document_fromstring(self._raw)
+                    else:
+                        raw = self._raw.encode('utf-8') if isinstance(self._raw, str) else self._raw
+                        tree = lxml_etree.fromstring(raw, lxml_etree.XMLParser(encoding='utf-8', huge_tree=True))
+                    self.__dict__['_tree'] = tree
+        return tree
+
+    @property
+    def parsed(self):
+        """El objeto compatible con los scripts existentes: BeautifulSoup o documento minidom."""
+        parsed = self._parsed
+        if parsed is None:
+            with self._lock:
+                parsed = self._parsed
+                if parsed is None:
+                    if self._kind == KIND_HTML:
+                        parsed = bs4.BeautifulSoup(self._raw, _html_parser())
+                    else:
+                        parsed = minidom.parseString(self._raw)
+                    self.__dict__['_parsed'] = parsed
+        return parsed
+
+    def __getattr__(self, attr):
+        return getattr(self.parsed, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.parsed, attr, value)
+
+    def __call__(self, *args, **kwargs):
+        return self.parsed(*args, **kwargs)
+
+    def __getitem__(self, key):
+        return self.parsed[key]
+
+    def __iter__(self):
+        return iter(self.parsed)
+
+    def __len__(self):
+        return len(self.parsed)
+
+    def __contains__(self, item):
+        return item in self.parsed
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return str(self.parsed)
+
+    def __repr__(self):
+        # La evidencia de los scripts usa repr() del cuerpo (p. ej. dentro del dict de la respuesta)
+        return repr(self.parsed)
+
+
+_html_parser_name = None
+
+
+def _html_parser() -> str:
+    """
+    Parser de BeautifulSoup para HTML: html.parser por defecto, como hasta ahora. Con
+    RESPONSE_HTML_PARSER=lxml se usa lxml si está instalado (más rápido, pero completa los
+    fragmentos con <html><body> y repara el HTML mal formado de otra manera).
+    """
+    global _html_parser_name
+    if _html_parser_name is None:
+        name = os.getenv('RESPONSE_HTML_PARSER', 'html.parser')
+        if name == 'lxml':
+            try:
+                import lxml  # noqa: F401
+            except ImportError:
+                name = 'html.parser'
+        _html_parser_name = name
+    return _html_parser_name
@@ -2,7 +2,8 @@ import pandas
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
 from .. import utils
-from sqlalchemy import text, create_engine
+from sqlalchemy import text
+from ..lifecycle import get_engine
 from datetime import datetime
 import time
 import os
@@ -20,7 +21,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
 from ..services.docker_service import DockerService
-from dotenv import load_dotenv
 from typing import List
 from pydantic import EmailStr
 import unicodedata
@@ -32,8 +32,6 @@ logging.basicConfig(level=logging.INFO,
 local_storage = threading.local()
 test_execution_data = {}
 case_execution_data = {}
-load_dotenv()
-engine = create_engine(os.getenv('DB_SERVER_URL'))
 event = Event()
 
 
@@ -81,7 +79,7 @@ class TestExecutorService:
                         raise Exception(f"No se pudo conectar a Selenium tras {max_attempts} intentos: {str(e)}")
                     time.sleep(5)
             
-            with engine.connect() as connection:
+            with get_engine().connect() as connection:
                 try:
                     trans = connection.begin()
                     webquery = text("""
@@ -136,7 +134,7 @@ class TestExecutorService:
     @staticmethod
     def stop_test(testExecution):
         print("stopping test")
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             try:
                 trans = connection.begin()
                 query = "INSERT INTO test_executor.stop_execution (execution_id) VALUES('"+testExecution['test_execution_id']+"')"
@@ -186,7 +184,7 @@ def executeBeforeOrAfter(script: str):
 def executeCase(script: str, data, executor, driver_instance):
     local_storage.driver = driver_instance
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             query = "SELECT * FROM test_executor.stop_execution as e WHERE e.execution_id = '" + test_execution_data['test_execution_id'] + "'"
             result = connection.execute(text(query)).first()
             #print('-------------aqui---------' + str(result))
@@ -273,11 +271,11 @@ def writeEvidence(fileName, content, fileType):
         query = "SELECT * FROM test_executor.evidence_file as e WHERE e.file_name = '" + fileName + ".txt' and e.test_execution_id = '" + \
             test_execution_data['test_execution_id'] + "' AND e.case_execution_id = '" + \
                 case_execution_data['case_execution_id'] + "'"
-    with engine.connect() as connection:
+    with get_engine().connect() as connection:
         result = connection.execute(text(query)).first()
     if result:
         evidence_file_id = result.evidence_id
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             try:
                 trans = connection.begin()
                 date = datetime.today()
@@ -301,7 +299,7 @@ def writeEvidence(fileName, content, fileType):
                 case_execution_data['case_execution_id'] + \
                 '/' + fileName + '.txt'
         test_execution_id = test_execution_data['test_execution_id']
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             try:
                 trans = connection.begin()
                 query = "INSERT INTO test_executor.evidence_file (evidence_id,file_name,evidence_uri, type_id, test_execution_id, case_execution_id) VALUES ('" + \
@@ -335,7 +333,7 @@ def assertion(boul, message):
 
 def generateFiles(fileType):
     logging.info('Generating evidence files for ' + str(fileType))
-    with engine.connect() as connection:
+    with get_engine().connect() as connection:
         if fileType == 1:
             query = "SELECT * FROM test_executor.evidence_file as e WHERE e.test_execution_id = '" + \
                 test_execution_data['test_execution_id'] + \
@@ -1,31 +1,55 @@
-import pandas
-import numpy as np
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import functools
 from .. import utils
-from sqlalchemy import text, create_engine
-from datetime import datetime, timedelta
+from ..lifecycle import get_engine, lazy_import
+from sqlalchemy import text
+from datetime import datetime
 import time
 import os
 import logging
-import pika
-import requests
 import json
-from bs4 import BeautifulSoup
-from xml.dom import minidom
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from ..services.docker_service_v2 import DockerService # Asumido
+import threading
+from ..services.docker_service_v2 import (DockerService, PROFILE_HEADLESS, PROFILE_VNC, wait_for_image, # Asumido
+                                          CONTAINER_PROVISION_SECONDS)
+from ..metrics import Counter, Gauge, Histogram
+from ..services.container_pool import get_container_pool
 from ..services.credential_service import CredentialService
-
-from dotenv import load_dotenv
-from lxml import etree
+from ..services.locator_resolver import LocatorResolver
+from ..services.element_waiter import ElementWaiter
+from ..services.browser_batch import BrowserBatch
+from ..services.http_client import get_http_client
+from ..services.response_body import KIND_HTML, KIND_XML, LazyBody
+from ..services import extractor
+from ..services.datasources import get_datasource_registry
+from ..services.rate_limiter import RateLimiter, url_host
+from ..services.tracer import ExecutionTracer
+from ..services.latency_stats import LatencyRecorder, format_summary
+from ..services.web_vitals import WebVitalsCollector
+from ..services.outbox import KIND_JMS, KIND_MAIL, Outbox, format_deliveries
+from ..services.memo_cache import (COALESCED, HIT, MISS, SCOPE_TTL, MemoCache, canonical_key,
+                                   get_shared_memo_cache)
+from ..services.browser_profile import (PageTimer, apply_blocked_urls, apply_session_options,
+                                        performance_settings, session_signature)
+
+# Módulos pesados: se importan en el primer uso para no penalizar el arranque de la API
+pandas = lazy_import('pandas')
+np = lazy_import('numpy')
+pika = lazy_import('pika')
+webdriver = lazy_import('selenium.webdriver')
 
 # --- CONFIGURACIÓN ---
 logging.basicConfig(level=logging.INFO,
                     format='(%(threadName)-10s) [%(levelname)s] %(message)s',)
-load_dotenv()
-# La conexión a la BD se puede gestionar por instancia o globalmente si el pool es thread-safe
-# engine = create_engine(os.getenv('DB_SERVER_URL'))
+
+# --- MÉTRICAS ---
+ACTIVE_EXECUTIONS = Gauge('active_executions', 'Ejecuciones de prueba en curso.')
+CASE_DURATION_SECONDS = Histogram('case_duration_seconds', 'Duración de cada caso de prueba.', labelnames=('status',))
+SCRIPT_PRIMITIVE_SECONDS = Histogram('script_primitive_seconds', 'Duración de las llamadas a primitivas de los scripts.',
+                                     labelnames=('primitive', 'outcome'))
+WEBDRIVER_CONNECT_ATTEMPTS = Counter('webdriver_connect_attempts', 'Intentos de conexión de WebDriver, por resultado.',
+                                     labelnames=('outcome',))
+RABBITMQ_PUBLISH_SECONDS = Histogram('rabbitmq_publish_seconds', 'Latencia de publicación en RabbitMQ.',
+                                     labelnames=('queue', 'outcome'))
 
 # --- CLASE REFACTORIZADA ---
 class TestExecutorService:
@@ -39,8 +63,46 @@ class TestExecutorService:
         # Atributos de estado específicos de esta instancia
         self.driver = None
         self.container = None
-        self.docker_service = DockerService()
-        self.engine = create_engine(os.getenv('DB_SERVER_URL'))
+        # Entrada del conjunto de contenedores reutilizables (solo con 'reuse_container')
+        self.pool_entry = None
+        # Estrategia de localización aprendida por selector, compartida por los casos de la ejecución
+        self.locator_resolver = LocatorResolver()
+        self.element_waiter = ElementWaiter(self.locator_resolver)
+        self.browser_batch = BrowserBatch(self.locator_resolver)
+        # Perfil de rendimiento de las sesiones de Chrome y medición del tiempo de página
+        self.performance = performance_settings(self.config.get('performance'))
+        self.page_timer = PageTimer(self.performance, self.config.get('name'),
+                                    self.config.get('profile') or PROFILE_VNC)
+        self.web_vitals = WebVitalsCollector() if self.performance['capture_timing'] else None
+        # Future del aprovisionamiento del entorno web, que corre en paralelo con la preparación
+        self.environment_future = None
+        # El cliente de Docker se crea en run(), fuera del hilo que acepta la petición
+        self.docker_service = None
+        # Motor compartido por el proceso (pool de conexiones thread-safe)
+        self.engine = get_engine()
+        # Sesiones HTTP keep-alive compartidas por el proceso, una por servicio de integración
+        self.http = get_http_client()
+        # Duraciones de casos y primitivas para el resumen de latencias del mensaje final
+        self.latency = LatencyRecorder()
+        # Trazado opcional por caso (fracción de casos muestreados), exportado como trace-event de Chrome
+        sample_rate = self.config.get('trace_sample_rate')
+        self.tracer = ExecutionTracer(float(os.getenv('TRACE_SAMPLE_RATE', '0') if sample_rate is None else sample_rate))
+        # Límites de tasa y de peticiones simultáneas por destino
+        self.rate_limiter = RateLimiter(self.config.get('rate_limits'))
+        # Buzón de salida asíncrono para sendMail/sendJmsQueue (solo con 'async_side_effects')
+        self.outbox = Outbox(self.http, self.test_execution_id, self.rate_limiter) \
+            if self.config.get('async_side_effects') else None
+        # Memoización opcional de las primitivas de solo lectura: por ejecución o compartida con TTL
+        self.memoize = bool(self.config.get('memoize'))
+        if self.config.get('memoize_scope') == SCOPE_TTL:
+            self.memo_cache = get_shared_memo_cache()
+        else:
+            self.memo_cache = MemoCache(int(os.getenv('MEMO_MAX_ENTRIES', '256')))
+        self.memo_stats = {HIT: 0, MISS: 0, COALESCED: 0}
+        self.memo_lock = threading.Lock()
+        # Pool acotado para las llamadas concurrentes de consumeServices (hilos creados bajo demanda)
+        self.fanout_executor = ThreadPoolExecutor(max_workers=int(os.getenv('FANOUT_MAX_WORKERS', '10')),
+                                                  thread_name_prefix=f"Fanout-{self.test_execution_id}")
         
         # Inicializar servicio de credenciales
         credentials = self.config.get('credentials', [])
@@ -55,17 +117,6 @@ class TestExecutorService:
         }
         self.case_execution_data = {}
 
-        # Mapeo de selectores de Selenium
-        self.BY_MAP = {
-            "xpath": By.XPATH,
-            "id": By.ID,
-            "name": By.NAME,
-            "class_name": By.CLASS_NAME,
-            "css_selector": By.CSS_SELECTOR,
-            "link_text": By.LINK_TEXT,
-            "partial_link_text": By.PARTIAL_LINK_TEXT,
-            "tag_name": By.TAG_NAME
-        }
         logging.info(f"Instancia TestExecutorService creada para ejecución {self.test_execution_id}")
 
     def _create_environment(self):
@@ -74,40 +125,50 @@ class TestExecutorService:
             return
 
         logging.info("Creando entorno web...")
-        # Recomiendo usar la versión mejorada de DockerService que espera a que el hub esté listo
-        ports, self.container = self.docker_service.create_selenium_container()
+        self.docker_service = DockerService()
+        profile = self.config.get('profile') or PROFILE_VNC
+        reuse = self.config.get('reuse_container')
+        entry = get_container_pool().acquire(self.config.get('name'), profile) if reuse else None
+        if entry:
+            # Contenedor reutilizado: Selenium ya está listo, no hace falta esperar.
+            ports, self.container, self.driver = entry['ports'], entry['container'], entry['driver']
+            initial_wait = 0
+            if self.driver is not None and entry.get('session') != session_signature(self.performance):
+                # La sesión se creó con otro perfil de rendimiento: se abre una nueva en el mismo contenedor
+                try:
+                    self.driver.quit()
+                except Exception as e:
+                    logging.warning(f"Error al cerrar WebDriver: {e}")
+                self.driver = None
+        else:
+            # La imagen puede estar construyéndose todavía en segundo plano
+            with CONTAINER_PROVISION_SECONDS.time(phase='image_wait', profile=profile):
+                image_ready = wait_for_image(float(os.getenv('IMAGE_BUILD_WAIT_TIMEOUT', '600')))
+            if not image_ready:
+                raise Exception("La imagen de Selenium no está disponible, revise /image/status")
+            # Recomiendo usar la versión mejorada de DockerService que espera a que el hub esté listo
+            ports, self.container = self.docker_service.create_selenium_container(profile)
+            initial_wait = 10
         selenium_port, vnc_port = ports # Estos son los puertos en localhost
         logging.info(f"Contenedor creado: {self.container.name} con puertos {ports}")
-        
-        options = webdriver.ChromeOptions()
-        options.add_argument("--disable-notifications")
-        options.add_argument("--start-maximized")
-        options.add_experimental_option("prefs", {
-                "profile.default_content_setting_values.notifications": 2  # 2 = bloquear
-            })
-        # options.add_argument("--headless") # Considerar para ejecuciones en servidor
 
-        command_executor_url = f'http://{self.container.name}:4444'
-        logging.info(f"Connecting WebDriver to {command_executor_url}...")
-
-        time.sleep(10)
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            try:
-                self.driver = webdriver.Remote(
-                    command_executor=command_executor_url,
-                    options=options
-                )
-                logging.info(f"WebDriver conectado exitosamente para la ejecución {self.test_execution_id}")
-                break
-            except Exception as e:
-                logging.warning(f"Intento fallido: {str(e)}")
-                if attempt == max_attempts - 1:
-                    self.docker_service.destroy_container(str(self.container.name))
-                    raise Exception(f"No se pudo conectar a Selenium tras {max_attempts} intentos: {str(e)}")
-                time.sleep(5)
+        if self.driver is None:
+            with CONTAINER_PROVISION_SECONDS.time(phase='webdriver', profile=profile):
+                self._connect_webdriver(initial_wait, profile)
+        apply_blocked_urls(self.driver, self.performance)
+
+        if reuse:
+            if entry is None:
+                entry = {'container': self.container, 'ports': ports, 'profile': profile, 'uses': 1}
+            entry['driver'] = self.driver
+            entry['session'] = session_signature(self.performance)
+            self.pool_entry = entry
         logging.info(f"WebDriver conectado para {self.test_execution_id}")
-        
+
+        if vnc_port is None:
+            # Perfil headless: no hay VNC que observar, se omite el registro en test_port.
+            return
+
         with self.engine.connect() as connection:
                 try:
                     trans = connection.begin()
@@ -134,9 +195,59 @@ class TestExecutorService:
                     logging.error(f"An error occurred: {e}")
                     trans.rollback() 
 
+    def _connect_webdriver(self, initial_wait: int, profile: str = PROFILE_VNC):
+        """Abre la sesión de WebDriver contra el contenedor, reintentando mientras Selenium arranca."""
+        options = webdriver.ChromeOptions()
+        options.add_argument("--disable-notifications")
+        if profile == PROFILE_HEADLESS:
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1920,1080")
+            options.add_argument("--disable-gpu")
+        else:
+            options.add_argument("--start-maximized")
+        prefs = {
+                "profile.default_content_setting_values.notifications": 2  # 2 = bloquear
+            }
+        apply_session_options(options, self.performance, prefs)
+        options.add_experimental_option("prefs", prefs)
+
+        command_executor_url = f'http://{self.container.name}:4444'
+        logging.info(f"Connecting WebDriver to {command_executor_url}...")
+
+        time.sleep(initial_wait)
+        max_attempts = 5
+        for attempt in range(max_attempts):
+            try:
+                self.driver = webdriver.Remote(
+                    command_executor=command_executor_url,
+                    options=options
+                )
+                WEBDRIVER_CONNECT_ATTEMPTS.inc(outcome='ok')
+                logging.info(f"WebDriver conectado exitosamente para la ejecución {self.test_execution_id}")
+                break
+            except Exception as e:
+                WEBDRIVER_CONNECT_ATTEMPTS.inc(outcome='error')
+                logging.warning(f"Intento fallido: {str(e)}")
+                if attempt == max_attempts - 1:
+                    self.docker_service.destroy_container(str(self.container.name))
+                    raise Exception(f"No se pudo conectar a Selenium tras {max_attempts} intentos: {str(e)}")
+                time.sleep(5)
+
     def _cleanup(self):
         """Limpia los recursos: cierra el driver y destruye el contenedor."""
         logging.info(f"Iniciando limpieza para {self.test_execution_id}")
+        logging.info(f"Localizadores de {self.test_execution_id}: {self.locator_resolver.stats}")
+        logging.info(f"Caché de expresiones de extracción: {extractor.cache_info()}")
+        if self.pool_entry:
+            # Modo reutilización: el conjunto limpia el navegador o destruye el contenedor si no está sano.
+            # Un fallo aquí no debe impedir publicar el resultado de la ejecución.
+            try:
+                get_container_pool().release(self.pool_entry, self.config.get('name'))
+            except Exception as e:
+                logging.error(f"Error al devolver el contenedor de {self.test_execution_id} al conjunto: {e}",
+                              exc_info=True)
+            return
+
         if self.driver:
             try:
                 self.driver.quit()
@@ -147,23 +258,43 @@ class TestExecutorService:
         if self.container:
             self.docker_service.destroy_container(self.container.name)
 
-    def _get_script_globals(self) -> dict:
+    def _get_driver(self):
+        """
+        Devuelve el WebDriver, esperando a que termine el aprovisionamiento si aún está en curso.
+        Así el before_script puede arrancar antes de que el navegador esté listo.
+        """
+        if self.environment_future is not None:
+            self.environment_future.result()
+        if self.driver is None:
+            raise Exception("WebDriver no disponible: la ejecución no es web o el entorno falló")
+        return self.driver
+
+    def _compile_script(self, script: str):
+        """Compila el script una sola vez; si tiene errores se devuelve el texto para que cada caso falle como antes."""
+        try:
+            return compile(script, f'<script {self.test_execution_id}>', 'exec')
+        except SyntaxError as e:
+            logging.error(f"El script de la ejecución {self.test_execution_id} no compila: {e}")
+            return script
+
+    def _get_script_globals(self, case_execution_id: str = None) -> dict:
         """
         Crea un diccionario de todas las funciones que el script de prueba puede llamar.
         Cada función "recuerda" el 'self' de esta instancia, dándole acceso a self.driver.
         ¡Esta es la clave para que los scripts no necesiten cambios!
+
+        case_execution_id es el caso al que se atribuyen la evidencia y los envíos: se fija al
+        crear las primitivas porque case_execution_data lo comparten los hilos de los casos.
         """
         def get(url):
-            self.driver.get(url)
+            self.page_timer.navigate(self._get_driver(), url)
+            self.locator_resolver.set_page(url)
+            if self.web_vitals:
+                self.web_vitals.capture(self.driver)
 
         def getElement(element):
-            for by in self.BY_MAP:
-                try:
-                    return self.driver.find_element(by, element)
-                except Exception as e:
-                    exeption = e
-                    #log
-            raise Exception("Element no reachable")
+            # Admite el prefijo explícito 'estrategia:selector' (p. ej. 'id:login', 'css:.btn')
+            return self.locator_resolver.find(self._get_driver(), element)
 
         def assertion(condition, message):
             if not condition:
@@ -173,61 +304,7 @@ class TestExecutorService:
                 raise AssertionError(message)
         
         def writeEvidence(fileName, content, fileType):
-            query = "SELECT * FROM test_executor.evidence_file as e WHERE e.file_name = '" + fileName + \
-                ".txt' and e.test_execution_id = '" + \
-                    self.test_execution_data['test_execution_id'] + "'"
-            if fileType == 1:
-                query = "SELECT * FROM test_executor.evidence_file as e WHERE e.file_name = '" + fileName + \
-                    ".txt' and e.test_execution_id = '" + \
-                        self.test_execution_data['test_execution_id'] + "'"
-            else:
-                query = "SELECT * FROM test_executor.evidence_file as e WHERE e.file_name = '" + fileName + ".txt' and e.test_execution_id = '" + \
-                    self.test_execution_data['test_execution_id'] + "' AND e.case_execution_id = '" + \
-                        self.case_execution_data['case_execution_id'] + "'"
-            with self.engine.connect() as connection:
-                result = connection.execute(text(query)).first()
-            if result:
-                evidence_file_id = result.evidence_id
-                with self.engine.connect() as connection:
-                    try:
-                        trans = connection.begin()
-                        date = datetime.today()
-                        query = "INSERT INTO test_executor.case_evidence (evidence_id,evidence_text, creation_date) VALUES ('" + \
-                            evidence_file_id+"','"+content+"', '"+str(date)+"');"
-                        connection.execute(text(query))
-                        trans.commit() 
-                    except Exception as e:
-                            logging.error(f"An error occurred: {e}")
-                            trans.rollback()      
-            else:
-                evidence_file_id = utils.generateRandomId("ef")
-                file_name = fileName + '.txt'
-                if fileType == 1:
-                    evidence_uri = os.getenv('EVIDENCE_FILE_DIR')+ '/' + \
-                        self.test_execution_data['test_execution_id'] + \
-                        '/' + fileName + '.txt'
-                else:
-                    evidence_uri = os.getenv('EVIDENCE_FILE_DIR')+ '/' + self.test_execution_data['test_execution_id'] + \
-                        '/' + \
-                        self.case_execution_data['case_execution_id'] + \
-                        '/' + fileName + '.txt'
-                test_execution_id = self.test_execution_data['test_execution_id']
-                with self.engine.connect() as connection:
-                    try:
-                        trans = connection.begin()
-                        query = "INSERT INTO test_executor.evidence_file (evidence_id,file_name,evidence_uri, type_id, test_execution_id, case_execution_id) VALUES ('" + \
-                            evidence_file_id+"','"+file_name+"','"+evidence_uri+"'," + \
-                                str(fileType)+",'"+test_execution_id+"','" + \
-                            self.case_execution_data['case_execution_id']+"');"
-                        connection.execute(text(query))
-                        date = datetime.today()
-                        query = "INSERT INTO test_executor.case_evidence (evidence_id,evidence_text, creation_date) VALUES ('" + \
-                            evidence_file_id+"','"+content+"', '"+str(date)+"');"
-                        connection.execute(text(query))
-                        trans.commit()
-                    except Exception as e:
-                            logging.error(f"An error occurred: {e}")
-                            trans.rollback()    
+            self.write_evidence(fileName, content, fileType, case_execution_id)
 
         def writeGlobalEvidence(fileName, content):
             logging.info('writing global evidence: ' + fileName)
@@ -241,26 +318,78 @@ class TestExecutorService:
             logging.info('sleeping for ' + str(s) + ' seconds')
             time.sleep(s)
         
-        def consumeService(request):
+        def consumeService(request, cache=None):
             #print(type(request))
             logging.info('calling some service ' + request['url'])
-            json_request = json.dumps(request)
-            r = requests.post(
-                os.getenv('REST_API_URL'), data=json_request)
-            return self.responseMapper(r.json(), request)
+            return self.consume_service(request, cache=cache)
+
+        def consumeServices(service_requests, timeout=None, raise_errors=False):
+            """
+            Llama a varios servicios a la vez y devuelve sus respuestas en el mismo orden.
+            Con raise_errors=False una llamada fallida no aborta el resto: su respuesta trae
+            'status_code' None y el motivo en 'error'.
+            El lote entero tiene un plazo de FANOUT_TIMEOUT segundos (timeout limita cada llamada):
+            las que no terminan a tiempo se cancelan y se devuelven con error de timeout.
+            """
+            logging.info(f'calling {len(service_requests)} services concurrently')
+            deadline = time.monotonic() + float(os.getenv('FANOUT_TIMEOUT', '300'))
+            futures = [self.fanout_executor.submit(self.consume_service, request, timeout)
+                       for request in service_requests]
+            responses = []
+            for request, future in zip(service_requests, futures):
+                try:
+                    responses.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+                except FutureTimeoutError:
+                    # Si aún estaba en cola no llega a ejecutarse; si ya corre, su resultado se descarta
+                    future.cancel()
+                    if raise_errors:
+                        raise TimeoutError(f"Service call to {request.get('url')} timed out")
+                    logging.warning(f"Service call to {request.get('url')} timed out")
+                    responses.append({'status_code': None, 'headers': {}, 'body': None, 'error': 'timeout'})
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    logging.warning(f"Service call to {request.get('url')} failed: {e}")
+                    responses.append({'status_code': None, 'headers': {}, 'body': None, 'error': str(e)})
+            return responses
         
-        def executeQuery(dbconfig):
+        def executeQuery(dbconfig, cache=None):
+            """
+            Devuelve el resultado completo de la consulta como lista. Sobre un datasource registrado
+            las filas se cargan en memoria (hasta 'max_rows'); para resultados grandes, streamQuery.
+            """
             logging.info('executing some query ' + dbconfig['query'])
-            json_request = json.dumps(dbconfig)
-            r = requests.post(
-                os.getenv('DATABASE_API_URL'), data=json_request)
-            return r.json()
+            def load():
+                if dbconfig.get('datasource'):
+                    # Datasource registrado: consulta directa por el pool, sin pasar por DATABASE_API_URL
+                    return list(self._stream_query(dbconfig, chunks=False))
+                json_request = json.dumps(dbconfig)
+                r = self._post('database', json_request)
+                return r.json()
+            if cache is None:
+                # Solo las consultas de lectura al servicio de base de datos se memoizan automáticamente;
+                # las de un datasource no (su resultado puede ser grande y cada acierto lo copiaría entero)
+                cache = (self.memoize and not dbconfig.get('datasource')
+                         and dbconfig['query'].lstrip().lower().startswith(('select', 'show', 'explain')))
+            return self._memoized('executeQuery', dbconfig, load, cache)
         
+        def streamQuery(dbconfig, chunks=False):
+            """
+            Itera el resultado de una consulta sobre un datasource registrado sin cargarlo entero:
+            fila a fila (dict) o, con chunks=True, en listas de dbconfig['chunk_size'] filas.
+            dbconfig: {'datasource', 'query', 'params' (opcional), 'chunk_size' (opcional), 'max_rows' (opcional)}
+            """
+            logging.info(f"streaming query on datasource {dbconfig.get('datasource')}")
+            return self._stream_query(dbconfig, chunks)
+
         def sendJmsQueue(jmsconfig):
             logging.info('sending some queue to: ' + jmsconfig['engine'])
+            if self.outbox:
+                # Se entrega en segundo plano; el resultado queda en la evidencia de la ejecución
+                self.outbox.enqueue(KIND_JMS, jmsconfig, case_execution_id)
+                return None
             json_request = json.dumps(jmsconfig)
-            r = requests.post(
-                os.getenv('JMS_API_URL'), data=json_request)
+            r = self._post('jms', json_request)
             logging.info('sended queue: ' + str(r))
             return r.content
         
@@ -284,49 +413,55 @@ class TestExecutorService:
                 "template_id": template_id,
                 "files": file_array
             }
+            if self.outbox:
+                self.outbox.enqueue(KIND_MAIL, message, case_execution_id)
+                logging.info('Mail queued')
+                return
             req = json.dumps(message)
-            r = requests.post(
-                os.getenv('MAIL_API_URL'), data=req)
+            r = self._post('mail', req)
             logging.info('Mail sended')
 
-        def getGsheet(request):
+        def getGsheet(request, cache=None):
             print(type(request))
             logging.info('calling some gsheet ' + request['file_id'])
-            json_request = json.dumps(request)
-            r = requests.post(
-                os.getenv("GDRIVE_API_URL"), data=json_request)
-            return self.defaultResponseMapper(r.json(), request)
+            def load():
+                json_request = json.dumps(request)
+                r = self._post('gdrive', json_request)
+                return r.json()
+            payload = self._memoized('getGsheet', request, load, self.memoize if cache is None else cache)
+            return self.defaultResponseMapper(payload, request)
         
-        def waitElement(element, timeout):
-            #log
-            timeout_date = datetime.now() + timedelta(seconds=timeout)
-            date = datetime.now()
+        def extract(source, expressions, all_matches=False, namespaces=None):
+            # Expresiones XPath/CSS compiladas una vez y cacheadas; un dict {campo: expresión} extrae varios campos
+            return extractor.extract(source, expressions, all_matches=all_matches, namespaces=namespaces)
 
-            while timeout_date > date:
-                try:
-                    return getElement(element)
-                except Exception as e:
-                    exeption = e
-                    date = datetime.now()
-                    #log
-            raise Exception("TIMEOUT - Element no reachable")
+        def waitElement(element, timeout, interval=None, mode=None):
+            # mode: 'poll' (por defecto) sondea con backoff; 'js' espera en el navegador (MutationObserver)
+            return self.element_waiter.wait(self._get_driver(), element, timeout, interval=interval, mode=mode)
         
         def focus(element):
             #log
             web_element = getElement(element)
             location = web_element.location
-            self.driver.execute_script("window.scrollTo(0, "+ str(location['y']) +")")
+            self._get_driver().execute_script("window.scrollTo(0, "+ str(location['y']) +")")
 
         def click(element):
             #log
             web_element = getElement(element)
             web_element.click()
+            if self.web_vitals:
+                # Solo registra algo si el click cargó otro documento
+                self.web_vitals.capture(self.driver)
 
         def tick(element, color):
             #log
             web_element = getElement(element)
+            if not self.performance['highlight']:
+                # Sin evidencia visual no hace falta resaltar ni bloquear el caso 0.3s
+                self.page_timer.skip_highlight(.3)
+                return
             def apply_style(s):
-                self.driver.execute_script("arguments[0].setAttribute('style', arguments[1]);",
+                self._get_driver().execute_script("arguments[0].setAttribute('style', arguments[1]);",
                                     web_element, s)
             original_style = web_element.get_attribute('style')
             apply_style("border: 2px solid "+ color +";")
@@ -353,6 +488,25 @@ class TestExecutorService:
             web_element = getElement(element)
             web_element.clear()
 
+        # --- Primitivas por lotes: una sola llamada a WebDriver para muchos elementos ---
+        def getElements(elements):
+            return self.browser_batch.find_all(self._get_driver(), elements)
+
+        def getTexts(elements):
+            return self.browser_batch.get_texts(self._get_driver(), elements)
+
+        def getAttributes(elements, attribute):
+            return self.browser_batch.get_attributes(self._get_driver(), elements, attribute)
+
+        def fillForm(values, native=False):
+            # values: {selector: valor}
+            self.browser_batch.fill(self._get_driver(), values, native)
+
+        def clickAll(elements, native=True):
+            self.browser_batch.click_all(self._get_driver(), elements, native)
+            if self.web_vitals:
+                self.web_vitals.capture(self.driver)
+
         def getCredential(name):
             """
             Obtiene el valor de una credencial por su nombre.
@@ -366,7 +520,7 @@ class TestExecutorService:
             logging.info(f'Getting credential: {name}')
             return self.credential_service.get_credential(name)
         
-        return {
+        script_globals = {
             "get": get,
             "click": click,
             "input": input_text, # Renombrada para evitar conflicto con la función built-in 'input'
@@ -376,10 +530,13 @@ class TestExecutorService:
             "writeEvidence": writeEvidence,
             "sleep": sleep,
             "consumeService": consumeService,
+            "consumeServices": consumeServices,
             "executeQuery": executeQuery,
+            "streamQuery": streamQuery,
             "sendJmsQueue": sendJmsQueue,
             "sendMail": sendMail,
             "getGsheet": getGsheet,
+            "extract": extract,
             "getElement": getElement,
             "waitElement": waitElement,
             "focus": focus,
@@ -388,58 +545,174 @@ class TestExecutorService:
             "getAttribute": getAttribute,
             "clear": clear,
             "getCredential": getCredential,
+            "getElements": getElements,
+            "getTexts": getTexts,
+            "getAttributes": getAttributes,
+            "fillForm": fillForm,
+            "clickAll": clickAll,
 
             # Asegúrate de pasar el resto de funciones necesarias
             "caseData": None, # Placeholder que se llenará por cada caso
             "__builtins__": __builtins__ # Permite usar funciones estándar de Python
         }
+        for name, primitive in script_globals.items():
+            if callable(primitive) and not name.startswith('__'):
+                script_globals[name] = self._timed_primitive(name, primitive)
+        return script_globals
+
+    def write_evidence(self, fileName, content, fileType, case_execution_id: str = None):
+        """
+        Registra la evidencia (1 global, 2 del caso) y su texto en la base de datos. Los valores
+        van como parámetros de la consulta: el texto se guarda tal cual, con comillas incluidas.
+        """
+        test_execution_id = self.test_execution_data['test_execution_id']
+        if case_execution_id is None:
+            case_execution_id = self.case_execution_data['case_execution_id']
+        params = {'file_name': fileName + '.txt', 'test_execution_id': test_execution_id,
+                  'case_execution_id': case_execution_id}
+        query = "SELECT * FROM test_executor.evidence_file as e WHERE e.file_name = :file_name " \
+            "and e.test_execution_id = :test_execution_id"
+        if fileType != 1:
+            query += " AND e.case_execution_id = :case_execution_id"
+        with self.engine.connect() as connection:
+            result = connection.execute(text(query), params).first()
+        insert_evidence = "INSERT INTO test_executor.case_evidence (evidence_id,evidence_text, creation_date) " \
+            "VALUES (:evidence_id, :evidence_text, :creation_date)"
+        if result:
+            evidence_file_id = result.evidence_id
+            with self.engine.connect() as connection:
+                try:
+                    trans = connection.begin()
+                    connection.execute(text(insert_evidence), {'evidence_id': evidence_file_id, 'evidence_text': content,
+                                                               'creation_date': str(datetime.today())})
+                    trans.commit()
+                except Exception as e:
+                    logging.error(f"An error occurred: {e}")
+                    trans.rollback()
+        else:
+            evidence_file_id = utils.generateRandomId("ef")
+            if fileType == 1:
+                evidence_uri = os.getenv('EVIDENCE_FILE_DIR') + '/' + test_execution_id + '/' + fileName + '.txt'
+            else:
+                evidence_uri = os.getenv('EVIDENCE_FILE_DIR') + '/' + test_execution_id + '/' + \
+                    case_execution_id + '/' + fileName + '.txt'
+            with self.engine.connect() as connection:
+                try:
+                    trans = connection.begin()
+                    query = "INSERT INTO test_executor.evidence_file (evidence_id,file_name,evidence_uri, type_id, " \
+                        "test_execution_id, case_execution_id) VALUES (:evidence_id, :file_name, :evidence_uri, " \
+                        ":type_id, :test_execution_id, :case_execution_id)"
+                    connection.execute(text(query), dict(params, evidence_id=evidence_file_id,
+                                                         evidence_uri=evidence_uri, type_id=fileType))
+                    connection.execute(text(insert_evidence), {'evidence_id': evidence_file_id, 'evidence_text': content,
+                                                               'creation_date': str(datetime.today())})
+                    trans.commit()
+                except Exception as e:
+                    logging.error(f"An error occurred: {e}")
+                    trans.rollback()
+
+    def _timed_primitive(self, name: str, primitive):
+        """
+        Envuelve una primitiva para registrar su duración por nombre y resultado y, si el caso
+        se está trazando, su span en la línea de tiempo (con el primer argumento si es texto).
+        """
+        @functools.wraps(primitive)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            span_args = {'target': args[0][:120]} if args and isinstance(args[0], str) else {}
+            try:
+                with self.tracer.span(name, 'primitive', **span_args):
+                    result = primitive(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                SCRIPT_PRIMITIVE_SECONDS.observe(elapsed, primitive=name, outcome=outcome)
+                self.latency.record_primitive(name, elapsed)
+        return timed
 
     def _execute_case(self, script, case_data_row, executor):
         """Ejecuta un único caso de prueba."""
         _, case_data = case_data_row
         logging.info(f"Ejecutando caso con datos: {case_data.to_dict()}")
+        case_start = time.perf_counter()
+        case_status = 'failed'
+        case_execution_id = utils.generateRandomId("ce")
+        case_results_dir = None
+        self.tracer.start_case(case_execution_id)
 
         try:
-            with self.engine.connect() as connection:
-                query = "SELECT * FROM test_executor.stop_execution as e WHERE e.execution_id = '" + self.test_execution_data['test_execution_id'] + "'"
-                result = connection.execute(text(query)).first()
-                #print('-------------aqui---------' + str(result))
-                if result:
-                    self.test_execution_data['status'] = "stopped"
-                    executor.shutdown(wait=False, cancel_futures=True)
+            with self.tracer.span('stop_check'):
+                with self.engine.connect() as connection:
+                    query = "SELECT * FROM test_executor.stop_execution as e WHERE e.execution_id = '" + self.test_execution_data['test_execution_id'] + "'"
+                    result = connection.execute(text(query)).first()
+                    #print('-------------aqui---------' + str(result))
+                    if result:
+                        self.test_execution_data['status'] = "stopped"
+                        executor.shutdown(wait=False, cancel_futures=True)
             
-            self.case_execution_data['case_execution_id'] = utils.generateRandomId("ce")
+            self.case_execution_data['case_execution_id'] = case_execution_id
             self.case_execution_data['test_execution_id'] = self.test_execution_data['test_execution_id']
 
-            script_globals = self._get_script_globals()
+            script_globals = self._get_script_globals(case_execution_id)
             script_globals['caseData'] = case_data # Inyecta los datos del caso actual
 
-            os.mkdir(os.getenv('EVIDENCE_FILE_DIR')+ '/' + self.test_execution_data['test_execution_id'] +
-                    '/' + self.case_execution_data['case_execution_id'] + '/')
-            self.case_execution_data['case_results_dir'] = os.getenv('EVIDENCE_FILE_DIR')+ '/' + \
+            with self.tracer.span('mkdir'):
+                os.mkdir(os.getenv('EVIDENCE_FILE_DIR')+ '/' + self.test_execution_data['test_execution_id'] +
+                        '/' + case_execution_id + '/')
+            case_results_dir = os.getenv('EVIDENCE_FILE_DIR')+ '/' + \
                 self.test_execution_data['test_execution_id'] + '/' + \
-                self.case_execution_data['case_execution_id'] + '/'
+                case_execution_id + '/'
+            self.case_execution_data['case_results_dir'] = case_results_dir
             
             self.case_execution_data['status'] = "Succes"
             
             # exec() ejecutará el script usando las funciones personalizadas que tienen acceso a 'self'
-            exec(script, script_globals)
+            self.page_timer.start_case()
+            with self.tracer.span('exec'):
+                exec(script, script_globals)
+            case_status = 'success'
         except Exception as e:
             logging.error(f"Falló la ejecución del caso para {self.test_execution_id}: {e}", exc_info=True)
             self.test_execution_data['status'] = 'failed'
             # Aquí tu lógica para registrar el fallo del caso
+        finally:
+            self.page_timer.end_case()
+            case_seconds = time.perf_counter() - case_start
+            CASE_DURATION_SECONDS.observe(case_seconds, status=case_status)
+            self.latency.record_case(case_seconds)
         
-        self.sendqueue("tasks.insert_case_execution", self.case_execution_data)
+        try:
+            with self.tracer.span('publish'):
+                self.sendqueue("tasks.insert_case_execution", self.case_execution_data)
+        finally:
+            self.tracer.finish_case(case_results_dir)
     
     def run(self):
         """
         El método principal que orquesta toda la ejecución de la prueba.
         Este es el 'target' para el hilo.
         """
+        start_time = time.perf_counter()
+        ACTIVE_EXECUTIONS.inc()
+        provisioner = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"Provision-{self.test_execution_id}")
         try:
-            self._create_environment()
-
-            script = self.config['script']
+            # El contenedor y el WebDriver se aprovisionan (y las credenciales se descifran) en paralelo
+            # con la lectura de casos, la compilación del script y el before_script (cuyas primitivas
+            # web esperan al navegador).
+            if self.config.get('web'):
+                def provision():
+                    provision_start = time.perf_counter()
+                    self._create_environment()
+                    return time.perf_counter() - provision_start
+                self.environment_future = provisioner.submit(provision)
+            if os.getenv('CREDENTIAL_EAGER_DECRYPT', 'true').lower() == 'true':
+                provisioner.submit(self.credential_service.preload,
+                                   int(os.getenv('CREDENTIAL_DECRYPT_WORKERS', '4')))
+
+            preparation_start = time.perf_counter()
+            script = self._compile_script(self.config['script'])
             test_cases_file_uri = os.getenv('TEST_CASES_DIR') + self.getCase(self.config['test_cases_file'])
             # Evaluar scripts
             data = pandas.read_csv(test_cases_file_uri)
@@ -454,13 +727,51 @@ class TestExecutorService:
             if self.config.get('before_script'):
                 logging.info("Ejecutando before_script...")
                 self.executeBeforeOrAfter(self.config['before_script'])
+            preparation_seconds = time.perf_counter() - preparation_start
+
+            # Los casos arrancan cuando están listos tanto los datos como el navegador
+            if self.environment_future is not None:
+                provision_seconds = self.environment_future.result()
+                ready_seconds = time.perf_counter() - start_time
+                saved_seconds = max(0.0, provision_seconds + preparation_seconds - ready_seconds)
+                self.test_execution_data['startup'] = {
+                    'provision_seconds': round(provision_seconds, 3),
+                    'preparation_seconds': round(preparation_seconds, 3),
+                    'saved_seconds': round(saved_seconds, 3),
+                }
+                logging.info(f"Arranque de {self.test_execution_id}: {self.test_execution_data['startup']}")
 
             # Usar ThreadPoolExecutor para ejecutar los casos en paralelo
+            cases_start = time.perf_counter()
             with ThreadPoolExecutor(max_workers=self.config.get('threads', 1)) as executor:
                 futures = [executor.submit(self._execute_case, script, row, executor) for row in data.iterrows()]
                 # Esperar a que todos los casos terminen
                 for future in futures:
                     future.result() 
+            cases_seconds = time.perf_counter() - cases_start
+
+            # Estadísticas de latencia (min, media, p50, p90, p99, max y casos por segundo)
+            try:
+                self.test_execution_data['latency'] = self.latency.summary(cases_seconds)
+                self.write_evidence(self.test_execution_id + '_latency',
+                                    format_summary(self.test_execution_data['latency']), 1)
+            except Exception as e:
+                logging.warning(f"No se pudo registrar el resumen de latencias de {self.test_execution_id}: {e}")
+
+            if self.config.get('web'):
+                self.test_execution_data['page_load'] = self.page_timer.report()
+                logging.info(f"Tiempo de página de {self.test_execution_id}: {self.test_execution_data['page_load']}")
+            if self.web_vitals and self.web_vitals.captures:
+                # Percentiles por URL de Navigation Timing, FCP/LCP/CLS y recursos descargados
+                self.test_execution_data['web_vitals'] = self.web_vitals.summary()
+
+            if self.rate_limiter.enabled:
+                self.test_execution_data['throttling'] = self.rate_limiter.summary()
+                logging.info(f"Espera por límites de {self.test_execution_id}: {self.test_execution_data['throttling']}")
+
+            if self.memoize or self.memo_stats[MISS]:
+                self.test_execution_data['memoization'] = self.memoization_summary()
+                logging.info(f"Memoización de {self.test_execution_id}: {self.test_execution_data['memoization']}")
 
             self.generateFiles(1)
 
@@ -473,17 +784,85 @@ class TestExecutorService:
             logging.error(f"Error catastrófico en la ejecución {self.test_execution_id}: {e}", exc_info=True)
             self.test_execution_data['status'] = 'failed'
         finally:
-            self._cleanup()
-            self.sendqueue("tasks.update_test_execution", self.test_execution_data)
+            # Si la preparación falló, se espera al aprovisionamiento para no dejar contenedores huérfanos
+            provisioner.shutdown(wait=True)
+            self.fanout_executor.shutdown(wait=False)
+            try:
+                self._cleanup()
+                self.credential_service.clear()
+                # Los envíos pendientes se entregan antes de publicar el resultado final
+                self._flush_outbox()
+                self.sendqueue("tasks.update_test_execution", self.test_execution_data)
+            finally:
+                ACTIVE_EXECUTIONS.dec()
             logging.info(f"Ejecución {self.test_execution_id} finalizada con estado: {self.test_execution_data['status']}")
 
+    def consume_service(self, request: dict, timeout: float = None, cache: bool = None):
+        """
+        Envía la petición al REST API de integración y mapea la respuesta.
+        Con memoización activa, las peticiones GET/HEAD se sirven desde la caché.
+        """
+        def load():
+            kwargs = {'timeout': timeout} if timeout is not None else {}
+            r = self._post('rest', json.dumps(request), url_host(request.get('url')), **kwargs)
+            return r.json()
+        if cache is None:
+            cache = self.memoize and str(request.get('method', '')).upper() in ('GET', 'HEAD')
+        return self.responseMapper(self._memoized('consumeService', request, load, cache), request)
+
+    @staticmethod
+    def _stream_query(dbconfig: dict, chunks: bool):
+        registry = get_datasource_registry()
+        kwargs = {'chunk_size': dbconfig.get('chunk_size'), 'max_rows': dbconfig.get('max_rows')}
+        if chunks:
+            return registry.stream(dbconfig['datasource'], dbconfig['query'], dbconfig.get('params'), **kwargs)
+        return registry.rows(dbconfig['datasource'], dbconfig['query'], dbconfig.get('params'), **kwargs)
+
+    def _post(self, upstream: str, data, target_host: str = None, **kwargs):
+        """POST al servicio de integración respetando los límites del host destino y del servicio."""
+        with self.rate_limiter.limit(target_host, upstream):
+            return self.http.post(upstream, data=data, **kwargs)
+
+    def _memoized(self, namespace: str, request, loader, enabled: bool):
+        """Ejecuta loader() o lo sirve desde la caché de memoización, contando aciertos por ejecución."""
+        if not enabled:
+            return loader()
+        value, outcome = self.memo_cache.get_or_load(canonical_key(namespace, request), loader)
+        with self.memo_lock:
+            self.memo_stats[outcome] += 1
+        return value
+
+    def memoization_summary(self) -> dict:
+        with self.memo_lock:
+            stats = dict(self.memo_stats)
+        total = sum(stats.values())
+        stats['calls'] = total
+        stats['hit_rate'] = round((stats[HIT] + stats[COALESCED]) / total, 3) if total else None
+        stats['evictions'] = self.memo_cache.evictions
+        return stats
+
+    def _flush_outbox(self):
+        """Vacía el buzón de salida y deja el resultado de cada entrega como evidencia global."""
+        if self.outbox is None:
+            return
+        try:
+            deliveries = self.outbox.flush(float(os.getenv('OUTBOX_FLUSH_TIMEOUT', '120')))
+            self.test_execution_data['outbox'] = self.outbox.summary()
+            logging.info(f"Buzón de salida de {self.test_execution_id}: {self.test_execution_data['outbox']}")
+            if deliveries:
+                self.write_evidence(self.test_execution_id + '_outbox', format_deliveries(deliveries), 1)
+                self.generateFiles(1)
+        except Exception as e:
+            logging.error(f"Error al vaciar el buzón de salida de {self.test_execution_id}: {e}", exc_info=True)
+
     def responseMapper(self, response, request):
         #print("response: " + str(response['status_code']))
         #print("response: " + str(response['headers']))
+        # HTML y XML se parsean en el primer acceso al cuerpo (ver LazyBody)
         if 'html' in response['headers']['Content-Type'] and request['service_type'] == 'SCRAPING':
-            body = BeautifulSoup(response['body'], 'html.parser')
+            body = LazyBody(response['body'], KIND_HTML)
         elif 'xml' in response['headers']['Content-Type']:
-            body = minidom.parseString(response['body'])
+            body = LazyBody(response['body'], KIND_XML)
         else:
             body = response['body']
         #print('typo de body es: ' + str(type(body)))
@@ -500,18 +879,24 @@ class TestExecutorService:
         return response
     
     def sendqueue(self, queueName, message):
-        params = pika.URLParameters(os.getenv('RABBIT_SERVER_URL'))
-        params.socket_timeout = 5
-
-        connection = pika.BlockingConnection(params)  # Connect to CloudAMQP
-        channel = connection.channel()  # start a channel
-        #channel.queue_declare(queue=queueName)  # Declare a queue
-        # send a message
-
-        channel.basic_publish(
-            exchange='', routing_key=queueName, body=str(message))
-        #print("[x] Message sent to consumer")
-        connection.close()
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            params = pika.URLParameters(os.getenv('RABBIT_SERVER_URL'))
+            params.socket_timeout = 5
+
+            connection = pika.BlockingConnection(params)  # Connect to CloudAMQP
+            channel = connection.channel()  # start a channel
+            #channel.queue_declare(queue=queueName)  # Declare a queue
+            # send a message
+
+            channel.basic_publish(
+                exchange='', routing_key=queueName, body=str(message))
+            #print("[x] Message sent to consumer")
+            connection.close()
+            outcome = 'ok'
+        finally:
+            RABBITMQ_PUBLISH_SECONDS.observe(time.perf_counter() - start, queue=queueName, outcome=outcome)
 
     def generateFiles(self, fileType):
         logging.info('Generating evidence files for ' + str(fileType))
@@ -546,25 +931,35 @@ class TestExecutorService:
         return list_dir[len(list_dir) - 1]
 
     def executeBeforeOrAfter(self, script: str):
+        case_execution_id = utils.generateRandomId("ce")
+        self.tracer.start_case(case_execution_id)
         try:
-            self.case_execution_data['case_execution_id'] = utils.generateRandomId("ce")
+            self.case_execution_data['case_execution_id'] = case_execution_id
             self.case_execution_data['test_execution_id'] = self.test_execution_data['test_execution_id']
 
-            os.mkdir(os.getenv('EVIDENCE_FILE_DIR')+ '/' + self.test_execution_data['test_execution_id'] +
-                    '/' + self.case_execution_data['case_execution_id'] + '/')
+            with self.tracer.span('mkdir'):
+                os.mkdir(os.getenv('EVIDENCE_FILE_DIR')+ '/' + self.test_execution_data['test_execution_id'] +
+                        '/' + self.case_execution_data['case_execution_id'] + '/')
             self.case_execution_data['case_results_dir'] = os.getenv('EVIDENCE_FILE_DIR')+ '/' + \
                 self.test_execution_data['test_execution_id'] + '/' + \
                 self.case_execution_data['case_execution_id'] + '/'
 
             self.case_execution_data['status'] = "Succes"
 
-            exec(script, self._get_script_globals())
+            with self.tracer.span('exec'):
+                exec(script, self._get_script_globals(case_execution_id))
         except Exception as e:
             self.case_execution_data['status'] = "Failed"
             self.test_execution_data['status'] = "failed"
-            self.writeGlobalEvidence(
-                self.test_execution_data['test_execution_id'] + "_failed_cases",  str(e.with_traceback))
-        # crear archivos de evidencias unitarios
-        self.generateFiles(2)
-        # enviar datos del caso de prueba
-        self.sendqueue("tasks.insert_case_execution", self.case_execution_data)
\ No newline at end of file
+            self.write_evidence(
+                self.test_execution_data['test_execution_id'] + "_failed_cases",  str(e.with_traceback), 1)
+        try:
+            # crear archivos de evidencias unitarios
+            with self.tracer.span('evidence'):
+                self.generateFiles(2)
+            # enviar datos del caso de prueba
+            with self.tracer.span('publish'):
+                self.sendqueue("tasks.insert_case_execution", self.case_execution_data)
+        finally:
+            self.tracer.finish_case(os.getenv('EVIDENCE_FILE_DIR') + '/' + self.test_execution_data['test_execution_id'] +
+                                    '/' + case_execution_id + '/')
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+TRACE_FILE_NAME = 'trace.json'
+
+
+class CaseTrace:
+    """
+    Línea de tiempo de un caso en formato Chrome trace-event (eventos 'X' completos), que
+    abren chrome://tracing, Perfetto o speedscope como gráfico de llama.
+    """
+
+    def __init__(self, case_id: str, origin_ns: int, max_events: int):
+        self.case_id = case_id
+        self.origin_ns = origin_ns
+        self.max_events = max_events
+        self.events: List[dict] = []
+        self.dropped = 0
+        self._pid = os.getpid()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        start = time.perf_counter_ns()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+            else:
+                if error:
+                    args['error'] = error
+                self.events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': self._pid,
+                                    'tid': threading.get_ident(), 'ts': (start - self.origin_ns) / 1000,
+                                    'dur': (end - start) / 1000, 'args': args})
+
+    def write(self, directory: str) -> str:
+        """Escribe la traza junto a la evidencia del caso y devuelve la ruta del fichero."""
+        thread = threading.current_thread()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'args': {'name': f'case {self.case_id}'}},
+                    {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread.ident,
+                     'args': {'name': thread.name}}]
+        path = os.path.join(directory, TRACE_FILE_NAME)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms',
+                       'otherData': {'case_execution_id': self.case_id, 'dropped_events': self.dropped}}, file)
+        return path
+
+
+class ExecutionTracer:
+    """
+    Decide qué casos de una ejecución se trazan (sample_rate entre 0 y 1) y mantiene la
+    traza del caso en curso por hilo, para que las primitivas la encuentren sin parámetros.
+    Sin traza activa, span() devuelve un contexto vacío: el coste es una lectura de atributo.
+    """
+
+    def __init__(self, sample_rate: float):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.max_events = int(os.getenv('TRACE_MAX_EVENTS', '10000'))
+        self.origin_ns = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.traced_cases = 0
+
+    def start_case(self, case_id: str) -> Optional[CaseTrace]:
+        trace = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            trace = CaseTrace(case_id, self.origin_ns, self.max_events)
+            with self._lock:
+                self.traced_cases += 1
+        self._local.trace = trace
+        return trace
+
+    def span(self, name: str, category: str = 'phase', **args):
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return nullcontext()
+        return trace.span(name, category, **args)
+
+    def finish_case(self, directory: Optional[str]):
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        if trace is None or not directory:
+            return
+        try:
+            trace.write(directory)
+        except OSError as e:
+            logging.warning(f"Could not write trace of case {trace.case_id}: {e}")
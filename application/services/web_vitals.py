@@ -0,0 +1,111 @@
+import logging
+import threading
+from array import array
+from typing import Dict
+from urllib.parse import urlparse
+from ..lifecycle import lazy_import
+from .latency_stats import PERCENTILES
+
+np = lazy_import('numpy')
+
+# Navigation Timing, Paint/LCP/CLS y un resumen de Resource Timing del documento actual,
+# en una sola llamada. takeRecords() entrega de inmediato las entradas con buffered: true,
+# sin esperar al callback asíncrono del observer. Tiempos en ms desde el inicio de la navegación.
+_CAPTURE_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+if (!nav) { return null; }
+function buffered(type) {
+  try {
+    var observer = new PerformanceObserver(function () {});
+    observer.observe({type: type, buffered: true});
+    var records = observer.takeRecords();
+    observer.disconnect();
+    return records;
+  } catch (e) { return []; }
+}
+var lcp = buffered('largest-contentful-paint');
+var cls = 0;
+buffered('layout-shift').forEach(function (entry) { if (!entry.hadRecentInput) { cls += entry.value; } });
+var fcp = performance.getEntriesByName('first-contentful-paint')[0];
+var resources = performance.getEntriesByType('resource');
+var transfer = 0;
+resources.forEach(function (entry) { transfer += entry.transferSize || 0; });
+return {
+  href: location.href,
+  timeOrigin: performance.timeOrigin,
+  dns: nav.domainLookupEnd - nav.domainLookupStart,
+  connect: nav.connectEnd - nav.connectStart,
+  ttfb: nav.responseStart,
+  response: nav.responseEnd - nav.responseStart,
+  dom_interactive: nav.domInteractive,
+  dom_content_loaded: nav.domContentLoadedEventEnd,
+  load: nav.loadEventEnd,
+  fcp: fcp ? fcp.startTime : null,
+  lcp: lcp.length ? lcp[lcp.length - 1].startTime : null,
+  cls: cls,
+  resources: resources.length,
+  transfer_kb: (transfer + (nav.transferSize || 0)) / 1024
+};
+"""
+
+METRICS = ('dns', 'connect', 'ttfb', 'response', 'dom_interactive', 'dom_content_loaded', 'load',
+           'fcp', 'lcp', 'cls', 'resources', 'transfer_kb')
+
+
+class WebVitalsCollector:
+    """
+    Tiempos de carga de cada página visitada por los casos, agregados por URL (origen y ruta,
+    sin la query) y resumidos como percentiles al final de la ejecución.
+
+    Tras un click solo se registra algo si cambió el documento (performance.timeOrigin),
+    es decir, si el click provocó una navegación.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # url -> métrica -> muestras en ms (cls y resources en sus propias unidades)
+        self._samples: Dict[str, Dict[str, array]] = {}
+        # Documento registrado por última vez: la sesión del navegador es una por ejecución
+        self._time_origin = None
+        self.captures = 0
+
+    def capture(self, driver):
+        try:
+            timing = driver.execute_script(_CAPTURE_SCRIPT)
+        except Exception as e:
+            logging.info(f"Could not capture navigation timing: {e}")
+            return
+        if not timing:
+            return
+        parsed = urlparse(timing['href'])
+        url = f'{parsed.scheme}://{parsed.netloc}{parsed.path}'
+        with self._lock:
+            if timing.get('timeOrigin') == self._time_origin:
+                return
+            self._time_origin = timing.get('timeOrigin')
+            self.captures += 1
+            series = self._samples.setdefault(url, {})
+            for metric in METRICS:
+                value = timing.get(metric)
+                # 0 indica una fase que no ocurrió o aún no terminó (p. ej. 'load' con page_load_strategy 'eager')
+                if value is None or (value <= 0 and metric not in ('cls', 'dns', 'connect')):
+                    continue
+                series.setdefault(metric, array('d')).append(float(value))
+
+    def summary(self) -> dict:
+        """{url: {'samples': n, métrica: {'p50', 'p90', 'p99'}}}"""
+        with self._lock:
+            samples = {url: {metric: array('d', values) for metric, values in series.items()}
+                       for url, series in self._samples.items()}
+        result = {}
+        for url, series in sorted(samples.items()):
+            entry = {'samples': max((len(values) for values in series.values()), default=0)}
+            for metric in METRICS:
+                values = series.get(metric)
+                if not values:
+                    continue
+                percentiles = np.percentile(np.frombuffer(values, dtype=np.float64), PERCENTILES)
+                entry[metric] = {f'p{p}': round(float(value), 4 if metric == 'cls' else 1)
+                                 for p, value in zip(PERCENTILES, percentiles)}
+            result[url] = entry
+        return result
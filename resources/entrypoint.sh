@@ -1,13 +1,18 @@
 #!/bin/bash
 
-# Iniciar el servidor Xvfb
-Xvfb :99 -ac -screen 0 1280x1024x16 &
+# El perfil 'headless' no necesita pantalla virtual, gestor de ventanas ni VNC
+if [ "${EXECUTOR_PROFILE}" != "headless" ]; then
+  # Iniciar el servidor Xvfb
+  Xvfb :99 -ac -screen 0 1280x1024x16 &
 
-# Iniciar fluxbox (entorno gráfico)
-fluxbox &
+  # Iniciar fluxbox (entorno gráfico)
+  fluxbox &
 
-# Iniciar x11vnc (servidor VNC)
-x11vnc -display :99 -nopw -listen 0.0.0.0 -xkb -ncache 10 -ncache_cr -forever &
+  # Iniciar x11vnc (servidor VNC); con VNC_ON_DEMAND el executor lo arranca cuando se pide
+  if [ "${VNC_ON_DEMAND}" != "true" ]; then
+    x11vnc -display :99 -nopw -listen 0.0.0.0 -xkb -ncache 10 -ncache_cr -forever &
+  fi
+fi
 
 # Iniciar Selenium Grid
 #java -Dwebdriver.chrome.driver=/usr/bin/chromedriver -jar /opt/selenium/selenium-server-standalone.jar -role hub &
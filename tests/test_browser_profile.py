@@ -0,0 +1,91 @@
+from application.services.browser_profile import (MEDIA_URL_PATTERNS, PageTimer, apply_session_options,
+                                                  blocked_url_patterns, performance_settings, session_signature)
+
+
+class FakeOptions:
+    def __init__(self):
+        self.page_load_strategy = None
+        self.arguments = []
+
+    def add_argument(self, argument):
+        self.arguments.append(argument)
+
+
+class FakeDriver:
+    def get(self, url):
+        pass
+
+
+def test_settings_fill_defaults_and_ignore_none():
+    settings = performance_settings({'page_load_strategy': 'eager', 'highlight': None})
+    assert settings['page_load_strategy'] == 'eager'
+    assert settings['highlight'] is True
+    assert performance_settings(None)['page_load_strategy'] == 'normal'
+
+
+def test_signature_ignores_hot_settings():
+    base = performance_settings({})
+    hot = performance_settings({'block_media': True, 'blocked_url_patterns': ['*.gif'], 'highlight': False})
+    assert session_signature(base) == session_signature(hot)
+    assert session_signature(base) != session_signature(performance_settings({'block_images': True}))
+
+
+def test_session_options():
+    options, prefs = FakeOptions(), {}
+    apply_session_options(options, performance_settings({'page_load_strategy': 'none', 'block_images': True,
+                                                         'disable_extensions': True}), prefs)
+    assert options.page_load_strategy == 'none'
+    assert prefs == {'profile.managed_default_content_settings.images': 2}
+    assert '--disable-extensions' in options.arguments
+    assert '--disable-background-networking' not in options.arguments
+
+
+def test_blocked_patterns_include_media():
+    settings = performance_settings({'blocked_url_patterns': ['*.gif'], 'block_media': True})
+    assert blocked_url_patterns(settings) == ['*.gif'] + list(MEDIA_URL_PATTERNS)
+
+
+def test_page_timer_report():
+    timer = PageTimer(performance_settings({}))
+    timer.start_case()
+    timer.navigate(FakeDriver(), 'https://app.example.com/')
+    timer.navigate(FakeDriver(), 'https://app.example.com/next')
+    timer.end_case()
+    # Navegaciones fuera de un caso (before_script) cuentan para la ejecución, no para los casos
+    timer.navigate(FakeDriver(), 'https://app.example.com/')
+    timer.skip_highlight(0.5)
+    report = timer.report()
+    assert report['navigations'] == 3
+    assert len(timer.cases) == 1
+    assert report['skipped_highlight_seconds'] == 0.5
+    assert report['profile']['page_load_strategy'] == 'normal'
+
+
+class SlowDriver:
+    def __init__(self, clock, seconds):
+        self.clock, self.seconds = clock, seconds
+
+    def get(self, url):
+        self.clock[0] += self.seconds
+
+
+def run_case(monkeypatch, timer, seconds):
+    clock = [0.0]
+    monkeypatch.setattr('application.services.browser_profile.time.perf_counter', lambda: clock[0])
+    timer.start_case()
+    timer.navigate(SlowDriver(clock, seconds), 'https://app.example.com/')
+    timer.end_case()
+    return timer.report()
+
+
+def test_report_gain_against_vnc_default_baseline(monkeypatch):
+    assert 'baseline_case_page_seconds' in run_case(monkeypatch, PageTimer(performance_settings({}), 'gain-run',
+                                                                            'headless'), 1.0)
+    baseline = run_case(monkeypatch, PageTimer(performance_settings({'capture_timing': True}), 'gain-run'), 4.0)
+    assert baseline['baseline'] is True
+    fast = run_case(monkeypatch, PageTimer(performance_settings({'block_images': True}), 'gain-run', 'headless'), 3.0)
+    assert fast['baseline_case_page_seconds'] == 4.0
+    assert fast['gain_case_page_seconds'] == 1.0
+    assert fast['gain_percent'] == 25.0
+    # Sin clave de referencia no se compara
+    assert 'gain_case_page_seconds' not in run_case(monkeypatch, PageTimer(performance_settings({'block_images': True})), 3.0)
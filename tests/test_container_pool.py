@@ -0,0 +1,134 @@
+import time
+import pytest
+from application.services import container_pool
+from application.services.container_pool import ContainerPool
+
+
+class FakeContainer:
+    def __init__(self, name, status='running'):
+        self.name = name
+        self.id = name
+        self.status = status
+
+    def reload(self):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, fail_reset=False):
+        self.fail_reset = fail_reset
+        self.window_handles = ['main']
+        self.quit_called = False
+        self.switch_to = self
+        self.commands = []
+
+    def window(self, handle):
+        pass
+
+    def execute_script(self, script):
+        if self.fail_reset:
+            raise Exception('session lost')
+        return 'https://app.example.com' if 'localStorage' in script else 'complete'
+
+    def execute(self, command, params):
+        self.commands.append(params['cmd'])
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeDockerService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.destroyed = []
+        self.state_cache = None
+
+    def destroy_container(self, name):
+        if self.fail:
+            raise Exception('daemon unreachable')
+        self.destroyed.append(name)
+
+
+@pytest.fixture
+def docker():
+    return FakeDockerService()
+
+
+@pytest.fixture
+def pool(monkeypatch, docker):
+    for name in ('CONTAINER_POOL_MAX_IDLE', 'CONTAINER_MAX_REUSE', 'CONTAINER_POOL_IDLE_TTL',
+                 'CONTAINER_REUSE_STRATEGY'):
+        monkeypatch.delenv(name, raising=False)
+    pool = ContainerPool()
+    pool._docker_service = docker
+    monkeypatch.setattr(pool, '_ensure_reaper', lambda: None)
+    return pool
+
+
+def entry(name, profile='vnc', driver=None, uses=1):
+    return {'container': FakeContainer(name), 'ports': {}, 'profile': profile, 'driver': driver or FakeDriver(),
+            'uses': uses, 'key': None, 'released_at': time.time()}
+
+
+def test_empty_pool_misses(pool):
+    assert pool.acquire('suite', 'vnc') is None
+
+
+def test_release_resets_browser_and_acquire_prefers_same_suite(pool):
+    first, second = entry('c1'), entry('c2')
+    assert pool.release(first, 'suite-a')
+    assert pool.release(second, 'suite-b')
+    assert 'Network.clearBrowserCookies' in second['driver'].commands
+    acquired = pool.acquire('suite-b', 'vnc')
+    assert acquired is second
+    assert acquired['uses'] == 2
+    assert pool.acquire('suite-x', 'headless') is None
+
+
+def test_release_discards_at_max_reuse(pool, docker):
+    assert not pool.release(entry('c1', uses=pool.max_reuse), 'suite')
+    assert docker.destroyed == ['c1']
+
+
+def test_release_discards_when_reset_fails(pool, docker):
+    failing = entry('c1', driver=FakeDriver(fail_reset=True))
+    assert not pool.release(failing, 'suite')
+    assert docker.destroyed == ['c1']
+    assert failing['driver'].quit_called
+
+
+def test_release_discards_when_pool_is_full(pool, docker):
+    pool.max_idle = 1
+    assert pool.release(entry('c1'), 'suite')
+    assert not pool.release(entry('c2'), 'suite')
+    assert docker.destroyed == ['c2']
+
+
+def test_acquire_skips_unhealthy_entries(pool, docker):
+    stale = entry('c1', driver=FakeDriver(fail_reset=False))
+    pool.release(stale, 'suite')
+    stale['container'].status = 'exited'
+    assert pool.acquire('suite', 'vnc') is None
+    assert docker.destroyed == ['c1']
+
+
+def test_reap_expired(pool, docker):
+    pool.release(entry('old'), 'suite')
+    pool.release(entry('new'), 'suite')
+    pool._idle[0]['released_at'] = time.time() - pool.idle_ttl - 1
+    assert pool.reap_expired() == 1
+    assert docker.destroyed == ['old']
+    assert [e['container'].name for e in pool._idle] == ['new']
+
+
+def test_discard_survives_docker_errors(pool):
+    pool._docker_service = FakeDockerService(fail=True)
+    assert not pool.release(entry('c1', uses=pool.max_reuse), 'suite')
+
+
+def test_shared_pool_is_a_singleton(monkeypatch):
+    monkeypatch.setattr(container_pool, '_pool_instance', None)
+    assert container_pool.get_container_pool() is container_pool.get_container_pool()
@@ -0,0 +1,65 @@
+import sqlite3
+import pytest
+from application.services.datasources import DatasourceRegistry, check_read_only
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    path = tmp_path / 'ref.db'
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+    connection.executemany('INSERT INTO items (name) VALUES (?)', [(f'item{i}',) for i in range(25)])
+    connection.commit()
+    connection.close()
+    monkeypatch.delenv('DATASOURCE_CHUNK_SIZE', raising=False)
+    monkeypatch.delenv('DATASOURCE_MAX_ROWS', raising=False)
+    registry = DatasourceRegistry()
+    registry.register('ref', f'sqlite:///{path}')
+    yield registry
+    registry.dispose()
+
+
+def test_stream_yields_chunks(registry):
+    chunks = list(registry.stream('ref', 'SELECT id, name FROM items ORDER BY id', chunk_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[0][0] == {'id': 1, 'name': 'item0'}
+
+
+def test_stream_caps_rows(registry):
+    rows = list(registry.rows('ref', 'SELECT id FROM items', chunk_size=4, max_rows=6))
+    assert len(rows) == 6
+
+
+def test_stream_binds_params(registry):
+    rows = list(registry.rows('ref', 'SELECT name FROM items WHERE id = :id', {'id': 3}))
+    assert rows == [{'name': 'item2'}]
+
+
+@pytest.mark.parametrize('query', [
+    "INSERT INTO items (name) VALUES ('x')",
+    'DELETE FROM items',
+    'DROP TABLE items',
+    'PRAGMA query_only = OFF',
+    '-- comentario\nUPDATE items SET name = 1',
+])
+def test_writes_are_rejected(registry, query):
+    with pytest.raises(Exception, match='solo lectura'):
+        list(registry.stream('ref', query))
+    assert len(list(registry.rows('ref', 'SELECT id FROM items'))) == 25
+
+
+def test_connection_is_read_only(registry):
+    # Una CTE pasa la comprobación de la sentencia; la escritura la impide PRAGMA query_only
+    with pytest.raises(Exception):
+        list(registry.stream('ref', 'WITH x AS (SELECT 1) DELETE FROM items'))
+    assert len(list(registry.rows('ref', 'SELECT id FROM items'))) == 25
+
+
+@pytest.mark.parametrize('query', ['SELECT 1', '  select 1', '(SELECT 1)', '/* c */ WITH x AS (SELECT 1) SELECT * FROM x'])
+def test_check_read_only_accepts_queries(query):
+    check_read_only('ref', query)
+
+
+def test_unknown_datasource(registry):
+    with pytest.raises(Exception, match='no registrado'):
+        registry.engine('missing')
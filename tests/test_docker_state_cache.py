@@ -0,0 +1,100 @@
+import threading
+import pytest
+from application.services.docker_state_cache import ContainerStateCache, _parse_health
+
+
+class FakeApi:
+    def __init__(self, containers=(), inspect=None):
+        self._containers = list(containers)
+        self._inspect = inspect or {}
+
+    def containers(self, all=False):
+        return self._containers
+
+    def inspect_container(self, container_id):
+        return self._inspect[container_id]
+
+
+class FakeClient:
+    def __init__(self, api):
+        self.api = api
+
+
+def event(action, container_id, **attributes):
+    return {'Action': action, 'Actor': {'ID': container_id, 'Attributes': attributes}}
+
+
+@pytest.fixture
+def cache():
+    return ContainerStateCache(client=FakeClient(FakeApi()))
+
+
+def test_seed_indexes_containers_and_ports():
+    api = FakeApi([{'Id': 'abc123', 'Names': ['/selenium-vnc-5900'], 'State': 'running',
+                    'Status': 'Up 2 minutes (healthy)', 'Ports': [{'PublicPort': 4444}, {'PrivatePort': 7900}],
+                    'Labels': {'robomatic.executor': 'selenium'}}])
+    cache = ContainerStateCache(client=FakeClient(api))
+    cache._seed()
+    assert cache.synced
+    assert cache.get('selenium-vnc-5900')['health'] == 'healthy'
+    assert cache.occupied_host_ports() == {4444}
+
+
+def test_registered_container_holds_ports_before_start(cache):
+    cache.register('c1', 'selenium-vnc-5900', [4444, 5900])
+    assert cache.get('c1')['status'] == 'created'
+    assert cache.occupied_host_ports() == {4444, 5900}
+    cache._apply_event(event('start', 'c1'))
+    assert cache.occupied_host_ports() == {4444, 5900}
+
+
+def test_ports_are_freed_on_die_and_destroy(cache):
+    cache.register('c1', 'a', [4444])
+    cache.register('c2', 'b', [4445])
+    cache._apply_event(event('start', 'c1'))
+    cache._apply_event(event('die', 'c1'))
+    assert cache.occupied_host_ports() == {4445}
+    cache._apply_event(event('destroy', 'c2'))
+    assert cache.occupied_host_ports() == set()
+    assert [c['id'] for c in cache.exited_containers()] == ['c1']
+
+
+def test_foreign_container_ports_are_inspected_on_start():
+    api = FakeApi(inspect={'x1': {'NetworkSettings': {'Ports': {'80/tcp': [{'HostPort': '8080'}]}}}})
+    cache = ContainerStateCache(client=FakeClient(api))
+    cache._apply_event(event('start', 'x1', name='nginx', image='nginx'))
+    assert cache.get('nginx')['status'] == 'running'
+    assert cache.occupied_host_ports() == {8080}
+
+
+def test_health_and_oom_events(cache):
+    cache.register('c1', 'a', [4444])
+    cache._apply_event(event('health_status: unhealthy', 'c1'))
+    cache._apply_event(event('oom', 'c1'))
+    state = cache.get('a')
+    assert state['health'] == 'unhealthy'
+    assert state['oom']
+
+
+def test_wait_for_running(cache):
+    cache.register('c1', 'a', [4444])
+    threading.Timer(0.05, cache._apply_event, [event('start', 'c1')]).start()
+    assert cache.wait_for_running('a', timeout=2)['status'] == 'running'
+
+
+def test_wait_for_running_raises_when_container_dies(cache):
+    cache.register('c1', 'a', [4444])
+    cache._apply_event(event('die', 'c1'))
+    with pytest.raises(RuntimeError):
+        cache.wait_for_running('a', timeout=1)
+    with pytest.raises(TimeoutError):
+        cache.wait_for_running('missing', timeout=0.05)
+
+
+@pytest.mark.parametrize('status, health', [
+    ('Up 3 minutes (healthy)', 'healthy'),
+    ('Up 1 second (health: starting)', 'starting'),
+    ('Exited (0) 2 hours ago', None),
+])
+def test_parse_health(status, health):
+    assert _parse_health(status) == health
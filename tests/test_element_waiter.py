@@ -0,0 +1,106 @@
+import pytest
+from application.services import element_waiter
+from application.services.element_waiter import ElementWaiter
+from application.services.locator_resolver import LocatorResolver
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 4))
+        self.now += seconds
+
+
+class FakeDriver:
+    """Encuentra el elemento por id a partir del intento 'found_after'; la espera JS se configura aparte."""
+
+    def __init__(self, found_after=None, async_result=None, async_error=None):
+        self.found_after = found_after
+        self.async_result = async_result
+        self.async_error = async_error
+        self.finds = 0
+        self.script_timeouts = []
+
+    def find_element(self, by, value):
+        self.finds += 1
+        if by == 'id' and self.found_after is not None and self.finds >= self.found_after:
+            return f'<{value}>'
+        raise Exception('no such element')
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+
+    def execute_async_script(self, script, candidates, timeout_ms):
+        if self.async_error:
+            raise self.async_error
+        return self.async_result
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(element_waiter, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def waiter(monkeypatch):
+    monkeypatch.delenv('WAIT_ELEMENT_MODE', raising=False)
+    monkeypatch.delenv('WAIT_POLL_INTERVAL', raising=False)
+    monkeypatch.delenv('WAIT_POLL_BACKOFF', raising=False)
+    monkeypatch.delenv('WAIT_MAX_POLL_INTERVAL', raising=False)
+    monkeypatch.setattr(LocatorResolver, '_by', staticmethod(lambda strategy: strategy))
+    return ElementWaiter(LocatorResolver())
+
+
+def test_poll_is_the_default_mode(waiter, clock):
+    driver = FakeDriver(found_after=1)
+    assert waiter.mode == 'poll'
+    assert waiter.wait(driver, 'login', timeout=5) == '<login>'
+    assert driver.script_timeouts == []
+
+
+def test_poll_interval_grows_up_to_the_cap(waiter, clock):
+    # 'login' prueba 7 estrategias por sondeo; aparece en el quinto sondeo
+    driver = FakeDriver(found_after=4 * 7 + 1)
+    waiter.wait(driver, 'login', timeout=30, interval=1, backoff=2)
+    assert clock.sleeps == [1, 2, 2, 2]
+
+
+def test_timeout_reports_attempts(waiter, clock):
+    driver = FakeDriver()
+    with pytest.raises(Exception) as error:
+        waiter.wait(driver, 'login', timeout=1, interval=0.25, backoff=1)
+    message = str(error.value)
+    assert message.startswith("TIMEOUT - Element no reachable: 'login' after 1s")
+    assert 'in-browser waits: 0, polls: 5' in message
+    assert "strategies: ['id', 'name'" in message
+    assert sum(clock.sleeps) == pytest.approx(1)
+
+
+def test_js_mode_resolves_in_browser_and_learns(waiter, clock):
+    driver = FakeDriver(async_result=['<element>', 1])
+    assert waiter.wait(driver, 'login', timeout=10, mode='js') == '<element>'
+    assert driver.script_timeouts == [15]
+    assert waiter.resolver.candidates('login')[0] == ('name', 'login')
+    # El script timeout de la sesión solo se amplía cuando hace falta
+    waiter.wait(driver, 'login', timeout=5, mode='js')
+    assert driver.script_timeouts == [15]
+
+
+def test_js_mode_falls_back_to_polling(waiter, clock):
+    driver = FakeDriver(found_after=1, async_error=Exception('javascript error: navigation'))
+    assert waiter.wait(driver, 'login', timeout=5, mode='js') == '<login>'
+
+
+def test_js_timeout_does_one_last_check(waiter, clock):
+    driver = FakeDriver()
+    with pytest.raises(Exception, match='in-browser waits: 1, polls: 1'):
+        waiter.wait(driver, 'login', timeout=5, mode='js')
+    assert clock.sleeps == []
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip('lxml')
+pytest.importorskip('cssselect')
+
+from application.services.extractor import _body_kind, _is_xpath, extract  # noqa: E402
+from application.services.response_body import KIND_HTML, KIND_XML  # noqa: E402
+
+HTML = """<html><head><title>Inicio</title></head><body>
+<div id="a"><a href="/uno" class="link">Uno</a><a href="/dos" class="link">Dos</a></div>
+</body></html>"""
+
+SOAP = """<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+<soap:Body><r:Result xmlns:r="urn:test"><r:Code>42</r:Code></r:Result></soap:Body></soap:Envelope>"""
+
+NAMESPACES = {'soap': 'http://schemas.xmlsoap.org/soap/envelope/', 'r': 'urn:test'}
+
+
+@pytest.mark.parametrize('expression', [
+    '//a', '(//a)[1]', './/a', '..', '.', '@href', 'count(//a)', 'string(//title)',
+    'descendant::div', 'normalize-space(//title)', 'a/@href', 'td[2]/text()', 'div/a', "a[@class='link']",
+])
+def test_xpath_expressions(expression):
+    assert _is_xpath(expression)
+
+
+@pytest.mark.parametrize('expression', ['a.link', '.link', '#a a', 'div > a', 'a:nth-child(2)', 'a[href]',
+                                        "a[href='/uno']", 'a[href="/dos"]'])
+def test_css_expressions(expression):
+    assert not _is_xpath(expression)
+
+
+def test_extract_html():
+    assert extract(HTML, 'a.link') == 'Uno'
+    assert extract(HTML, '//a/@href', all_matches=True) == ['/uno', '/dos']
+    assert extract(HTML, 'count(//a)') == 2.0
+    assert extract(HTML, 'string(//title)') == 'Inicio'
+    assert extract(HTML, {'title': 'title', 'ids': 'descendant::div/@id'}) == {'title': 'Inicio', 'ids': 'a'}
+
+
+def test_extract_relative_xpath():
+    assert extract(HTML, {'h': 'body/div/a/@href'}) == {'h': '/uno'}
+    assert extract(HTML, 'body/div/a[2]/text()') == 'Dos'
+    assert extract(HTML, 'head/title/text()') == 'Inicio'
+    assert extract(HTML, "a[href='/dos']") == 'Dos'
+
+
+def test_extract_namespaced_xml_without_declaration():
+    assert extract(SOAP, '//r:Code', namespaces=NAMESPACES) == '42'
+
+
+def test_extract_from_response_uses_content_type():
+    response = {'headers': {'Content-Type': 'text/xml; charset=utf-8'}, 'body': '<a xmlns="urn:x"><b>1</b></a>'}
+    assert extract(response, '//x:b', namespaces={'x': 'urn:x'}) == '1'
+
+
+@pytest.mark.parametrize('text, content_type, kind', [
+    (SOAP, '', KIND_XML),
+    ('<?xml version="1.0"?><a/>', '', KIND_XML),
+    ('<root xmlns="urn:x"><b/></root>', '', KIND_XML),
+    ('<html xmlns="http://www.w3.org/1999/xhtml"><body/></html>', '', KIND_HTML),
+    ('<!DOCTYPE html><html><body/></html>', '', KIND_HTML),
+    ('<div>sin raíz html</div>', '', KIND_HTML),
+    ('<a/>', 'application/xml', KIND_XML),
+    ('<?xml version="1.0"?><html/>', 'text/html', KIND_HTML),
+])
+def test_body_kind(text, content_type, kind):
+    assert _body_kind(text, content_type) == kind
@@ -0,0 +1,51 @@
+import pytest
+from application.services.http_client import HTTP_UPSTREAM_SECONDS, HttpClient
+
+
+class FakeResponse:
+    status_code = 503
+
+
+def test_settings_per_upstream_override_common(monkeypatch):
+    monkeypatch.setenv('HTTP_READ_TIMEOUT', '30')
+    monkeypatch.setenv('HTTP_READ_TIMEOUT_MAIL', '10')
+    monkeypatch.delenv('HTTP_CONNECT_TIMEOUT', raising=False)
+    assert HttpClient.timeout('rest') == (5.0, 30.0)
+    assert HttpClient.timeout('mail') == (5.0, 10.0)
+
+
+def test_one_session_per_upstream(monkeypatch):
+    monkeypatch.setenv('HTTP_RETRIES_JMS', '0')
+    client = HttpClient()
+    assert client.session('rest') is client.session('rest')
+    assert client.session('rest') is not client.session('jms')
+    assert client.session('jms').get_adapter('http://jms').max_retries.total == 0
+    client.close()
+
+
+def test_request_uses_upstream_url_and_records_latency(monkeypatch):
+    monkeypatch.setenv('MAIL_API_URL', 'http://mail/send')
+    client = HttpClient()
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append((method, url, kwargs['timeout']))
+        return FakeResponse()
+
+    monkeypatch.setattr(client.session('mail'), 'request', fake_request)
+    before = HTTP_UPSTREAM_SECONDS.snapshot().get('mail,5xx', {}).get('count', 0)
+    assert client.post('mail', data='{}').status_code == 503
+    assert calls == [('POST', 'http://mail/send', HttpClient.timeout('mail'))]
+    assert HTTP_UPSTREAM_SECONDS.snapshot()['mail,5xx']['count'] == before + 1
+
+
+def test_failed_request_is_recorded_as_error(monkeypatch):
+    client = HttpClient()
+
+    def fail(method, url, **kwargs):
+        raise ConnectionError('refused')
+
+    monkeypatch.setattr(client.session('gdrive'), 'request', fail)
+    with pytest.raises(ConnectionError):
+        client.request('gdrive', 'GET', url='http://gdrive/x')
+    assert HTTP_UPSTREAM_SECONDS.snapshot()['gdrive,error']['count'] >= 1
@@ -0,0 +1,60 @@
+import pytest
+from application.services import docker_service_v2
+
+
+class FakeDockerService:
+    """Falla mientras 'daemon_up' sea False, como un daemon que aún no arrancó."""
+    daemon_up = False
+    builds = 0
+
+    def __init__(self):
+        if not FakeDockerService.daemon_up:
+            raise Exception('daemon unreachable')
+
+    def create_docker_image(self):
+        FakeDockerService.builds += 1
+        return True
+
+
+@pytest.fixture(autouse=True)
+def build_state(monkeypatch):
+    monkeypatch.setattr(docker_service_v2, 'DockerService', FakeDockerService)
+    monkeypatch.setattr(docker_service_v2, '_image_build_status',
+                        {'status': 'pending', 'built': None, 'error': None, 'duration': None, 'failed_at': None})
+    monkeypatch.setattr(docker_service_v2, '_image_build_done', docker_service_v2.threading.Event())
+    FakeDockerService.daemon_up = False
+    FakeDockerService.builds = 0
+
+
+def test_no_build_managed():
+    assert docker_service_v2.wait_for_image(1)
+
+
+def test_successful_build():
+    FakeDockerService.daemon_up = True
+    assert docker_service_v2.start_image_build()
+    assert not docker_service_v2.start_image_build()
+    assert docker_service_v2.wait_for_image(5)
+    assert docker_service_v2.get_image_build_status()['status'] == 'ready'
+
+
+def test_failed_build_is_retried_after_backoff(monkeypatch):
+    monkeypatch.setenv('IMAGE_BUILD_RETRY_SECONDS', '0')
+    docker_service_v2.start_image_build()
+    assert not docker_service_v2.wait_for_image(5)
+    assert docker_service_v2.get_image_build_status()['status'] == 'failed'
+
+    FakeDockerService.daemon_up = True
+    assert docker_service_v2.wait_for_image(5)
+    assert FakeDockerService.builds == 1
+    assert docker_service_v2.get_image_build_status()['status'] == 'ready'
+
+
+def test_failed_build_waits_for_backoff(monkeypatch):
+    monkeypatch.setenv('IMAGE_BUILD_RETRY_SECONDS', '3600')
+    docker_service_v2.start_image_build()
+    assert not docker_service_v2.wait_for_image(5)
+    FakeDockerService.daemon_up = True
+    assert not docker_service_v2.start_image_build()
+    assert not docker_service_v2.wait_for_image(5)
+    assert FakeDockerService.builds == 0
@@ -0,0 +1,57 @@
+import threading
+from array import array
+import pytest
+from application.services.latency_stats import LatencyRecorder, _stats, format_summary
+
+pytest.importorskip('numpy')
+
+
+def test_empty_buffer():
+    assert _stats([]) == {'count': 0}
+
+
+def test_stats_percentiles():
+    stats = _stats(array('d', [i / 100 for i in range(1, 101)]))
+    assert stats['count'] == 100
+    assert stats['min'] == 0.01
+    assert stats['max'] == 1.0
+    assert stats['mean'] == 0.505
+    assert stats['p50'] == 0.505
+    assert stats['p90'] == 0.901
+    assert stats['p99'] == 0.9901
+
+
+def test_summary_with_throughput():
+    recorder = LatencyRecorder()
+    for seconds in (1.0, 2.0, 3.0):
+        recorder.record_case(seconds)
+    recorder.record_primitive('get', 0.5)
+    summary = recorder.summary(wall_seconds=2.0)
+    assert summary['cases']['count'] == 3
+    assert summary['throughput_cases_per_second'] == 1.5
+    assert summary['primitives']['get']['p50'] == 0.5
+
+
+def test_concurrent_recording():
+    recorder = LatencyRecorder()
+
+    def record():
+        for _ in range(1000):
+            recorder.record_primitive('click', 0.1)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recorder.summary()['primitives']['click']['count'] == 4000
+
+
+def test_format_summary():
+    recorder = LatencyRecorder()
+    recorder.record_case(1.0)
+    text = format_summary(recorder.summary(wall_seconds=1.0))
+    lines = text.splitlines()
+    assert lines[0] == 'series count min mean p50 p90 p99 max'
+    assert lines[1] == 'cases 1 1.0 1.0 1.0 1.0 1.0 1.0'
+    assert lines[-1] == 'throughput_cases_per_second 1.0'
@@ -0,0 +1,88 @@
+import threading
+import pytest
+from application.services.locator_resolver import LocatorResolver
+
+
+@pytest.mark.parametrize('selector, expected', [
+    ('//div[@id="a"]', ['xpath']),
+    ('(//a)[2]', ['xpath']),
+    ('./span', ['xpath']),
+    ("div[@id='a']", ['xpath', 'css_selector', 'id', 'name', 'link_text', 'partial_link_text']),
+    ('html/body/div', ['xpath', 'id', 'name', 'class_name', 'tag_name', 'link_text', 'partial_link_text']),
+    ('descendant::input', ['xpath', 'css_selector', 'id', 'name', 'link_text', 'partial_link_text']),
+    ('login', ['id', 'name', 'class_name', 'tag_name', 'link_text', 'partial_link_text', 'xpath']),
+    ('#menu a', ['css_selector', 'id', 'name', 'link_text', 'partial_link_text', 'xpath']),
+    ('Iniciar sesión', ['link_text', 'partial_link_text', 'css_selector', 'xpath']),
+])
+def test_classify(selector, expected):
+    assert LocatorResolver.classify(selector) == expected
+
+
+def test_classify_always_offers_xpath():
+    for selector in ('a', 'a.b', 'a b', "div[@id='a']", 'html/body'):
+        assert 'xpath' in LocatorResolver.classify(selector)
+
+
+class FakeDriver:
+    """find_element que solo encuentra el selector con la estrategia indicada."""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.calls = []
+
+    def find_element(self, by, value):
+        self.calls.append(by)
+        if by == self.strategy:
+            return f'<{value}>'
+        raise Exception('not found')
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    resolver = LocatorResolver()
+    monkeypatch.setattr(LocatorResolver, '_by', staticmethod(lambda strategy: strategy))
+    return resolver
+
+
+def test_explicit_prefix_skips_probing(resolver):
+    driver = FakeDriver('id')
+    assert resolver.find(driver, 'id:login') == '<login>'
+    assert driver.calls == ['id']
+    assert resolver.stats['explicit'] == 1
+
+
+def test_learned_strategy_is_tried_first(resolver):
+    resolver.set_page('https://app.example.com/login')
+    driver = FakeDriver('name')
+    resolver.find(driver, 'user')
+    driver.calls.clear()
+    resolver.find(driver, 'user')
+    assert driver.calls == ['name']
+    assert resolver.stats['hits'] == 1
+
+
+def test_unanchored_xpath_is_found(resolver):
+    driver = FakeDriver('xpath')
+    assert resolver.find(driver, 'html/body/div') == '<html/body/div>'
+
+
+def test_not_found_raises(resolver):
+    with pytest.raises(Exception, match='Element no reachable'):
+        resolver.find(FakeDriver('none'), 'missing')
+
+
+def test_origin_is_per_thread(resolver):
+    resolver.set_page('https://a.example.com/')
+    resolver.learn('user', 'name')
+    seen = {}
+
+    def other_case():
+        resolver.set_page('https://b.example.com/')
+        seen['candidates'] = resolver.candidates('user')
+
+    thread = threading.Thread(target=other_case)
+    thread.start()
+    thread.join()
+    # Otro hilo en otro origen no ve lo aprendido ni cambia el origen de este hilo
+    assert seen['candidates'][0] == ('id', 'user')
+    assert resolver.candidates('user')[0] == ('name', 'user')
@@ -0,0 +1,76 @@
+import threading
+import time
+import pytest
+from application.services.memo_cache import COALESCED, HIT, MISS, MemoCache, canonical_key
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key('q', {'a': 1, 'b': {'x': 1, 'y': 2}}) == canonical_key('q', {'b': {'y': 2, 'x': 1}, 'a': 1})
+
+
+def test_canonical_key_separates_namespaces_and_values():
+    assert canonical_key('consumeService', {'a': 1}) != canonical_key('executeQuery', {'a': 1})
+    assert canonical_key('q', {'a': 1}) != canonical_key('q', {'a': '1'})
+
+
+def test_canonical_key_handles_non_json_values():
+    assert canonical_key('q', {'when': time}) == canonical_key('q', {'when': time})
+
+
+def test_hit_after_miss_returns_a_copy():
+    cache = MemoCache(4)
+    value, outcome = cache.get_or_load('k', lambda: {'rows': [1]})
+    assert outcome == MISS
+    value['rows'].append(2)
+    assert cache.get_or_load('k', lambda: None) == ({'rows': [1]}, HIT)
+
+
+def test_errors_are_not_cached():
+    cache = MemoCache(4)
+
+    def fail():
+        raise ValueError('down')
+
+    with pytest.raises(ValueError):
+        cache.get_or_load('k', fail)
+    assert cache.get_or_load('k', lambda: 1) == (1, MISS)
+
+
+def test_lru_eviction():
+    cache = MemoCache(2)
+    for key in ('a', 'b'):
+        cache.get_or_load(key, lambda: key)
+    cache.get_or_load('a', lambda: None)
+    cache.get_or_load('c', lambda: 'c')
+    assert cache.evictions == 1
+    assert cache.get_or_load('a', lambda: None)[1] == HIT
+    assert cache.get_or_load('b', lambda: 'b')[1] == MISS
+
+
+def test_ttl_expiry():
+    cache = MemoCache(4, ttl=0.01)
+    cache.get_or_load('k', lambda: 1)
+    time.sleep(0.02)
+    assert cache.get_or_load('k', lambda: 2) == (2, MISS)
+
+
+def test_concurrent_calls_are_coalesced():
+    cache = MemoCache(4)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return 'value'
+
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(cache.get_or_load('k', slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in outcomes) == [COALESCED] * 4 + [MISS]
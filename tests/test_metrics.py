@@ -0,0 +1,46 @@
+import pytest
+from application.metrics import Counter, Gauge, Histogram, _Metric, exposition
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric('test_abstract', 'Sin samples().')
+
+
+def test_counter_samples():
+    counter = Counter('test_calls', 'Llamadas.', labelnames=('kind',))
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    assert counter.samples() == ['test_calls_total{kind="a"} 3']
+
+
+def test_gauge_function_and_labels():
+    gauge = Gauge('test_depth', 'Profundidad.')
+    gauge.inc()
+    gauge.dec()
+    assert gauge.samples() == ['test_depth 0']
+    gauge.set_function(lambda: 7)
+    assert gauge.samples() == ['test_depth 7']
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Duración.', labelnames=('phase',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, phase='run')
+    snapshot = histogram.snapshot()['run']
+    assert snapshot['buckets'] == {'0.1': 1, '1.0': 2, '+Inf': 3}
+    assert snapshot['count'] == 3
+    assert 'test_seconds_bucket{phase="run",le="+Inf"} 3' in histogram.samples()
+
+
+def test_label_values_are_escaped():
+    counter = Counter('test_escaped', 'Escapado.', labelnames=('query',))
+    counter.inc(query='a "b"\nc')
+    assert counter.samples() == ['test_escaped_total{query="a \\"b\\"\\nc"} 1']
+
+
+def test_exposition_has_help_and_type():
+    Counter('test_exposed', 'Expuesta.')
+    text = exposition()
+    assert '# HELP test_exposed Expuesta.\n# TYPE test_exposed counter\n' in text
+    assert text.endswith('\n')
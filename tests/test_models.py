@@ -0,0 +1,16 @@
+import pytest
+from pydantic import ValidationError
+from application.models import models
+
+REQUIRED = {'script': '', 'before_script': '', 'after_script': '', 'test_cases_file': '', 'threads': 1,
+            'name': 'run', 'test_execution_id': '1', 'web': True}
+
+
+def test_profile_defaults_to_vnc():
+    assert models.TestExecutionRequest(**REQUIRED).profile == 'vnc'
+    assert models.TestExecutionRequest(**REQUIRED, profile='headless').profile == 'headless'
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValidationError):
+        models.TestExecutionRequest(**REQUIRED, profile='headles')
@@ -0,0 +1,63 @@
+import pytest
+from application.services.outbox import KIND_JMS, KIND_MAIL, Outbox, format_deliveries
+from application.services.rate_limiter import RateLimiter
+
+
+class FakeResponse:
+    status_code = 200
+
+
+class FakeHttp:
+    def __init__(self):
+        self.calls = []
+
+    def post(self, upstream, data=None, url=None):
+        self.calls.append((upstream, data, url))
+        return FakeResponse()
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch):
+    monkeypatch.delenv('RATE_LIMITS', raising=False)
+    monkeypatch.delenv('MAIL_BATCH_API_URL', raising=False)
+    monkeypatch.delenv('JMS_BATCH_API_URL', raising=False)
+
+
+def test_deliveries_keep_their_case():
+    http = FakeHttp()
+    outbox = Outbox(http, 'exec-1')
+    outbox.enqueue(KIND_MAIL, {'subject': 'a'}, 'case-1')
+    outbox.enqueue(KIND_JMS, {'engine': 'q'}, 'case-2')
+    deliveries = outbox.flush(5)
+    assert sorted((d['kind'], d['case_execution_id'], d['status']) for d in deliveries) == \
+        [(KIND_JMS, 'case-2', 'sent'), (KIND_MAIL, 'case-1', 'sent')]
+    assert outbox.summary()['sent'] == 2
+
+
+def test_batch_url_sends_one_call(monkeypatch):
+    monkeypatch.setenv('JMS_BATCH_API_URL', 'http://jms/batch')
+    http = FakeHttp()
+    outbox = Outbox(http, 'exec-1')
+    for i in range(3):
+        outbox.enqueue(KIND_JMS, {'n': i}, 'case')
+    outbox.flush(5)
+    assert all(url == 'http://jms/batch' for _, _, url in http.calls)
+    assert len(outbox.deliveries) == 3
+
+
+def test_deliveries_respect_rate_limits():
+    limiter = RateLimiter({'mail': {'max_in_flight': 1}})
+    outbox = Outbox(FakeHttp(), 'exec-1', limiter)
+    for i in range(3):
+        outbox.enqueue(KIND_MAIL, {'n': i})
+    outbox.flush(5)
+    assert limiter.summary()['targets']['mail']['calls'] == 3
+
+
+
+def test_format_deliveries_keeps_text():
+    text = format_deliveries([{'kind': KIND_MAIL, 'status': 'failed', 'detail': "can't connect",
+                               'case_execution_id': 'c1', 'enqueued_at': 0.0, 'delivered_at': 1.5}])
+    assert "can't connect" in text
+    assert 'case=c1' in text
+    assert 'latency=1.500s' in text
@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+from application.services.rate_limiter import Limit, RateLimiter, url_host
+
+
+@pytest.fixture(autouse=True)
+def no_env_limits(monkeypatch):
+    monkeypatch.delenv('RATE_LIMITS', raising=False)
+
+
+def test_disabled_without_limits():
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    with limiter.limit('rest', 'api.example.com'):
+        pass
+    assert limiter.summary() == {'throttled_seconds': 0, 'targets': {}}
+
+
+def test_request_limits_override_env(monkeypatch):
+    monkeypatch.setenv('RATE_LIMITS', '{"rest": {"rate": 1}, "mail": {"max_in_flight": 2}}')
+    limiter = RateLimiter({'REST': {'rate': 50, 'burst': 5}})
+    assert set(limiter.summary()['targets']) == {'rest', 'mail'}
+    assert limiter._limits['rest'].rate == 50
+
+
+def test_repeated_target_is_acquired_once():
+    # El host de la URL coincide con el nombre del servicio: con max_in_flight=1 no debe bloquearse
+    limiter = RateLimiter({'rest': {'max_in_flight': 1}})
+    done = threading.Event()
+
+    def call():
+        with limiter.limit(url_host('http://rest:8080/api'), 'rest', 'REST'):
+            done.set()
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    thread.join(2)
+    assert done.is_set()
+    assert limiter.summary()['targets']['rest']['calls'] == 1
+
+
+def test_burst_then_rate():
+    limit = Limit(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        with limit.acquire():
+            pass
+    # Dos llamadas entran en la ráfaga; las otras dos esperan 1/20 s cada una
+    assert time.monotonic() - start >= 0.09
+    assert limit.stats()['calls'] == 4
+    assert limit.stats()['waits'] >= 1
+
+
+def test_max_in_flight():
+    limit = Limit(max_in_flight=2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with limit.acquire():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_url_host():
+    assert url_host('https://API.example.com:8443/x?y=1') == 'api.example.com'
+    assert url_host(None) is None
@@ -0,0 +1,42 @@
+import pytest
+from application.services.response_body import KIND_HTML, KIND_XML, LazyBody
+
+XML = '<?xml version="1.0"?><root><item id="1">uno</item></root>'
+HTML = '<html><body><p class="a">hola</p></body></html>'
+
+
+def test_body_is_not_parsed_until_used():
+    body = LazyBody(XML, KIND_XML)
+    assert body.raw_text == XML
+    assert body._parsed is None
+    assert body.getElementsByTagName('item')[0].getAttribute('id') == '1'
+    assert body._parsed is not None
+
+
+def test_xml_str_and_repr_match_minidom():
+    body = LazyBody(XML, KIND_XML)
+    assert str(body) == str(body.parsed)
+    assert repr(body) == repr(body.parsed)
+    assert repr({'body': body}) == repr({'body': body.parsed})
+
+
+def test_html_repr_is_the_markup():
+    pytest.importorskip('bs4')
+    body = LazyBody(HTML, KIND_HTML)
+    assert repr(body) == repr(body.parsed)
+    assert '<p class="a">hola</p>' in repr({'body': body})
+    assert body.find('p').text == 'hola'
+
+
+def test_lxml_tree():
+    pytest.importorskip('lxml')
+    assert LazyBody(XML, KIND_XML).lxml_tree.findtext('item') == 'uno'
+    assert LazyBody(HTML, KIND_HTML).lxml_tree.xpath('string(//p)') == 'hola'
+
+
+def test_html_fragment_keeps_html_parser_output():
+    bs4 = pytest.importorskip('bs4')
+    fragment = '<p>hola</p><br>'
+    body = LazyBody(fragment, KIND_HTML)
+    assert str(body) == str(bs4.BeautifulSoup(fragment, 'html.parser')) == '<p>hola</p><br/>'
+    assert repr(body) == '<p>hola</p><br/>'
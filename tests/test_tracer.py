@@ -0,0 +1,57 @@
+import json
+import threading
+import pytest
+from application.services.tracer import TRACE_FILE_NAME, ExecutionTracer
+
+
+def test_unsampled_case_has_no_trace(tmp_path):
+    tracer = ExecutionTracer(0)
+    assert tracer.start_case('c1') is None
+    with tracer.span('exec'):
+        pass
+    tracer.finish_case(str(tmp_path))
+    assert not (tmp_path / TRACE_FILE_NAME).exists()
+
+
+def test_sampled_case_writes_trace(tmp_path):
+    tracer = ExecutionTracer(1)
+    tracer.start_case('c1')
+    with tracer.span('exec'):
+        with pytest.raises(ValueError):
+            with tracer.span('click', 'primitive', target='#ok'):
+                raise ValueError('boom')
+    tracer.finish_case(str(tmp_path))
+    trace = json.loads((tmp_path / TRACE_FILE_NAME).read_text())
+    events = {event['name']: event for event in trace['traceEvents'] if event['ph'] == 'X'}
+    assert events['click']['args'] == {'target': '#ok', 'error': 'ValueError'}
+    assert events['exec']['dur'] >= events['click']['dur']
+    assert trace['otherData']['case_execution_id'] == 'c1'
+
+
+def test_finish_case_detaches_trace(tmp_path):
+    tracer = ExecutionTracer(1)
+    tracer.start_case('c1')
+    tracer.finish_case(None)
+    assert tracer.span('exec').__class__.__name__ == 'nullcontext'
+
+
+def test_events_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setenv('TRACE_MAX_EVENTS', '2')
+    tracer = ExecutionTracer(1)
+    trace = tracer.start_case('c1')
+    for _ in range(5):
+        with tracer.span('tick'):
+            pass
+    assert len(trace.events) == 2
+    assert trace.dropped == 3
+
+
+def test_traced_cases_counted_across_threads():
+    tracer = ExecutionTracer(1)
+    threads = [threading.Thread(target=lambda i=i: [tracer.start_case(f'c{i}-{n}') for n in range(200)])
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracer.traced_cases == 1600
@@ -0,0 +1,60 @@
+import pytest
+from application.services.web_vitals import WebVitalsCollector
+
+pytest.importorskip('numpy')
+
+
+class FakeDriver:
+    def __init__(self, *timings):
+        self.timings = list(timings)
+
+    def execute_script(self, script):
+        timing = self.timings.pop(0)
+        if isinstance(timing, Exception):
+            raise timing
+        return timing
+
+
+def timing(href, time_origin, **values):
+    base = {'href': href, 'timeOrigin': time_origin, 'dns': 0, 'connect': 0, 'ttfb': 100, 'load': 400,
+            'fcp': 200, 'lcp': None, 'cls': 0}
+    base.update(values)
+    return base
+
+
+def test_same_document_is_captured_once():
+    page = timing('https://app.example.com/home?x=1', 1000.0)
+    collector = WebVitalsCollector()
+    driver = FakeDriver(page, dict(page))
+    collector.capture(driver)
+    collector.capture(driver)
+    assert collector.captures == 1
+
+
+def test_new_document_is_captured_and_grouped_by_path():
+    collector = WebVitalsCollector()
+    driver = FakeDriver(timing('https://app.example.com/home?x=1', 1000.0, ttfb=100),
+                        timing('https://app.example.com/home?x=2', 2000.0, ttfb=300))
+    collector.capture(driver)
+    collector.capture(driver)
+    summary = collector.summary()
+    assert list(summary) == ['https://app.example.com/home']
+    assert summary['https://app.example.com/home']['samples'] == 2
+    assert summary['https://app.example.com/home']['ttfb']['p50'] == 200.0
+
+
+def test_missing_phases_are_skipped():
+    collector = WebVitalsCollector()
+    collector.capture(FakeDriver(timing('https://app.example.com/', 1.0, load=0)))
+    entry = collector.summary()['https://app.example.com/']
+    assert 'load' not in entry and 'lcp' not in entry
+    assert entry['cls'] == {'p50': 0.0, 'p90': 0.0, 'p99': 0.0}
+
+
+def test_script_errors_and_empty_results_are_ignored():
+    collector = WebVitalsCollector()
+    driver = FakeDriver(RuntimeError('no session'), None)
+    collector.capture(driver)
+    collector.capture(driver)
+    assert collector.captures == 0
+    assert collector.summary() == {}